@@ -0,0 +1,121 @@
+#! /usr/bin/env python
+
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+Cold-call cost of resolving a binding site: the direct decoder in
+mapbind._decode versus the dis.get_instructions scan that bindings
+used to perform, at binding sites near the start and the end of
+functions of increasing size.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from __future__ import print_function
+
+import sys
+
+from dis import get_instructions
+from timeit import repeat
+
+from mapbind._decode import decode_bindings
+
+
+def scan_bindings(code, index):
+    # the pre-decoder implementation of bindings, minus the cache,
+    # and taught to step over EXTENDED_ARG and to split the 3.13
+    # fused stores so that it can cope with the larger functions
+    iterins = (instr for instr in get_instructions(code)
+               if instr.opname != "EXTENDED_ARG")
+
+    for instr in iterins:
+        if instr.offset > index:
+            break
+
+    assert instr.opname == "UNPACK_SEQUENCE"
+
+    found = []
+    while len(found) < instr.argval:
+        argval = next(iterins).argval
+        if isinstance(argval, tuple):
+            found.extend(argval)
+        else:
+            found.append(argval)
+
+    return tuple(found)
+
+
+def probe(data):
+    # stands in for mapbind at the measured site, recording where
+    # it was called from
+    caller = sys._getframe(1)
+    probe.site = (caller.f_code, caller.f_lasti)
+    return data["a"], data["b"], data["c"]
+
+
+def make_function(statements, late):
+    # a big generated function, with a single binding site either
+    # first or last in its body
+    body = ["    x%i = data['a'] + %i" % (i, i) for i in range(statements)]
+    site = "    a, b, c = binder(data)"
+
+    if late:
+        body.append(site)
+    else:
+        body.insert(0, site)
+
+    src = "def generated(data, binder):\n%s\n    return a\n" % "\n".join(body)
+
+    glbls = {}
+    exec(compile(src, "<generated>", "exec"), glbls)
+    return glbls["generated"]
+
+
+def best(stmt, number):
+    return min(repeat(stmt, number=number, repeat=5)) / number
+
+
+def main():
+    data = {"a": 1, "b": 2, "c": 3}
+
+    print("%10s %6s %12s %12s %8s" %
+          ("statements", "site", "scan usec", "decode usec", "speedup"))
+
+    for statements in (10, 100, 1000, 5000):
+        for late in (False, True):
+            fun = make_function(statements, late)
+            fun(data, probe)
+            code, index = probe.site
+
+            assert scan_bindings(code, index) == ("a", "b", "c")
+            assert decode_bindings(code, index) == ("a", "b", "c")
+
+            number = 20 if statements > 1000 else 200
+            scan = best(lambda: scan_bindings(code, index), number)
+            decode = best(lambda: decode_bindings(code, index), number)
+
+            print("%10i %6s %12.2f %12.2f %7.1fx" %
+                  (statements, "last" if late else "first",
+                   scan * 1e6, decode * 1e6, scan / decode))
+
+
+if __name__ == "__main__":
+    main()
+
+
+# The end.
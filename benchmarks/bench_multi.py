@@ -0,0 +1,79 @@
+#! /usr/bin/env python
+
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+Cost of binding from layered sources with multibind, against
+mapbind on a ChainMap and against hand-written chains of get calls.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from __future__ import print_function
+
+from collections import ChainMap
+from timeit import repeat
+
+from mapbind import fastbind, mapbind, multibind
+
+
+ARGS = {"page": 2, "q": "tacos"}
+FORM = {"user": "bob", "csrf": "abc123", "q": "beer"}
+DEFAULTS = {"user": None, "page": 1, "limit": 10, "sort": "asc", "q": ""}
+
+
+def by_hand(args, form, defaults):
+    user = args.get("user", form.get("user", defaults.get("user")))
+    page = args.get("page", form.get("page", defaults.get("page")))
+    limit = args.get("limit", form.get("limit", defaults.get("limit")))
+    return user
+
+
+def with_chainmap(args, form, defaults):
+    user, page, limit = mapbind(ChainMap(args, form, defaults))
+    return user
+
+
+def with_multibind(args, form, defaults):
+    user, page, limit = multibind(args, form, defaults)
+    return user
+
+
+BENCHES = (
+    ("by hand", by_hand),
+    ("ChainMap+mapbind", with_chainmap),
+    ("multibind", with_multibind),
+    ("fastbind multi", fastbind(with_multibind)),
+)
+
+
+def main(number=200000):
+    print("%18s %10s" % ("", "nsec/call"))
+
+    for label, fun in BENCHES:
+        fun(ARGS, FORM, DEFAULTS)
+        best = min(repeat(lambda: fun(ARGS, FORM, DEFAULTS),
+                          number=number, repeat=5))
+        print("%18s %10.1f" % (label, best / number * 1e9))
+
+
+if __name__ == "__main__":
+    main()
+
+
+# The end.
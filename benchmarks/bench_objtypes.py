@@ -0,0 +1,152 @@
+#! /usr/bin/env python
+
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+What it costs to pull three attributes out of namedtuples, __slots__
+objects, dataclass-style objects, and plain objects. Compares the
+attrgetter which objbind sites carry against the fastest access each
+type allows (an index-based itemgetter for namedtuples, a lookup in
+the instance dict for plain objects), both on its own and behind the
+check that a type-specialized plan would need: that the source is
+exactly the planned type, and that each name still has the same class
+attribute it had when the plan was made.
+
+The plans themselves are no faster than the attrgetter, or only a
+little for namedtuples, and the check costs far more than that. So
+objbind stays with the attrgetter for every type.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from __future__ import print_function
+
+from collections import namedtuple
+from operator import attrgetter, itemgetter
+from timeit import repeat as timeit_repeat
+
+
+NAMES = ("a", "c", "d")
+
+
+Tupled = namedtuple("Tupled", ("a", "b", "c", "d"))
+
+
+class Slotted(object):
+    __slots__ = ("a", "b", "c", "d")
+
+    def __init__(self, a, b, c, d):
+        self.a = a
+        self.b = b
+        self.c = c
+        self.d = d
+
+
+class Plain(object):
+    # dataclass instances are just like this, as far as attribute
+    # access is concerned
+    def __init__(self, a, b, c, d):
+        self.a = a
+        self.b = b
+        self.c = c
+        self.d = d
+
+
+def descriptors(cls):
+    # what a type-specialized plan would hold on to, so that it could
+    # notice the class being changed out from under it: the class
+    # attribute (if any) for each name
+    found = vars(cls)
+    return tuple(found.get(name) for name in NAMES)
+
+
+def guarded(cls, plan):
+    # plan, behind the cheapest check that it's still good for the
+    # source. The source must be exactly cls, and each name must still
+    # have the same class attribute it had when the plan was made (a
+    # descriptor, or none at all).
+    a, c, d = descriptors(cls)
+
+    def bind(source):
+        found = vars(cls)
+        if type(source) is cls and \
+           found.get("a") is a and \
+           found.get("c") is c and \
+           found.get("d") is d:
+            return plan(source)
+
+    return bind
+
+
+def unguarded(plan):
+    # plan, called the same way as guarded calls it, without the check
+    def bind(source):
+        return plan(source)
+
+    return bind
+
+
+def specialized(source):
+    # the fastest access each type allows, once the plan is known
+    # to be good
+    if isinstance(source, tuple):
+        return itemgetter(0, 2, 3)
+    elif hasattr(source, "__dict__"):
+        getitems = itemgetter(*NAMES)
+        return lambda obj: getitems(obj.__dict__)
+    else:
+        return attrgetter(*NAMES)
+
+
+def best(fun, number):
+    return min(timeit_repeat(fun, number=number, repeat=5)) / number * 1e9
+
+
+def main(number=500000):
+    getattrs = attrgetter(*NAMES)
+
+    sources = (
+        ("namedtuple", Tupled(1, 2, 3, 4)),
+        ("__slots__", Slotted(1, 2, 3, 4)),
+        ("plain", Plain(1, 2, 3, 4)),
+    )
+
+    print("%12s %12s %12s %12s" % ("", "attrgetter", "plan",
+                                   "plan + check"))
+
+    for label, source in sources:
+        # each is called from within a Python function, as it would be
+        # from within objbind, so the differences are just what the
+        # getter and the check cost
+        plan = specialized(source)
+        by_attr = unguarded(getattrs)
+        by_plan = unguarded(plan)
+        by_check = guarded(type(source), plan)
+
+        print("%12s %12.1f %12.1f %12.1f" %
+              (label,
+               best(lambda: by_attr(source), number),
+               best(lambda: by_plan(source), number),
+               best(lambda: by_check(source), number)))
+
+
+if __name__ == "__main__":
+    main()
+
+
+# The end.
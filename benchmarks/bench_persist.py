@@ -0,0 +1,118 @@
+#! /usr/bin/env python
+
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+Cold-start cost of a fresh interpreter reaching each of its binding
+sites for the first time, with and without the persistent store
+enabled by MAPBIND_PERSIST. Every run is a new process, and only the
+time spent on the first calls is counted.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from __future__ import print_function
+
+import os
+import sys
+
+from os.path import dirname, join
+from shutil import rmtree
+from subprocess import check_output
+from tempfile import mkdtemp
+
+
+RUNS = 7
+
+SITE = """
+def site%(i)i(data):
+    x = data["a"] + %(i)i
+    %(pad)s
+    a, b, c, d = mapbind(data)
+    return x + a + b + c + d
+"""
+
+MEASURE = """
+import sys
+from time import time
+import generated
+
+sites = [getattr(generated, "site%i" % i) for i in range(generated.SITES)]
+data = {"a": 1, "b": 2, "c": 3, "d": 4}
+
+start = time()
+for site in sites:
+    site(data)
+sys.stdout.write("%r" % (time() - start))
+"""
+
+
+def generate(where, sites, statements):
+    # a module of functions each with a single binding site, after
+    # a run of other statements for the decoder to step over
+    pad = "\n    ".join("x += data['b'] * %i" % i
+                        for i in range(statements))
+
+    with open(join(where, "generated.py"), "w") as out:
+        out.write("from mapbind import mapbind\n")
+        out.write("SITES = %i\n" % sites)
+        for i in range(sites):
+            out.write(SITE % {"i": i, "pad": pad})
+
+
+def run(where, persist=None):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join((where, dirname(dirname(
+        os.path.abspath(__file__)))))
+    env.pop("MAPBIND_PERSIST", None)
+    if persist:
+        env["MAPBIND_PERSIST"] = persist
+
+    found = check_output((sys.executable, "-c", MEASURE), env=env)
+    return float(found)
+
+
+def main():
+    print("%6s %10s %14s %14s %8s" %
+          ("sites", "statements", "cold usec", "persist usec", "speedup"))
+
+    for sites, statements in ((100, 0), (100, 50), (1000, 0), (1000, 50)):
+        where = mkdtemp()
+        try:
+            generate(where, sites, statements)
+            store = join(where, "sites.marshal")
+
+            # once to get the .pyc written, and once to fill the store
+            run(where)
+            run(where, store)
+
+            cold = min(run(where) for _ in range(RUNS))
+            warm = min(run(where, store) for _ in range(RUNS))
+
+        finally:
+            rmtree(where)
+
+        print("%6i %10i %14.1f %14.1f %7.2fx" %
+              (sites, statements, cold * 1e6, warm * 1e6, cold / warm))
+
+
+if __name__ == "__main__":
+    main()
+
+
+# The end.
@@ -0,0 +1,160 @@
+#! /usr/bin/env python
+
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+Hot loops which bind on every iteration, as a JIT would see them.
+Meant for PyPy, where the plain binders have to materialize the
+calling frame on every call, which spoils the trace for the whole
+loop, while fastbind'd copies are recompiled from source to be plain
+lookups. Runs anywhere, for comparison.
+
+  pypy3 benchmarks/bench_pypy.py
+
+Prints the cost per iteration and the factor against the
+hand-written loop. Give --check to exit non-zero if a fastbind loop
+is more than FACTOR times the hand-written one. That only applies on
+PyPy, since on CPython fastbind'd sites still make a call per binding.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from __future__ import print_function
+
+import platform
+import sys
+
+from timeit import default_timer
+
+from mapbind import fastbind, mapbind, objbind
+
+
+PYPY = platform.python_implementation() == "PyPy"
+
+# how much slower than by hand a fastbind loop may be with --check
+FACTOR = 2.0
+
+
+class Data(object):
+    def __init__(self, i):
+        self.a = i
+        self.b = i + 1
+        self.c = i + 2
+
+
+def by_hand(records):
+    total = 0
+    for d in records:
+        a, b, c = d["a"], d["b"], d["c"]
+        total += a + b + c
+    return total
+
+
+def with_mapbind(records):
+    total = 0
+    for d in records:
+        a, b, c = mapbind(d)
+        total += a + b + c
+    return total
+
+
+def attrs_by_hand(records):
+    total = 0
+    for o in records:
+        a, b, c = o.a, o.b, o.c
+        total += a + b + c
+    return total
+
+
+def with_objbind(records):
+    total = 0
+    for o in records:
+        a, b, c = objbind(o)
+        total += a + b + c
+    return total
+
+
+MAPS = [{"a": i, "b": i + 1, "c": i + 2} for i in range(1000)]
+OBJS = [Data(i) for i in range(1000)]
+
+
+# label, loop, records, and the label of the hand-written loop to
+# compare against
+BENCHES = (
+    ("by hand", by_hand, MAPS, None),
+    ("mapbind", with_mapbind, MAPS, "by hand"),
+    ("fastbind mapbind", fastbind(with_mapbind), MAPS, "by hand"),
+    ("attrs by hand", attrs_by_hand, OBJS, None),
+    ("objbind", with_objbind, OBJS, "attrs by hand"),
+    ("fastbind objbind", fastbind(with_objbind), OBJS, "attrs by hand"),
+)
+
+
+def measure(loop, records, rounds, warmup):
+    # give the JIT its chance to compile the loop before timing it,
+    # then keep the best of the rounds
+
+    for _ in range(warmup):
+        loop(records)
+
+    best = None
+    for _ in range(rounds):
+        start = default_timer()
+        loop(records)
+        elapsed = default_timer() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best / len(records)
+
+
+def main(args=None):
+    args = sys.argv[1:] if args is None else args
+    check = "--check" in args
+
+    print("%s %s" % (platform.python_implementation(),
+                     platform.python_version()))
+    print("%18s %10s %8s" % ("", "nsec/iter", "factor"))
+
+    results = {}
+    failed = False
+
+    for label, loop, records, versus in BENCHES:
+        results[label] = measure(loop, records, 200, 2000)
+
+        factor = ""
+        if versus is not None:
+            ratio = results[label] / results[versus]
+            factor = "%7.2fx" % ratio
+            if label.startswith("fastbind") and ratio > FACTOR:
+                failed = True
+
+        print("%18s %10.1f %8s" % (label, results[label] * 1e9, factor))
+
+    if check and failed and PYPY:
+        print("fastbind loops are over %.1fx by hand" % FACTOR)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+
+# The end.
@@ -0,0 +1,114 @@
+#! /usr/bin/env python
+
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+Throughput of loop-level row binding with rowsbind and objrowsbind,
+against a mapbind per row, a hand-written loop, and a bare map of an
+itemgetter or attrgetter.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from __future__ import print_function
+
+from operator import attrgetter, itemgetter
+from timeit import repeat
+
+from mapbind import mapbind, objbind, objrowsbind, rowsbind
+
+
+class Row(object):
+    def __init__(self, n):
+        self.a = n
+        self.b = n + 1
+        self.c = n + 2
+
+
+def by_hand(rows):
+    for row in rows:
+        a, b, c = row["a"], row["b"], row["c"]
+
+
+def bare_map(rows):
+    for a, b, c in map(itemgetter("a", "b", "c"), rows):
+        pass
+
+
+def per_row(rows):
+    for row in rows:
+        a, b, c = mapbind(row)
+
+
+def with_rowsbind(rows):
+    for a, b, c in rowsbind(rows):
+        pass
+
+
+def attrs_by_hand(rows):
+    for row in rows:
+        a, b, c = row.a, row.b, row.c
+
+
+def attrs_bare_map(rows):
+    for a, b, c in map(attrgetter("a", "b", "c"), rows):
+        pass
+
+
+def attrs_per_row(rows):
+    for row in rows:
+        a, b, c = objbind(row)
+
+
+def with_objrowsbind(rows):
+    for a, b, c in objrowsbind(rows):
+        pass
+
+
+BENCHES = (
+    ("by hand", by_hand, "dicts"),
+    ("bare map", bare_map, "dicts"),
+    ("mapbind per row", per_row, "dicts"),
+    ("rowsbind", with_rowsbind, "dicts"),
+    ("attrs by hand", attrs_by_hand, "objs"),
+    ("attrs bare map", attrs_bare_map, "objs"),
+    ("objbind per row", attrs_per_row, "objs"),
+    ("objrowsbind", with_objrowsbind, "objs"),
+)
+
+
+def main(count=1000000):
+    data = {
+        "dicts": [{"a": n, "b": n + 1, "c": n + 2} for n in range(count)],
+        "objs": [Row(n) for n in range(count)],
+    }
+
+    print("%16s %10s %10s" % ("", "rows/sec", "nsec/row"))
+
+    for label, fun, kind in BENCHES:
+        rows = data[kind]
+        best = min(repeat(lambda: fun(rows), number=1, repeat=3))
+        print("%16s %10.0f %10.1f" % (label, count / best,
+                                      best / count * 1e9))
+
+
+if __name__ == "__main__":
+    main()
+
+
+# The end.
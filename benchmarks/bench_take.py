@@ -0,0 +1,142 @@
+#! /usr/bin/env python
+
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+Cost of takebind's fast paths: slicing sequences, splitting fields
+out of a buffer as memoryviews, and taking lines from a file, each
+against the iterator layers that takebind used for everything before.
+Both are given the count, so that the cost of finding the binding
+site (the same either way) is left out.
+
+Splitting out memoryviews only beats copying once the fields are
+large. For a few small fields, slicing out copies is cheaper than
+creating the views.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from __future__ import print_function
+
+from functools import partial
+from io import BytesIO
+from itertools import islice
+from timeit import repeat
+
+from mapbind import raise_error, _take
+
+
+def old_take(sequence, count, default=raise_error):
+    # how takebind worked before it learned about types
+    iterator = iter(sequence)
+    if default is not raise_error:
+        iterator = iter(partial(next, iterator, default), raise_error)
+    return islice(iterator, 0, count)
+
+
+LIST = list(range(10))
+SHORT = [1]
+TUPLE = (1, 2, 3)
+BUFFER = bytes(bytearray(range(256))) * 16
+PAGES = BUFFER * 64
+LINES = b"header\nversion\n" + b"body\n" * 1000
+
+
+def old_list(seq):
+    a, b, c = old_take(seq, 3)
+    return a
+
+
+def new_list(seq):
+    a, b, c = _take(seq, 3)
+    return a
+
+
+def old_short(seq):
+    a, b, c = old_take(seq, 3, None)
+    return a
+
+
+def new_short(seq):
+    a, b, c = _take(seq, 3, None)
+    return a
+
+
+def copied_fields(buf):
+    # what you'd write without takebind, copying each field out
+    a, b, c = buf[0:16], buf[16:32], buf[32:48]
+    return a
+
+
+def view_fields(buf):
+    a, b, c = _take(buf, 3, width=16)
+    return a
+
+
+def copied_pages(buf):
+    a, b, c = buf[0:65536], buf[65536:131072], buf[131072:196608]
+    return a
+
+
+def view_pages(buf):
+    a, b, c = _take(buf, 3, width=65536)
+    return a
+
+
+def old_lines(fh):
+    fh.seek(0)
+    header, version, body = old_take(fh, 3, b"")
+    return header
+
+
+def new_lines(fh):
+    fh.seek(0)
+    header, version, body = _take(fh, 3, b"")
+    return header
+
+
+BENCHES = (
+    ("old list", old_list, LIST),
+    ("new list", new_list, LIST),
+    ("old tuple", old_list, TUPLE),
+    ("new tuple", new_list, TUPLE),
+    ("old padded", old_short, SHORT),
+    ("new padded", new_short, SHORT),
+    ("copied fields", copied_fields, BUFFER),
+    ("view fields", view_fields, BUFFER),
+    ("copied pages", copied_pages, PAGES),
+    ("view pages", view_pages, PAGES),
+    ("old lines", old_lines, BytesIO(LINES)),
+    ("new lines", new_lines, BytesIO(LINES)),
+)
+
+
+def main(number=50000):
+    print("%16s %10s" % ("", "nsec/call"))
+
+    for label, fun, arg in BENCHES:
+        fun(arg)
+        best = min(repeat(lambda: fun(arg), number=number, repeat=5))
+        print("%16s %10.1f" % (label, best / number * 1e9))
+
+
+if __name__ == "__main__":
+    main()
+
+
+# The end.
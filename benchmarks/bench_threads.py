@@ -0,0 +1,104 @@
+#! /usr/bin/env python
+
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+Binding throughput with increasing numbers of threads, over many
+binding sites, both warm and with every site freshly compiled so that
+all the threads are missing on the same sites at once.
+
+On a build with the GIL, expect the totals to stay flat however many
+threads there are. On a free-threaded build (3.13t and later) they
+ought to grow with the threads, up to the number of cores, though
+this has yet to be run on one.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from __future__ import print_function
+
+import sys
+
+from threading import Event, Thread
+from timeit import default_timer
+
+from mapbind import cache_clear, mapbind
+
+
+SITES = 500
+ROUNDS = 40
+
+
+def make_binders(count):
+    binders = []
+    for index in range(count):
+        glbls = {"mapbind": mapbind}
+        src = ("def binder(d):\n"
+               "    a, b, c = mapbind(d)\n"
+               "    return a + b + c + %i\n" % index)
+        exec(compile(src, "<binder %i>" % index, "exec"), glbls)
+        binders.append(glbls["binder"])
+    return binders
+
+
+def throughput(threads, binders, rounds):
+    # bindings per second across all the threads
+
+    data = {"a": 1, "b": 2, "c": 3}
+    start = Event()
+
+    def work():
+        start.wait()
+        for _ in range(rounds):
+            for binder in binders:
+                binder(data)
+
+    workers = [Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+
+    began = default_timer()
+    start.set()
+    for worker in workers:
+        worker.join()
+    elapsed = default_timer() - began
+
+    return threads * rounds * len(binders) / elapsed
+
+
+def main():
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)
+    print("GIL enabled:", is_gil_enabled())
+    print("%8s %16s %16s" % ("threads", "warm binds/sec", "cold binds/sec"))
+
+    for threads in (1, 2, 4, 8):
+        binders = make_binders(SITES)
+        cache_clear()
+
+        # only the one round, so that most of it is misses
+        cold = throughput(threads, binders, 1)
+        warm = throughput(threads, binders, ROUNDS)
+
+        print("%8i %16.0f %16.0f" % (threads, warm, cold))
+
+
+if __name__ == "__main__":
+    main()
+
+
+# The end.
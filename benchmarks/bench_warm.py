@@ -0,0 +1,104 @@
+#! /usr/bin/env python
+
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+Warm-call cost of mapbind and objbind with their per-site compiled
+getters, against hand-written lookups, against the lazy iterator
+that mapbind used to return, and against fastbind specialized copies.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from __future__ import print_function
+
+from inspect import currentframe
+from timeit import repeat
+
+from mapbind import bindings, fastbind, mapbind, objbind
+
+
+class Data(object):
+    def __init__(self):
+        self.a = 1
+        self.b = 2
+        self.c = 3
+
+
+def lazy_mapbind(source_map):
+    # how mapbind worked before sites carried their own getters
+    return map(source_map.__getitem__, bindings(currentframe().f_back))
+
+
+def by_hand(d):
+    a, b, c = d["a"], d["b"], d["c"]
+    return a
+
+
+def with_lazy(d):
+    a, b, c = lazy_mapbind(d)
+    return a
+
+
+def with_mapbind(d):
+    a, b, c = mapbind(d)
+    return a
+
+
+def with_default(d):
+    a, b, c = mapbind(d, None)
+    return a
+
+
+def attrs_by_hand(o):
+    a, b, c = o.a, o.b, o.c
+    return a
+
+
+def with_objbind(o):
+    a, b, c = objbind(o)
+    return a
+
+
+BENCHES = (
+    ("by hand", by_hand, {"a": 1, "b": 2, "c": 3}),
+    ("lazy mapbind", with_lazy, {"a": 1, "b": 2, "c": 3}),
+    ("mapbind", with_mapbind, {"a": 1, "b": 2, "c": 3}),
+    ("mapbind default", with_default, {"a": 1, "b": 2, "c": 3}),
+    ("fastbind mapbind", fastbind(with_mapbind), {"a": 1, "b": 2, "c": 3}),
+    ("fastbind default", fastbind(with_default), {"a": 1, "b": 2, "c": 3}),
+    ("attrs by hand", attrs_by_hand, Data()),
+    ("objbind", with_objbind, Data()),
+    ("fastbind objbind", fastbind(with_objbind), Data()),
+)
+
+
+def main(number=200000):
+    print("%16s %10s" % ("", "nsec/call"))
+
+    for label, fun, arg in BENCHES:
+        fun(arg)
+        best = min(repeat(lambda: fun(arg), number=number, repeat=5))
+        print("%16s %10.1f" % (label, best / number * 1e9))
+
+
+if __name__ == "__main__":
+    main()
+
+
+# The end.
@@ -0,0 +1,350 @@
+#! /usr/bin/env python
+
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+The whole set of binding workloads in one run, with results written
+as JSON so that runs on different Python versions, or from different
+points in history, can be compared.
+
+  python benchmarks/suite.py -o results-3.12.json
+
+Covers mapbind, objbind, funbind, and takebind both cold (the first
+call at a site, which has to resolve the bindings) and warm, each
+against the hand-written equivalent, and mapbind and objbind again
+with a default, binding from sources that are missing some of the
+names. Then the awkward cases: a site
+at the end of a very large function, many distinct sites in turn,
+takebind running off the end of its sequence into the default,
+binding at every level of a deep recursion, and how much memory the
+binding-site cache takes for exec'd code and whether it gives that
+back.
+
+Timings use timeit, unless --pyperf is given and pyperf is
+installed, in which case pyperf runs the timings (and writes its own
+JSON, see its --output option). The memory measurements need
+tracemalloc, and are left out without it.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from __future__ import print_function
+
+import json
+import platform
+import sys
+
+from argparse import ArgumentParser
+from gc import collect
+from itertools import islice
+from timeit import default_timer
+
+from mapbind import (
+    cache_clear, cache_info, funbind, mapbind, objbind, takebind, )
+
+
+try:
+    import tracemalloc
+
+except ImportError:
+    tracemalloc = None
+
+
+class Data(object):
+    def __init__(self):
+        self.a = 1
+        self.b = 2
+        self.c = 3
+
+
+DATA = {"a": 1, "b": 2, "c": 3}
+OBJ = Data()
+SEQ = [1, 2, 3, 4, 5]
+SHORT = [1]
+
+
+class Partial(object):
+    def __init__(self):
+        self.a = 1
+
+
+PARTIAL_DATA = {"a": 1}
+PARTIAL_OBJ = Partial()
+
+
+def generate(body, name="generated", statements=0):
+    # compile a fresh function from body, after some padding
+    # statements if asked for. Every call gives a new code object, and
+    # so new binding sites.
+
+    pad = "".join("    x%i = d['a'] + %i\n" % (i, i)
+                  for i in range(statements))
+    src = "def %s(d):\n%s%s    return a\n" % (name, pad, body)
+
+    glbls = {"mapbind": mapbind, "objbind": objbind,
+             "funbind": funbind, "takebind": takebind,
+             "islice": islice}
+    exec(compile(src, "<suite %s>" % name, "exec"), glbls)
+    return glbls[name]
+
+
+# the binding statement for each kind, and the hand-written statement
+# that it stands in for, and what each is given to bind from
+KINDS = (
+    ("mapbind", "    a, b, c = mapbind(d)\n",
+     "    a, b, c = d['a'], d['b'], d['c']\n", DATA),
+    ("objbind", "    a, b, c = objbind(d)\n",
+     "    a, b, c = d.a, d.b, d.c\n", OBJ),
+    ("funbind", "    a, b, c = funbind(d)\n",
+     "    a, b, c = d('a'), d('b'), d('c')\n", str.upper),
+    ("takebind", "    a, b, c = takebind(d)\n",
+     "    a, b, c = islice(d, 3)\n", SEQ),
+)
+
+# the same for binding with a default, from sources which have only
+# the first of the names
+DEFAULTED = (
+    ("mapbind_default", "    a, b, c = mapbind(d, None)\n",
+     "    a, b, c = d.get('a'), d.get('b'), d.get('c')\n", PARTIAL_DATA),
+    ("objbind_default", "    a, b, c = objbind(d, None)\n",
+     "    a, b, c = (getattr(d, 'a', None), getattr(d, 'b', None),"
+     " getattr(d, 'c', None))\n", PARTIAL_OBJ),
+)
+
+
+def warm(fun, arg, inner=1):
+    # time loops warm calls of fun(arg)
+    def bench(loops):
+        fun(arg)
+        repeats = range(loops)
+        start = default_timer()
+        for _ in repeats:
+            fun(arg)
+        return default_timer() - start
+    return bench, inner
+
+
+def cold(fun, arg, inner=1):
+    # time loops calls of fun(arg), each with an empty cache. The
+    # clear is part of the timing, so the hand-written version clears
+    # too, to keep them comparable.
+    def bench(loops):
+        repeats = range(loops)
+        start = default_timer()
+        for _ in repeats:
+            cache_clear()
+            fun(arg)
+        return default_timer() - start
+    return bench, inner
+
+
+def many_sites(count):
+    # one call to each of count distinct binding sites, all warm
+    funs = [generate(KINDS[0][1], "site%i" % i) for i in range(count)]
+
+    def bench(loops):
+        for fun in funs:
+            fun(DATA)
+        repeats = range(loops)
+        start = default_timer()
+        for _ in repeats:
+            for fun in funs:
+                fun(DATA)
+        return default_timer() - start
+    return bench, count
+
+
+def recursion(depth):
+    # a binding at every level of a recursion depth deep
+    def descend(d, level):
+        a, b, c = mapbind(d)
+        if level:
+            descend(d, level - 1)
+        return a
+
+    def bench(loops):
+        descend(DATA, depth)
+        repeats = range(loops)
+        start = default_timer()
+        for _ in repeats:
+            descend(DATA, depth)
+        return default_timer() - start
+    return bench, depth + 1
+
+
+def benchmarks():
+    # name -> (bench(loops) giving elapsed seconds, inner calls per
+    # loop), in the order to be reported
+
+    found = []
+
+    for kind, binding, by_hand, arg in KINDS + DEFAULTED:
+        bound = generate(binding, "with_" + kind)
+        hand = generate(by_hand, "without_" + kind)
+
+        found.append(("cold/" + kind, cold(bound, arg)))
+        found.append(("cold/%s/by_hand" % kind, cold(hand, arg)))
+        found.append(("warm/" + kind, warm(bound, arg)))
+        found.append(("warm/%s/by_hand" % kind, warm(hand, arg)))
+
+    for statements in (1000, 10000):
+        big = generate(KINDS[0][1], "big", statements)
+        found.append(("cold/large_function/%i" % statements,
+                      cold(big, DATA)))
+
+    found.append(("warm/many_sites/1000", many_sites(1000)))
+
+    short = generate("    a, b, c = takebind(d, None)\n", "short")
+    found.append(("warm/takebind_default", warm(short, SHORT)))
+
+    found.append(("warm/recursion/500", recursion(500)))
+
+    return found
+
+
+def measure_memory(count=2000):
+    """
+    The growth of the binding-site cache from count exec'd functions
+    each called once, and what remains once they're collected
+    """
+
+    cache_clear()
+    collect()
+
+    tracemalloc.start()
+    try:
+        funs = [generate(KINDS[0][1], "mem%i" % i) for i in range(count)]
+        before = tracemalloc.take_snapshot()
+
+        for fun in funs:
+            fun(DATA)
+        after = tracemalloc.take_snapshot()
+
+        sites = cache_info().currsize
+        del funs
+        collect()
+        # the purge happens on the next change to the cache, so make
+        # one
+        generate(KINDS[0][1])(DATA)
+        collected = tracemalloc.take_snapshot()
+
+    finally:
+        tracemalloc.stop()
+
+    def grown(snapshot):
+        stats = snapshot.compare_to(before, "filename")
+        return sum(stat.size_diff for stat in stats
+                   if "mapbind" in stat.traceback[0].filename)
+
+    growth = grown(after)
+    return {
+        "sites": sites,
+        "bytes": growth,
+        "bytes_per_site": float(growth) / max(sites, 1),
+        "bytes_after_collect": grown(collected),
+        "sites_after_collect": cache_info().currsize,
+    }
+
+
+def run_timeit(found, repeat, target):
+    # calibrate loops so each repeat takes about target seconds, and
+    # keep the best of the repeats
+
+    results = {}
+    for name, (bench, inner) in found:
+        loops = 1
+        while bench(loops) < target / 10.0:
+            loops *= 10
+
+        best = min(bench(loops) for _ in range(repeat))
+        results[name] = {
+            "loops": loops,
+            "inner": inner,
+            "usec": best / (loops * inner) * 1e6,
+        }
+        print("%32s %10.3f usec" % (name, results[name]["usec"]),
+              file=sys.stderr)
+
+    # how each binder compares to doing it by hand
+    for name, result in results.items():
+        by_hand = results.get(name + "/by_hand")
+        if by_hand is not None:
+            result["vs_by_hand"] = result["usec"] / by_hand["usec"]
+
+    return results
+
+
+def run_pyperf(found):
+    import pyperf
+
+    runner = pyperf.Runner()
+    for name, (bench, inner) in found:
+        runner.bench_time_func(name, bench, inner_loops=inner)
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def main(args=None):
+    parser = ArgumentParser(description="mapbind benchmark suite")
+    parser.add_argument("-o", "--output", default=None,
+                        help="write JSON results here, rather than to"
+                        " standard out")
+    parser.add_argument("--quick", action="store_true",
+                        help="fewer and shorter repeats")
+    parser.add_argument("--pyperf", action="store_true",
+                        help="run the timings with pyperf. Any remaining"
+                        " arguments are for pyperf")
+
+    options, remaining = parser.parse_known_args(args)
+
+    if options.pyperf:
+        sys.argv[1:] = remaining
+        return run_pyperf(benchmarks())
+
+    if options.quick:
+        timings = run_timeit(benchmarks(), 3, 0.02)
+    else:
+        timings = run_timeit(benchmarks(), 7, 0.2)
+
+    report = {
+        "environment": environment(),
+        "benchmarks": timings,
+        "memory": measure_memory() if tracemalloc else None,
+    }
+
+    out = json.dumps(report, indent=2, sort_keys=True)
+    if options.output:
+        with open(options.output, "w") as output:
+            output.write(out)
+            output.write("\n")
+    else:
+        print(out)
+
+
+if __name__ == "__main__":
+    main()
+
+
+# The end.
@@ -25,19 +25,60 @@ license: LGPL v.3
 """
 
 
+import os
+import sys
+
 from functools import partial
-from inspect import currentframe
-from itertools import islice
+from itertools import chain, islice, repeat
+from operator import attrgetter, itemgetter, methodcaller
 
+from ._bulk import getmany_for, register_getmany
+from ._cache import BindingCache
+from ._site import binding_site, counting_site
 
-try:
-    from dis import get_instructions
 
-except ImportError:
-    # okay, we're being loaded in an older Python environment. There's
-    # no dis.get_instructions to import, so we'll have to make one
-    # from scratch, like biscuits.
-    from ._dis import get_instructions
+# the caller's frame is _getframe(1), without importing inspect (and
+# everything that it imports) just for currentframe. There's no use
+# in a fallback, since inspect.currentframe is only ever sys._getframe
+# underneath, and without frames there's nothing for us to bind by.
+from sys import _getframe
+
+
+def _deferred(module, name):
+    # stands in for name from one of our modules until the first time
+    # it's called, at which point the module is imported and the real
+    # thing replaces this in our globals. That keeps import mapbind
+    # from paying for the parts of it that a program never uses.
+
+    def load(*args, **kwds):
+        found = getattr(__import__(module, globals(), None, (name, ), 1),
+                        name)
+        globals()[name] = found
+        return found(*args, **kwds)
+
+    load.__name__ = name
+    return load
+
+
+decode_bindings = _deferred("_decode", "decode_bindings")
+
+iter_records = _deferred("_records", "iter_records")
+layout_key = _deferred("_records", "layout_key")
+record_plan = _deferred("_records", "record_plan")
+
+cursor_columns = _deferred("_rows", "cursor_columns")
+is_cursor = _deferred("_rows", "is_cursor")
+row_columns = _deferred("_rows", "row_columns")
+row_getter = _deferred("_rows", "row_getter")
+stream = _deferred("_rows", "stream")
+
+columns = _deferred("_columns", "columns")
+deep_plan = _deferred("_deep", "deep_plan")
+
+
+# the leads for decode_bindings, by their names in mapbind._decode.LEADS
+AWAIT = "await"
+FOR_LOOP = "for"
 
 
 try:
@@ -61,10 +102,29 @@ except NameError:
     xrange = range
 
 
-__all__ = ("mapbind", "objbind", "funbind", "takebind", "bindings", )
+__all__ = ("mapbind", "objbind", "funbind", "takebind", "bindings",
+           "rowsbind", "objrowsbind", "colbind", "objcolbind",
+           "register_getmany", "abind", "aobjbind", "afunbind",
+           "rowbind", "structbind", "structbind_iter", "multibind",
+           "deepbind", "objdeepbind", "lazybind", "lazymapbind",
+           "lazyobjbind", "force", "cache_info", "cache_clear",
+           "cache_resize", "cache_persist", "load_manifest", "stats",
+           "stats_enable", "stats_disable", "stats_clear", "collecting",
+           "precompile", "install_rewriter", "uninstall_rewriter",
+           "fastbind", )
+
+
+# the binding-site cache used by bindings. Unbounded by default, but
+# it only holds weak references to code objects, so entries go away
+# along with the code that they describe.
+_cache = BindingCache()
 
+# the PersistentStore behind the cache, if cache_persist has enabled
+# one. Only consulted when a binding site needs decoding.
+_store = None
 
-def bindings(caller, noname=False, _cache={}):
+
+def bindings(caller, noname=False):
     """
     Find the names for the bindings that would be consumed by the
     caller frame.
@@ -87,7 +147,7 @@ def bindings(caller, noname=False, _cache={}):
     STORE_FAST, STORE_GLOBAL, STORE_DEREF, or STORE_NAME operations
     will follow. Each of those has an argument that lets us figure out
     the name of that binding.  Those names, in the order they appear,
-    are our result.
+    are our result, as a tuple.
 
     If the optional noname parameter is True, then the heuristic stops
     after reading the count of bindings from an UNPACK_SEQUENCE op,
@@ -95,58 +155,386 @@ def bindings(caller, noname=False, _cache={}):
     length but with useless items (no names).
     """
 
+    site = _binding_site(caller, noname)
+
+    if noname:
+        # the noname case is when we're being called via takebind,
+        # which doesn't attempt to actually use the binding names.
+        # we'll simply return an xrange of the appropriate length.
+        return xrange(0, site.count)
+    else:
+        return site.names
+
+
+def _binding_site(caller, noname=False, lead=()):
+    # the cached Site for the binding the caller frame is about to
+    # perform, resolving it first if need be
+
     # find our calling frame, and the index of the op that called us
     code = caller.f_code
     index = caller.f_lasti
 
-    cache_key = (code, index)
-    if cache_key in _cache:
-        return _cache[cache_key]
-
-    # disassemble the instructions for the calling frame, and advance
-    # past our calling op's index
-    iterins = get_instructions(code)
-    for instr in iterins:
-        if instr.offset > index:
-            break
+    site = _cache.get(code, index)
+    if site is not None and (noname or site.names is not None):
+        return site
     else:
-        assert False, "f_lasti isn't in f_code"
+        return _resolve_site(code, index, noname, lead)
 
-    if instr.opname != "UNPACK_SEQUENCE":
-        # someone invoked us without being the right-hand side of
-        # an unpack assignment. WRONG.
-        msg = "invoked without an unpack binding, %r" % instr.opname
-        raise ValueError(msg)
 
-    # this is the number of assignments being unpacked, we'll get that
-    # many STORE_ ops from the bytecode
-    count = instr.argval
+# so that it can be put back after stats are done swapping it out
+_plain_binding_site = _binding_site
 
-    if noname:
-        # the noname case is when we're being called via takebind,
-        # which doesn't attempt to actually use the binding names.
-        # we'll simply return an xrange of the appropriate length.
-        result = xrange(0, count)
-        _cache[cache_key] = result
-        return result
 
-    found = []
+def _resolve_site(code, index, noname, lead=()):
+    # decode just the instructions following the calling op at index,
+    # and cache a Site for them. Any other threads resolving the same
+    # site wait for us and then use ours.
 
-    for _ in xrange(0, count):
-        instr = next(iterins)
-        name = instr.opname
+    with _cache.resolving(code, index):
+        site = _cache.peek(code, index)
+        if site is not None and (noname or site.names is not None):
+            return site
 
-        if name in ("STORE_FAST", "STORE_DEREF",
-                    "STORE_GLOBAL", "STORE_NAME"):
-            found.append(instr.argval)
+        found = _decode_site(code, index, noname, lead)
+
+        if noname:
+            site = counting_site(found)
         else:
-            # nested unpack maybe? or a star function call? I say
-            # unto thee nay. NAY!
-            msg = "unsupported non-binding operation, %r" % name
-            raise ValueError(msg)
+            site = binding_site(found)
 
-    _cache[cache_key] = found
-    return found
+        _cache.set(code, index, site)
+        return site
+
+
+def _decode_site(code, index, noname, lead):
+    if _store is None:
+        return decode_bindings(code, index, noname, lead)
+    else:
+        return _store.resolve(code, index, noname, lead)
+
+
+def cache_info():
+    """
+    Statistics for the binding-site cache used by bindings, in the
+    style of functools.lru_cache. Returns a named tuple of
+    (hits, misses, maxsize, currsize)
+    """
+
+    return _cache.info()
+
+
+def cache_clear():
+    """
+    Empties the binding-site cache and resets its statistics
+    """
+
+    _cache.clear()
+
+
+def cache_resize(maxsize=None):
+    """
+    Bounds the binding-site cache to at most maxsize entries,
+    evicting the least recently used binding sites beyond that. A
+    maxsize of None (the default) leaves the cache unbounded.
+
+    Regardless of the bound, entries are dropped when the code object
+    they were resolved from is collected.
+    """
+
+    _cache.resize(maxsize)
+
+
+def cache_persist(path):
+    """
+    Keeps the decoded bindings of binding sites in the file at path,
+    across runs of the interpreter. The file is read the first time a
+    binding site needs decoding, and is written when the interpreter
+    exits, or when persistence is turned off again by passing a path
+    of None.
+
+    This is for programs that are started often and don't live long,
+    and so would otherwise decode their binding sites from scratch on
+    every run. Setting the MAPBIND_PERSIST environment variable to a
+    path does the same as calling this at import.
+    """
+
+    global _store
+
+    old = _store
+    _store = None
+    if old is not None:
+        old.save()
+
+    if path is not None:
+        from ._persist import PersistentStore
+        _store = PersistentStore(path)
+
+        if not _save_store.registered:
+            from atexit import register
+            register(_save_store)
+            _save_store.registered = True
+
+
+def _save_store():
+    if _store is not None:
+        _store.save()
+
+
+_save_store.registered = False
+
+
+def load_manifest(path):
+    """
+    Seeds the binding sites from a manifest written by
+
+      python -m mapbind scan -o MANIFEST PATH [PATH ...]
+
+    so that none of the sites it covers need decoding when they're
+    first reached. Returns the count of entries in the manifest.
+
+    Sites are matched on the identity of their code, as with
+    cache_persist, so the manifest needs to have been built from the
+    same source files at the same paths, by the same version of
+    Python. Anything it doesn't cover is decoded as usual. If using
+    cache_persist as well, call this after it, as cache_persist
+    starts a fresh store.
+    """
+
+    global _store
+
+    if _store is None:
+        from ._persist import PersistentStore
+        _store = PersistentStore(None)
+
+    return _store.extend(path)
+
+
+def stats():
+    """
+    Statistics for each binding site reached since stats_enable was
+    called, as a dict mapping "filename:line" to a named tuple of
+    (kind, calls, hits, misses, seconds). kind is the binder used at
+    the site, hits and misses are against the binding-site cache, and
+    seconds is the total time spent finding (and, on a miss,
+    resolving) the site's bindings.
+
+    Returns an empty dict if stats haven't been enabled.
+    """
+
+    if _recorder is None:
+        return {}
+    return _recorder.stats()
+
+
+def stats_enable():
+    """
+    Start recording statistics for every binding site, to be returned
+    by stats. While nothing is recording there's no cost to the
+    binders, but while recording each binding has some timing and
+    bookkeeping added to it.
+
+    Sites in functions specialized by fastbind don't look up their
+    bindings at all, and so don't appear.
+    """
+
+    global _recorder
+
+    if _recorder is None:
+        _recorder = collecting()
+    _start_recording(_recorder)
+
+
+def stats_disable():
+    """
+    Stop recording statistics for stats. What was recorded so far is
+    kept until stats_clear is called.
+    """
+
+    if _recorder is not None:
+        _stop_recording(_recorder)
+
+
+def stats_clear():
+    """
+    Forget the statistics recorded for stats so far
+    """
+
+    if _recorder is not None:
+        _recorder.clear()
+
+
+def collecting():
+    """
+    A context manager which records statistics for the binding sites
+    reached within its block, independently of stats_enable and of
+    any other collecting blocks.
+
+    eg.
+    with collecting() as recorded:
+        handle(request)
+    print(recorded.stats())
+
+    The stats method of the recorder returns the same sort of dict as
+    stats does.
+    """
+
+    from ._stats import Recorder
+    return Recorder(_start_recording, _stop_recording)
+
+
+# the Recorder for stats_enable, and every Recorder currently active
+_recorder = None
+_recorders = []
+
+
+def _start_recording(recorder):
+    if recorder not in _recorders:
+        _recorders.append(recorder)
+        _swap_site_finders()
+
+
+def _stop_recording(recorder):
+    if recorder in _recorders:
+        _recorders.remove(recorder)
+        _swap_site_finders()
+
+
+def _swap_site_finders():
+    # the binders look these up as module globals on every call, so
+    # replacing them is all it takes to instrument every binder
+
+    global _binding_site, _row_site
+
+    if _recorders:
+        from ._stats import instrument
+        _binding_site = instrument(_plain_binding_site, _recorders, _cache)
+        _row_site = instrument(_plain_row_site, _recorders, _cache)
+    else:
+        _binding_site = _plain_binding_site
+        _row_site = _plain_row_site
+
+
+def precompile(target, recursive=True):
+    """
+    Warms up the binding-site cache ahead of time, for every call to
+    one of the binding functions found in target. Target may
+    be a module, class, function, method, or code object. Returns the
+    count of binding sites that were added to the cache.
+
+    If recursive is True, nested functions, lambdas, and
+    comprehensions are included, and if target is a package then all
+    of its submodules will be imported and included too.
+
+    Calls whose result isn't used in a simple unpack assignment (or
+    for rowsbind and objrowsbind, a simple unpacking loop) are left
+    alone, to raise the usual ValueError on their first actual
+    invocation.
+
+    Calling this in the master process of a pre-forking server means
+    each child starts out with a warm cache. Following it with
+    gc.freeze() keeps the cache entries from being written to by the
+    collector, so their pages can stay shared.
+    """
+
+    from ._scan import BINDERS, find_sites, iter_codes
+
+    count = 0
+
+    for code in iter_codes(target, recursive):
+        for offset, binder in find_sites(code):
+            if _cache.peek(code, offset) is not None:
+                continue
+
+            try:
+                if binder == "rowbind":
+                    _resolve_row_site(code, offset)
+                else:
+                    _resolve_site(code, offset, *BINDERS[binder])
+            except ValueError:
+                continue
+            else:
+                count += 1
+
+    return count
+
+
+def install_rewriter(packages):
+    """
+    Installs an import hook which rewrites the binding sites in the
+    named packages (and their submodules) as they are imported, so
+    that
+
+      a, b, c = mapbind(data)
+
+    is compiled as though it had been written
+
+      a, b, c = data["a"], data["b"], data["c"]
+
+    and similarly for objbind and funbind. This removes the frame
+    inspection entirely for those sites, while keeping the same
+    default and exception behavior.
+
+    Only sites where the binding function was imported from mapbind
+    at the top of the module, all the targets are simple names, and
+    the arguments are simple names or constants can be rewritten.
+    Anything else is left alone, and will bind at runtime as usual.
+    Rewritten modules are cached in their own .pyc files.
+
+    Modules which have already been imported are not affected.
+    Returns the finder which was added to sys.meta_path, which may be
+    passed to uninstall_rewriter.
+
+    Requires Python 3.7 or later.
+    """
+
+    from ._rewrite import RewritingFinder
+
+    finder = RewritingFinder(packages)
+    sys.meta_path.insert(0, finder)
+    return finder
+
+
+def uninstall_rewriter(finder):
+    """
+    Removes an import hook previously added via install_rewriter.
+    Modules which it has already rewritten remain so.
+    """
+
+    sys.meta_path.remove(finder)
+
+
+def fastbind(func):
+    """
+    Decorator which specializes the binding sites within a single
+    function. Each call to mapbind, objbind, funbind, or takebind
+    which feeds an unpack assignment has the load of the binding
+    function replaced in the bytecode by a load of an accessor
+    compiled for that site's names. The specialized function never
+    inspects its frame or consults the binding-site cache.
+
+    eg.
+    @fastbind
+    def handler(request):
+        user, action = mapbind(request.params)
+
+    The binding functions must be globals (or closed over) at the
+    time the decorator is applied, and rebinding them afterwards will
+    not be noticed by the specialized function. Sites which don't
+    meet that, or which don't feed a simple unpack assignment, are
+    left to work as usual.
+
+    Requires Python 3.8 through 3.13, whose bytecode it knows how to
+    patch. On any other version the function is returned unchanged.
+
+    On PyPy the function is instead recompiled from its source, with
+    its mapbind, objbind, and funbind sites rewritten as plain lookups
+    just as install_rewriter would (see mapbind._rewrite). That keeps
+    the binding out of the JIT's way entirely. Other sites, and
+    functions whose source can't be found, are left as they are.
+    """
+
+    from ._specialize import specialize
+    return specialize(func)
 
 
 class RaiseError(object):
@@ -177,19 +565,37 @@ def mapbind(source_map, default=raise_error):
     a, b, c = mapbind(data)
 
     Will bind as data["a"], data["b"], data["c"]
+
+    If source_map has a __getmany__(keys) method, or a bulk fetch has
+    been registered for its type with register_getmany, then all of
+    the binding names are fetched in a single call instead.
     """
 
-    caller = currentframe().f_back
-    dest_names = bindings(caller)
+    site = _binding_site(_getframe(1))
+
+    if type(source_map) is not dict:
+        getmany = getmany_for(type(source_map))
+        if getmany is not None:
+            return _bind_many(getmany, source_map, site.names, default)
 
     if default is raise_error:
-        # why are we using imap instead of a generator? Because with
-        # this, any exceptions raised will not show as having come
-        # from inside the mapbind function.
-        return imap(source_map.__getitem__, dest_names)
+        # the site has an itemgetter compiled for its names, so this
+        # is a single call that hands back a ready tuple
+        return site.getitems(source_map)
     else:
-        return (source_map.get(binding, default)
-                for binding in dest_names)
+        return tuple(imap(source_map.get, site.names, repeat(default)))
+
+
+def _bind_many(getmany, source_map, names, default=raise_error):
+    # one round trip for all of the names, and then we bind from
+    # whatever came back
+
+    found = getmany(source_map, names)
+
+    if default is raise_error:
+        return tuple(imap(found.__getitem__, names))
+    else:
+        return tuple(imap(found.get, names, repeat(default)))
 
 
 def objbind(source_obj, default=raise_error):
@@ -205,20 +611,18 @@ def objbind(source_obj, default=raise_error):
     Will bind as data.a, data.b, data.c
     """
 
-    caller = currentframe().f_back
-    dest_names = bindings(caller)
+    site = _binding_site(_getframe(1))
 
     if default is raise_error:
-        # similarly to the mapbind case, using an imap and a partial
-        # prevents any backtrace from peering into the objbind
-        # function.
-        return imap(partial(getattr, source_obj), dest_names)
+        # similarly to the mapbind case, the site has an attrgetter
+        # all ready for us
+        return site.getattrs(source_obj)
     else:
-        return (getattr(source_obj, binding, default)
-                for binding in dest_names)
+        return tuple(imap(getattr, repeat(source_obj), site.names,
+                          repeat(default)))
 
 
-def funbind(fun):
+def funbind(fun, executor=None):
     """
     Calls fun(NAME) to obtain the value for each binding, where NAME
     will be the binding variable name. Will be called from left to
@@ -228,17 +632,34 @@ def funbind(fun):
     a, b, c = funbind(my_function)
 
     Will bind as my_function("a"), my_function("b"), my_function("c")
+
+    If executor is given, all of the calls are submitted to it at
+    once rather than made one after another. It may be any
+    concurrent.futures executor, or "threads" or "processes" for a
+    shared pool of that kind. The results still bind in order, and
+    if any calls fail then the first of those failures is raised.
+
+    Since lambdas and closures can't be sent to a process pool, fun
+    may also be given as a "package.module:function" string. The
+    function is then imported by name in the worker process.
     """
 
-    caller = currentframe().f_back
-    dest_names = bindings(caller)
+    dest_names = _binding_site(_getframe(1)).names
+
+    if executor is not None:
+        from ._parallel import parallel_calls
+        return parallel_calls(fun, dest_names, executor)
+
+    if isinstance(fun, str):
+        from ._parallel import resolve
+        fun = resolve(fun)
 
     # the use of imap means funbind won't be part of backtraces if fun
     # raises an exception.
     return imap(fun, dest_names)
 
 
-def takebind(sequence, default=raise_error):
+def takebind(sequence, default=raise_error, width=None):
     """
     Iterates over sequence to obtain the value for each binding
 
@@ -253,34 +674,672 @@ def takebind(sequence, default=raise_error):
     in this case nested unpacking is allowed provided the iterable
     results individually support further unpacking.
 
+    Lists, tuples, strings, bytes, bytearrays, memoryviews and ranges
+    are sliced rather than iterated over, and files take exactly as
+    many lines as there are bindings, leaving the rest to be read.
+
+    If width is given, then sequence must support the buffer
+    protocol, and each binding is a memoryview of the next width
+    bytes of it, without copying. This needs Python 2.7 or later,
+    and on Python 2 a buffer whose items are single bytes.
+
+    eg.
+    magic, version, flags = takebind(header, width=4)
+
     If takebind runs out of items in the sequence and default is not
     specified, a ValueError will result as insufficient results will
     be returned. If default is specified, then it will be used to pad
     out the needed bindings.
     """
 
-    caller = currentframe().f_back
-    dest_names = bindings(caller, noname=True)
+    count = _binding_site(_getframe(1), True).count
+    return _take(sequence, count, default, width)
+
+
+def multibind(*sources, **kwds):
+    """
+    Obtains the value for each binding from the first of sources
+    which has a matching key, much like mapbind on a ChainMap of
+    sources, but without the ChainMap.
+
+    eg.
+    user, page, limit = multibind(args, form, defaults)
+
+    Will bind user as args["user"] if there is one, or otherwise as
+    form["user"] if there's one of those, and so on.
+
+    An optional default keyword is used for any binding that isn't in
+    any of the sources. If default is not provided, will raise
+    KeyError in that case.
+    """
+
+    names = _binding_site(_getframe(1)).names
+    return _multi(names, sources, _multi_default(kwds))
 
-    # important to note that this is a noop if sequence is already a
-    # an iterator
+
+def _multi_default(kwds):
+    # the default keyword for multibind, with no others allowed.
+    # Python 2 doesn't do keyword-only arguments, so we do it
+    # ourselves.
+
+    default = kwds.pop("default", raise_error)
+    if kwds:
+        msg = "multibind() got an unexpected keyword argument %r" % \
+              next(iter(kwds))
+        raise TypeError(msg)
+    return default
+
+
+_JUST_DICT = frozenset((dict, ))
+
+
+def _multi(names, sources, default=raise_error):
+    # the guts of multibind. Checking each source in turn for each
+    # name comes out ahead of merging the sources into a new dict
+    # (and well ahead of a ChainMap) for the handful of names that a
+    # binding has.
+
+    found = []
+    append = found.append
+
+    if set(imap(type, sources)) <= _JUST_DICT:
+        # exact dicts can't have a __missing__, so membership is as
+        # good as a lookup
+        for name in names:
+            for source in sources:
+                if name in source:
+                    append(source[name])
+                    break
+            else:
+                if default is raise_error:
+                    raise KeyError(name)
+                append(default)
+
+    else:
+        # just like ChainMap, a source's __missing__ counts as having
+        # the key
+        for name in names:
+            for source in sources:
+                try:
+                    append(source[name])
+                    break
+                except KeyError:
+                    pass
+            else:
+                if default is raise_error:
+                    raise KeyError(name)
+                append(default)
+
+    return tuple(found)
+
+
+def rowsbind(rows, default=raise_error):
+    """
+    Iterates over rows, which should be mappings, binding from each
+    of them in turn as mapbind would for the target of a for loop.
+
+    eg.
+    for a, b, c in rowsbind(records):
+        ...
+
+    Will bind as row["a"], row["b"], row["c"] for each row. The names
+    are resolved just the once, rather than once per row, and each
+    row is then bound by a single precompiled itemgetter.
+
+    Only works as the iterable of a for loop whose target is a simple
+    unpacking. Comprehensions aren't supported, for the moment.
+    """
+
+    site = _binding_site(_getframe(1), False, FOR_LOOP)
+
+    if default is raise_error:
+        return imap(site.getitems, rows)
+    else:
+        return imap(partial(_get_defaulted, site.names, default), rows)
+
+
+def objrowsbind(rows, default=raise_error):
+    """
+    Iterates over rows, binding from the attributes of each in turn
+    as objbind would for the target of a for loop.
+
+    eg.
+    for a, b, c in objrowsbind(records):
+        ...
+
+    Will bind as row.a, row.b, row.c for each row. Like rowsbind, this
+    only works as the iterable of a for loop whose target is a simple
+    unpacking.
+    """
+
+    site = _binding_site(_getframe(1), False, FOR_LOOP)
+
+    if default is raise_error:
+        return imap(site.getattrs, rows)
+    else:
+        return imap(partial(_getattr_defaulted, site.names, default), rows)
+
+
+def _get_defaulted(names, default, source_map):
+    return tuple(imap(source_map.get, names, repeat(default)))
+
+
+def _getattr_defaulted(names, default, source_obj):
+    return tuple(imap(getattr, repeat(source_obj), names, repeat(default)))
+
+
+def colbind(records, default=raise_error, typecodes=None, numpy=False):
+    """
+    Transposes records, which should be mappings, into a column for
+    each binding. The column for a binding holds the value for the
+    item with the matching key from each of the records, in order. If
+    default is not provided, will raise KeyError if any record is
+    missing a matching key.
+
+    eg.
+    price, qty, ts = colbind(records)
+
+    Will bind price as [rec["price"] for rec in records], and so on.
+
+    Each column is filled by mapping a getter across the records, so
+    there's no per-record Python loop and no intermediate row tuples.
+    Records which aren't already a list or tuple are gathered into a
+    list first.
+
+    If typecodes is given, it's either a single array typecode for
+    every column, or a dict of binding name to typecode. Columns with
+    a typecode will be an array.array of that type rather than a
+    list. If numpy is True, every column will be a NumPy array
+    instead, with its typecode (if any) used as the dtype.
+    """
+
+    names = _binding_site(_getframe(1)).names
+    return columns(records, names, partial(_item_column, default),
+                   typecodes, numpy)
+
+
+def objcolbind(records, default=raise_error, typecodes=None, numpy=False):
+    """
+    Transposes records into a column for each binding, as colbind
+    does, but from the attributes with the matching name on each of
+    the records. If default is not provided, will raise
+    AttributeError if any record is missing a matching attribute.
+
+    eg.
+    price, qty, ts = objcolbind(records)
+
+    Will bind price as [rec.price for rec in records], and so on.
+    """
+
+    names = _binding_site(_getframe(1)).names
+    return columns(records, names, partial(_attr_column, default),
+                   typecodes, numpy)
+
+
+def _item_column(default, records, name):
+    if default is raise_error:
+        return imap(itemgetter(name), records)
+    else:
+        return imap(methodcaller("get", name, default), records)
+
+
+def _attr_column(default, records, name):
+    if default is raise_error:
+        return imap(attrgetter(name), records)
+    else:
+        return imap(getattr, records, repeat(name), repeat(default))
+
+
+def abind(source_map, default=raise_error):
+    """
+    The awaitable sibling of mapbind. Obtains the value for each
+    matching key from source_map, awaiting any which are awaitable,
+    all at the same time.
+
+    eg.
+    a, b, c = await abind(client)
+
+    Will bind as await client["a"], await client["b"], await
+    client["c"], but gathered so that they're fetched concurrently.
+    If source_map has an __agetmany__(keys) coroutine method, it's
+    used to fetch all of them at once instead.
+
+    If default is not provided, will raise KeyError if there's no
+    matching key. Must be awaited directly as the right-hand side of
+    an unpack assignment. Requires Python 3.5 or later.
+    """
+
+    site = _binding_site(_getframe(1), False, AWAIT)
+
+    from ._async import bind_items
+    return bind_items(source_map, site.names, default)
+
+
+def aobjbind(source_obj, default=raise_error):
+    """
+    The awaitable sibling of objbind. Obtains the attribute with the
+    matching name from source_obj for each binding, awaiting any
+    which are awaitable, all at the same time.
+
+    eg.
+    a, b, c = await aobjbind(remote)
+
+    If default is not provided, will raise AttributeError if there's
+    no matching attribute. Requires Python 3.5 or later.
+    """
+
+    site = _binding_site(_getframe(1), False, AWAIT)
+
+    from ._async import bind_attrs
+    return bind_attrs(source_obj, site.names, default)
+
+
+def afunbind(fun):
+    """
+    The awaitable sibling of funbind. Calls fun(NAME) for each
+    binding, and awaits all of the results at the same time.
+
+    eg.
+    a, b, c = await afunbind(fetch_setting)
+
+    Requires Python 3.5 or later.
+    """
+
+    site = _binding_site(_getframe(1), False, AWAIT)
+
+    from ._async import bind_calls
+    return bind_calls(fun, site.names)
+
+
+def rowbind(cursor_or_row, size=None):
+    """
+    Binds from a DB-API row by column name, where the columns are
+    found from the cursor's description (or from the row itself, for
+    rows which know their keys such as sqlite3.Row).
+
+    eg.
+    cursor.execute("select a, b, c from stuff")
+    a, b, c = rowbind(cursor)
+
+    Will fetch one row and bind as row[0], row[1], row[2]. Given a
+    sqlite3.Row rather than a cursor, it'll bind from that row.
+
+    As the iterable of a for loop, rowbind streams the rest of the
+    cursor's rows, fetching them size at a time.
+
+    eg.
+    for a, b, c in rowbind(cursor):
+        ...
+
+    The positions of the names are worked out once for each binding
+    site and set of columns, after which rows are bound by a single
+    itemgetter of integer indexes. Raises KeyError if a name doesn't
+    match any of the columns.
+    """
+
+    caller = _getframe(1)
+    site = _row_site(caller)
+
+    if site.plans.get("loop"):
+        if not is_cursor(cursor_or_row):
+            raise TypeError("rowbind needs a cursor to loop over")
+        getter = row_getter(site, cursor_columns(cursor_or_row))
+        return stream(cursor_or_row, getter, size)
+
+    elif is_cursor(cursor_or_row):
+        row = cursor_or_row.fetchone()
+        if row is None:
+            raise ValueError("cursor has no more rows")
+        getter = row_getter(site, cursor_columns(cursor_or_row))
+
+    elif isinstance(cursor_or_row, dict):
+        # some drivers produce actual dicts, which we can just index
+        return site.getitems(cursor_or_row)
+
+    else:
+        row = cursor_or_row
+        getter = row_getter(site, row_columns(row))
+
+    return getter(row)
+
+
+def _row_site(caller):
+    code = caller.f_code
+    index = caller.f_lasti
+
+    site = _cache.get(code, index)
+    if site is None:
+        site = _resolve_row_site(code, index)
+    return site
+
+
+_plain_row_site = _row_site
+
+
+def _resolve_row_site(code, index):
+    # rowbind can be at either a plain unpacking or a for loop, so
+    # when resolving it we need to try both. Which one it turned out
+    # to be is recorded in the site's plans, before anyone else can
+    # see the site.
+
+    with _cache.resolving(code, index):
+        site = _cache.peek(code, index)
+        if site is not None:
+            return site
+
+        try:
+            site = binding_site(_decode_site(code, index, False, ()))
+        except ValueError:
+            site = binding_site(_decode_site(code, index, False, FOR_LOOP))
+            site.plans["loop"] = True
+
+        _cache.set(code, index, site)
+        return site
+
+
+def structbind(buf, layout, offset=0):
+    """
+    Decodes the fields matching each binding from a fixed-layout
+    binary record in buf, starting at offset. The layout is either a
+    dict mapping field names to (format, offset) pairs, where format
+    is a struct format for a single value, or a NumPy structured
+    dtype.
+
+    eg.
+    HEADER = {"seq": ("<I", 0), "ts": ("<Q", 4), "length": ("<H", 12)}
+    seq, length = structbind(packet, HEADER)
+
+    For each binding site and layout, a single struct.Struct is
+    compiled which covers just the bound fields, and it decodes with
+    unpack_from directly out of buf. So buf may be bytes, a
+    bytearray, a memoryview, an mmap, or anything else with the
+    buffer interface, and nothing is sliced or copied.
+
+    Raises KeyError if a binding doesn't match a field in the layout.
+    The plan is remembered against the layout object itself, so a
+    layout shouldn't be modified once it has been bound with.
+    """
+
+    site = _binding_site(_getframe(1))
+    plan = _record_plan(site, layout)
+
+    found = plan.struct.unpack_from(buf, offset)
+    if plan.reorder is None:
+        return found
+    else:
+        return plan.reorder(found)
+
+
+def structbind_iter(buf, layout, offset=0, size=None):
+    """
+    Iterates over the consecutive fixed-layout records in buf, as the
+    iterable of a for loop. Each record is decoded as structbind
+    would.
+
+    eg.
+    with open("events.log", "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        for seq, ts in structbind_iter(mm, EVENT):
+            ...
+
+    Records start at offset, and are size bytes apart. For a dtype
+    layout the size defaults to its itemsize, and for a dict layout
+    to the end of the furthest field. A trailing partial record is
+    ignored.
+    """
+
+    site = _binding_site(_getframe(1), False, FOR_LOOP)
+    plan = _record_plan(site, layout)
+    return iter_records(plan, buf, offset, size)
+
+
+def _record_plan(site, layout):
+    # a site nearly always sees the same layout object every time, so
+    # the last one and its plan are kept aside and checked by identity
+    # first. Only when that misses do we pay for a layout_key, which
+    # for a dict layout means hashing all of its items.
+    plans = site.plans
+    last = plans.get("layout")
+    if last is not None and last[0] is layout:
+        return last[1]
+
+    key = layout_key(layout)
+    plan = plans.get(key)
+    if plan is None:
+        plan = plans[key] = record_plan(site.names, layout)
+
+    plans["layout"] = (layout, plan)
+    return plan
+
+
+def deepbind(source_map, default=raise_error, sep="__"):
+    """
+    Binds from nested mappings, where each binding name is a path of
+    keys joined by sep.
+
+    eg.
+    user__name, user__email, meta__ts = deepbind(doc)
+
+    Will bind as doc["user"]["name"], doc["user"]["email"] and
+    doc["meta"]["ts"]. The paths are split and compiled into a single
+    access plan once per binding site and separator, and paths which
+    share a prefix share the lookups for it, so doc["user"] above is
+    only looked up the once.
+
+    An optional default value will be used for any binding whose path
+    can't be followed to the end, whether for a missing key or for a
+    value partway along which isn't a mapping. If default is not
+    provided, will raise KeyError in either case.
+    """
+
+    site = _binding_site(_getframe(1))
+    plan = _deep_plan(site, sep, False)
+
+    if default is raise_error:
+        return plan.strict(source_map)
+    else:
+        return plan.defaulted(source_map, default)
+
+
+def objdeepbind(source_obj, default=raise_error, sep="__"):
+    """
+    Binds from nested attributes, where each binding name is a path of
+    attributes joined by sep. Like deepbind, but for objects.
+
+    eg.
+    user__name, user__email = objdeepbind(request)
+
+    Will bind as request.user.name and request.user.email, with
+    request.user looked up only the once.
+
+    An optional default value will be used for any binding whose path
+    can't be followed to the end. If default is not provided, will
+    raise AttributeError in that case.
+    """
+
+    site = _binding_site(_getframe(1))
+    plan = _deep_plan(site, sep, True)
+
+    if default is raise_error:
+        return plan.strict(source_obj)
+    else:
+        return plan.defaulted(source_obj, default)
+
+
+def _deep_plan(site, sep, attrs):
+    key = ("deep", sep, attrs)
+    plan = site.plans.get(key)
+    if plan is None:
+        plan = site.plans[key] = deep_plan(site.names, sep, attrs)
+    return plan
+
+
+def lazybind(fun):
+    """
+    Like funbind, except that each binding is a lazy proxy, and
+    fun(name) isn't called until the binding is first used.
+
+    eg.
+    config, template, user = lazybind(load)
+
+    Will call load("template") when template is first used, and if
+    the code never touches config or user then they're never loaded
+    at all. The proxy remembers the value after that, and passes
+    everything through to it: attributes, operators, calls,
+    iteration, comparison, and so on. Use mapbind.force to get the
+    value itself, for identity checks or to hand it to code that
+    insists on the real type.
+    """
+
+    from ._lazy import LazyValue
+
+    names = _binding_site(_getframe(1)).names
+    return [LazyValue(fun, name) for name in names]
+
+
+def lazymapbind(source_map, default=raise_error):
+    """
+    Like mapbind, except that each binding is a lazy proxy, which
+    doesn't look up its key until it's first used. See lazybind.
+
+    An optional default value will be used for any binding missing
+    from source_map. If default is not provided, will raise KeyError
+    when a missing binding is first used.
+    """
+
+    from ._lazy import LazyValue, getitem_or
+
+    names = _binding_site(_getframe(1)).names
+
+    if default is raise_error:
+        fetch = source_map.__getitem__
+    else:
+        fetch = partial(getitem_or, source_map, default)
+
+    return [LazyValue(fetch, name) for name in names]
+
+
+def lazyobjbind(source_obj, default=raise_error):
+    """
+    Like objbind, except that each binding is a lazy proxy, which
+    doesn't get its attribute until it's first used. See lazybind.
+
+    An optional default value will be used for any binding missing
+    from source_obj. If default is not provided, will raise
+    AttributeError when a missing binding is first used.
+    """
+
+    from ._lazy import LazyValue, getattr_or
+
+    names = _binding_site(_getframe(1)).names
+
+    if default is raise_error:
+        fetch = partial(getattr, source_obj)
+    else:
+        fetch = partial(getattr_or, source_obj, default)
+
+    return [LazyValue(fetch, name) for name in names]
+
+
+def force(value):
+    """
+    The value behind a lazy binding, fetching it if it hasn't been
+    already. Anything that isn't a lazy binding is returned as-is.
+    """
+
+    # if nothing has made a lazy binding yet, then this can't be one
+    lazy = sys.modules.get("mapbind._lazy")
+    return value if lazy is None else lazy.force(value)
+
+
+def _take(sequence, count, default=raise_error, width=None):
+    # the guts of takebind, once we know how many we need
+
+    if width is not None:
+        return _take_fields(sequence, count, default, width)
+
+    if type(sequence) in _SLICEABLE:
+        # these give the same items by slicing as by iterating from
+        # the start, so a single slice covers it. When the slice is
+        # the whole of a tuple it isn't even a copy.
+        found = sequence[:count]
+        missing = count - len(found)
+        if missing <= 0 or default is raise_error:
+            return found
+
+        found = list(found)
+        found += [default] * missing
+        return found
+
+    # important to note that this is a noop if sequence is already an
+    # iterator, such as a file. Which is just as well, since we must
+    # only take as many lines from a file as we're binding.
     iterator = iter(sequence)
 
     if default is not raise_error:
         # we don't want to raise an exception for running out of our
-        # sequence, so let's wrap each step as a call to next with the
-        # default value filled in. Thus when we run out of actual
-        # sequence, we'll start emitting the default value
-        # infinitely. Note that I'm re-purposing the raise_error
-        # object instance as a sentinel value -- this form of iter
-        # will stop when the result of the callable returns the
-        # sentinel. Since we don't actually want it to ever stop,
-        # we'll use a sentinel that should never actually happen,
-        # which we conveniently already had!
-        iterator = iter(partial(next, iterator, default), raise_error)
+        # sequence, so once it's done we carry on with the default
+        # value, forever.
+        iterator = chain(iterator, repeat(default))
 
     # and now we just slice our sequence to the right length.
-    return islice(iterator, 0, len(dest_names))
+    return islice(iterator, 0, count)
+
+
+def _take_fields(buf, count, default, width):
+    # split count fields of width bytes from the start of buf, as
+    # memoryviews onto it rather than copies
+
+    if width < 1:
+        raise ValueError("width must be at least 1, not %r" % width)
+
+    try:
+        view = memoryview(buf)
+    except NameError:
+        # Python 2.6
+        raise TypeError("takebind with a width needs memoryview")
+
+    if view.ndim != 1 or view.itemsize != 1:
+        if not hasattr(view, "cast"):
+            # Python 2 can't recast a memoryview as bytes
+            msg = "takebind with a width needs a buffer of bytes, not %r"
+            raise TypeError(msg % view.format)
+        view = view.cast("B")
+
+    available = len(view) // width
+    if available > count:
+        available = count
+    found = [view[start:start + width]
+             for start in xrange(0, available * width, width)]
+
+    if available < count and default is not raise_error:
+        found.extend(repeat(default, count - available))
+
+    return found
+
+
+# the exact types which slice into the same items that iterating over
+# them would produce. Not subclasses, which could change either. Not
+# mmap, which slices into bytes but iterates as bytes of length one.
+_SLICEABLE = set((list, tuple, str, bytes, bytearray))
+
+try:
+    _SLICEABLE.add(memoryview)
+except NameError:
+    # Python 2.6
+    pass
+
+try:
+    _SLICEABLE.add(unicode)
+except NameError:
+    # Python 3, where ranges slice too. Python 2 xrange can't.
+    _SLICEABLE.add(range)
+
+_SLICEABLE = frozenset(_SLICEABLE)
+
+
+if os.environ.get("MAPBIND_PERSIST"):
+    cache_persist(os.environ["MAPBIND_PERSIST"])
 
 
 #
@@ -0,0 +1,113 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+mapbind.__main__
+
+  python -m mapbind scan [-o MANIFEST] PATH [PATH ...]
+
+Checks the binding sites in the Python source files at the given
+paths (searching any directories), without importing anything.
+Sites which would raise when reached are listed, one per line as
+filename:line: binder: message, and the exit status is 1 if there
+were any. With -o, the resolved sites are also written out as a
+manifest for mapbind.load_manifest. If a path can't be read, or the
+manifest can't be written, the exit status is 2.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from __future__ import print_function
+
+import sys
+
+from argparse import ArgumentParser
+
+
+def scan_command(options):
+    from ._manifest import scan
+    from ._persist import dump_entries
+
+    try:
+        entries, files, sites, problems = scan(options.paths)
+    except (IOError, OSError) as err:
+        print("could not read %s: %s" % (err.filename, err.strerror),
+              file=sys.stderr)
+        return 2
+
+    for filename, line, binder, message in problems:
+        if binder is None:
+            # the file itself, which didn't compile
+            print("%s:%i: %s" % (filename, line, message))
+        else:
+            print("%s:%i: %s: %s" % (filename, line, binder, message))
+
+    if options.output:
+        try:
+            dump_entries(options.output, entries)
+        except (IOError, OSError) as err:
+            print("could not write %s: %s" % (options.output, err),
+                  file=sys.stderr)
+            return 2
+
+    if not options.quiet:
+        print("%i binding sites in %i files, %i problems" %
+              (sites, files, len(problems)), file=sys.stderr)
+
+    return 1 if problems else 0
+
+
+def create_parser():
+    parser = ArgumentParser(prog="python -m mapbind")
+    commands = parser.add_subparsers(dest="command")
+
+    scan = commands.add_parser(
+        "scan", help="check binding sites and write a manifest",
+        description="Compile the source files at the given paths,"
+        " without importing them, and check each of their binding"
+        " sites.")
+    scan.add_argument("paths", nargs="+", metavar="PATH",
+                      help="source files, or directories to search")
+    scan.add_argument("-o", "--output", default=None, metavar="MANIFEST",
+                      help="write the resolved sites here, for"
+                      " mapbind.load_manifest")
+    scan.add_argument("-q", "--quiet", action="store_true",
+                      help="don't print the summary")
+    scan.set_defaults(run=scan_command)
+
+    return parser
+
+
+def main(args=None):
+    parser = create_parser()
+    options = parser.parse_args(args)
+
+    run = getattr(options, "run", None)
+    if run is None:
+        # Python 3 doesn't insist on a command
+        parser.print_usage(sys.stderr)
+        return 2
+
+    return run(options)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+
+#
+# The end.
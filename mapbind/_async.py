@@ -0,0 +1,110 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+mapbind._async
+
+The coroutines behind abind, aobjbind, and afunbind. Once the binding
+names are known, every value is fetched at the same time and gathered
+up, so that binding takes as long as the slowest fetch rather than
+the total of them.
+
+This module needs async def, so it's only ever imported on demand.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from asyncio import gather
+from inspect import isawaitable
+from itertools import repeat
+from operator import getitem
+
+from . import raise_error
+
+
+__all__ = ("bind_attrs", "bind_calls", "bind_items", )
+
+
+async def _fetch(fetch, missing, source, name, default):
+    # a single value, which may or may not need awaiting. The missing
+    # exception can come from either the fetch itself or the await.
+    try:
+        value = fetch(source, name)
+        if isawaitable(value):
+            value = await value
+
+    except missing:
+        if default is raise_error:
+            raise
+        return default
+
+    return value
+
+
+async def _call(fun, name):
+    value = fun(name)
+    if isawaitable(value):
+        value = await value
+    return value
+
+
+async def bind_items(source, names, default=raise_error):
+    """
+    The values for the given keys from source. If source has an
+    __agetmany__(keys) coroutine method then they are all fetched
+    with that, and otherwise each source[key] is fetched and awaited
+    concurrently.
+    """
+
+    agetmany = getattr(type(source), "__agetmany__", None)
+
+    if agetmany is not None:
+        found = await agetmany(source, names)
+        if default is raise_error:
+            return tuple(map(found.__getitem__, names))
+        else:
+            return tuple(map(found.get, names, repeat(default)))
+
+    values = await gather(*[_fetch(getitem, KeyError, source, name, default)
+                            for name in names])
+    return tuple(values)
+
+
+async def bind_attrs(source, names, default=raise_error):
+    """
+    The values for the given attributes of source, awaited
+    concurrently where they need it
+    """
+
+    values = await gather(*[_fetch(getattr, AttributeError,
+                                   source, name, default)
+                            for name in names])
+    return tuple(values)
+
+
+async def bind_calls(fun, names):
+    """
+    The results of fun(name) for each of names, awaited concurrently
+    where they need it
+    """
+
+    values = await gather(*[_call(fun, name) for name in names])
+    return tuple(values)
+
+
+#
+# The end.
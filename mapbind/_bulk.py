@@ -0,0 +1,119 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+mapbind._bulk
+
+The bulk-fetch protocol for mapbind. A mapping whose lookups are
+expensive (a cache client, a dbm wrapper, a remote config service)
+can offer a __getmany__(keys) method, or have an adapter registered
+for its type, and mapbind will ask it for all of the binding names at
+once rather than one at a time.
+
+Either way the result should be a mapping of the keys which were
+found to their values. Keys which weren't found are simply left out.
+A class can set __getmany__ to None to opt out of a bulk fetch it
+would otherwise have inherited.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from weakref import ref
+
+
+__all__ = ("getmany_for", "register_getmany", )
+
+
+# type -> fun(source, keys), as registered
+_registry = {}
+
+# id(type) -> fun(source, keys) or None, as resolved from the registry
+# and the type's MRO. This is consulted on every mapbind of anything
+# other than a dict, so it's a plain dict keyed by id rather than a
+# WeakKeyDictionary, which would cost a weakref per lookup. A weakref
+# to each type (in _watched) drops its entry when the type goes away,
+# so that we don't keep dynamically created classes around forever,
+# nor hand a stale answer to a new type that reuses its id.
+_resolved = {}
+_watched = {}
+
+
+def _call_getmany(source, keys):
+    return source.__getmany__(keys)
+
+
+def register_getmany(cls, fun):
+    """
+    Register fun(source, keys) as the bulk fetch for instances of
+    cls and its subclasses. It should return a mapping of the keys
+    which were found to their values. A fun of None removes any
+    registration for cls.
+    """
+
+    if fun is None:
+        _registry.pop(cls, None)
+    else:
+        _registry[cls] = fun
+
+    _resolved.clear()
+    _watched.clear()
+
+
+def _resolve(cls):
+    for klass in getattr(cls, "__mro__", (cls, )):
+        if klass in _registry:
+            return _registry[klass]
+        if "__getmany__" in vars(klass):
+            # like __hash__, a __getmany__ of None means a subclass
+            # has opted back out
+            if vars(klass)["__getmany__"] is None:
+                return None
+            return _call_getmany
+    return None
+
+
+def getmany_for(cls):
+    """
+    The bulk fetch function for instances of cls, or None if there
+    isn't one
+    """
+
+    key = id(cls)
+    try:
+        return _resolved[key]
+    except KeyError:
+        pass
+
+    found = _resolve(cls)
+
+    try:
+        _watched[key] = ref(cls, lambda _ref, key=key: _forget(key))
+    except TypeError:
+        # not weakly referencable, so don't remember it
+        return found
+
+    _resolved[key] = found
+    return found
+
+
+def _forget(key):
+    _resolved.pop(key, None)
+    _watched.pop(key, None)
+
+
+#
+# The end.
@@ -0,0 +1,283 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+mapbind._cache
+
+The binding-site cache. Entries are keyed on a weak reference to the
+calling code object and the offset of the calling instruction, so
+the cache never keeps a code object alive on its own. When a code
+object is collected, every entry for it is dropped. An optional
+maximum size turns the cache into an LRU.
+
+Lookups take no lock. Everything that changes the cache does, and a
+set of striped locks lets the binders make sure that only one thread
+resolves any given binding site, while different sites resolve in
+parallel.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from collections import namedtuple
+from functools import partial
+from weakref import ref
+
+
+try:
+    # the plain lock, without importing all of threading for it
+    from _thread import allocate_lock as Lock
+
+except ImportError:
+    # Python 2
+    from thread import allocate_lock as Lock
+
+
+try:
+    from collections import OrderedDict
+
+except ImportError:
+    # Python 2.6 doesn't have one. We'll still work, but eviction
+    # when bounded will be in no particular order.
+    OrderedDict = dict
+
+
+_MOVE_TO_END = hasattr(OrderedDict, "move_to_end")
+
+
+__all__ = ("BindingCache", "CacheInfo", )
+
+
+# how many locks resolving sites are spread over. A power of two.
+STRIPES = 64
+
+
+CacheInfo = namedtuple("CacheInfo", ("hits", "misses",
+                                     "maxsize", "currsize"))
+
+
+class BindingCache(object):
+    """
+    Maps (code, offset) to a binding-site entry without pinning the
+    code object in memory.
+
+    The key for an entry is the basic (callback-less) weak reference
+    to the code object, which CPython hands back to us as the same
+    object every time we ask for it. That means a lookup is an
+    identity match on the key, rather than a field-by-field compare
+    of code objects. A second weak reference with a callback is
+    what notices the code object going away.
+
+    The hits and misses counts aren't locked, and so may come up a
+    little short when several threads are binding at once.
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+        # held while changing _entries or _codes
+        self._lock = Lock()
+
+        # see resolving
+        self._stripes = tuple(Lock() for _ in range(STRIPES))
+
+        # (basic ref, offset) -> entry
+        self._entries = OrderedDict()
+
+        # basic ref -> (callback ref, set of offsets)
+        self._codes = {}
+
+        # basic refs whose code object has been collected. We only
+        # note them from the weakref callback, which can fire at any
+        # point a collection happens -- including while we're in the
+        # middle of changing _entries. They're purged the next time
+        # we're going to mutate anyway.
+        self._dead = []
+
+
+    def get(self, code, offset):
+        """
+        Find the entry for the given code object and instruction
+        offset, or None if there isn't one.
+        """
+
+        key = (ref(code), offset)
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            if self.maxsize is not None and self._lock.acquire(False):
+                # if another thread is busy with the cache, this hit
+                # will just have to go without updating the LRU
+                # order, rather than wait
+                try:
+                    self._touch(key)
+                finally:
+                    self._lock.release()
+
+        return entry
+
+
+    def peek(self, code, offset):
+        """
+        Like get, but without counting as a hit or a miss, and
+        without changing the LRU order
+        """
+
+        return self._entries.get((ref(code), offset))
+
+
+    def resolving(self, code, offset):
+        """
+        A lock to hold while resolving the entry for the given code
+        object and instruction offset. Threads which miss on the same
+        site will wait on one another here, and so can check whether
+        the entry has been set in the meantime rather than each doing
+        the same work. Unrelated sites will usually get different
+        locks.
+        """
+
+        return self._stripes[hash((id(code), offset)) & (STRIPES - 1)]
+
+
+    def set(self, code, offset, entry):
+        """
+        Store the entry for the given code object and instruction
+        offset, evicting the least recently used entries if that
+        would exceed our maxsize.
+        """
+
+        basic = ref(code)
+
+        with self._lock:
+            if self._dead:
+                self._purge()
+
+            watch = self._codes.get(basic)
+            if watch is None:
+                alert = ref(code, partial(self._collected, basic))
+                watch = self._codes[basic] = (alert, set())
+
+            watch[1].add(offset)
+            self._entries[(basic, offset)] = entry
+
+            if self.maxsize is not None:
+                self._evict(self.maxsize)
+
+
+    def resize(self, maxsize=None):
+        """
+        Change the maximum number of entries. None means unbounded.
+        """
+
+        with self._lock:
+            self.maxsize = maxsize
+            if maxsize is not None:
+                self._evict(maxsize)
+
+
+    def clear(self):
+        """
+        Drop all entries and reset the statistics
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self._codes.clear()
+            del self._dead[:]
+
+        self.hits = 0
+        self.misses = 0
+
+
+    def info(self):
+        """
+        Statistics for this cache, as a CacheInfo named tuple
+        """
+
+        with self._lock:
+            if self._dead:
+                self._purge()
+            currsize = len(self._entries)
+
+        return CacheInfo(self.hits, self.misses, self.maxsize, currsize)
+
+
+    def _touch(self, key):
+        # only with the lock held
+
+        entries = self._entries
+        try:
+            if _MOVE_TO_END:
+                entries.move_to_end(key)
+            else:
+                # Python 2 OrderedDict has no move_to_end, but
+                # re-inserting has the same effect
+                entries[key] = entries.pop(key)
+        except KeyError:
+            # someone else evicted it out from under us between our
+            # lookup and now, which is fine. It'll just be a miss
+            # next time.
+            pass
+
+
+    def _evict(self, maxsize):
+        # only with the lock held
+
+        if self._dead:
+            self._purge()
+
+        entries = self._entries
+        while len(entries) > maxsize:
+            try:
+                key, _entry = entries.popitem(last=False)
+            except TypeError:
+                # plain dict fallback
+                key, _entry = entries.popitem()
+
+            basic, offset = key
+            watch = self._codes.get(basic)
+            if watch is not None:
+                watch[1].discard(offset)
+                if not watch[1]:
+                    del self._codes[basic]
+
+
+    def _collected(self, basic, _alert):
+        # weakref callback. Keep this as dumb as possible, see the
+        # note on _dead in __init__
+        self._dead.append(basic)
+
+
+    def _purge(self):
+        # only with the lock held
+
+        dead = self._dead
+        while dead:
+            basic = dead.pop()
+            watch = self._codes.pop(basic, None)
+            if watch is None:
+                continue
+            for offset in watch[1]:
+                self._entries.pop((basic, offset), None)
+
+
+#
+# The end.
@@ -0,0 +1,93 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+mapbind._columns
+
+Transposes a sequence of records into one column per binding name,
+for colbind and objcolbind. Each column is filled by mapping a getter
+across the records, so the per-record work all happens in C and no
+intermediate row tuples are created. Columns can be plain lists,
+compact array.array instances, or NumPy arrays.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from array import array
+
+
+__all__ = ("columns", )
+
+
+def _typecode(typecodes, name):
+    # typecodes may be a single typecode for every column, or a
+    # mapping of name to typecode where missing names mean a plain
+    # column
+    if typecodes is None:
+        return None
+    elif hasattr(typecodes, "get"):
+        return typecodes.get(name)
+    else:
+        return typecodes
+
+
+def _array_column(values, typecode, _count):
+    if typecode is None:
+        return list(values)
+    else:
+        return array(typecode, values)
+
+
+def _numpy_column(values, typecode, count):
+    # deferred, as we don't want to make anyone pay for importing
+    # numpy unless they've asked for it
+    import numpy
+
+    if typecode is None:
+        return numpy.array(list(values))
+    else:
+        return numpy.fromiter(values, typecode, count)
+
+
+def columns(records, names, column, typecodes=None, numpy=False):
+    """
+    A tuple with a column for each of names, taken from records.
+    column(records, name) should return an iterable of the value for
+    name in each of the records, in order.
+
+    If typecodes is given, it's either a single array typecode for
+    every column, or a mapping of name to typecode. Columns with a
+    typecode are an array.array of that type, and any others are a
+    list. If numpy is True then all of the columns are NumPy arrays
+    instead, with the typecode (if any) as their dtype.
+    """
+
+    # we're going to make a pass over the records for each column, so
+    # we need them to stay put
+    if not isinstance(records, (list, tuple)):
+        records = list(records)
+
+    build = _numpy_column if numpy else _array_column
+    count = len(records)
+
+    return tuple(build(column(records, name),
+                       _typecode(typecodes, name), count)
+                 for name in names)
+
+
+#
+# The end.
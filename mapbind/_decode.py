@@ -0,0 +1,282 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+mapbind._decode
+
+A purpose-built bytecode reader. Rather than disassembling a whole
+code object to find the one unpack assignment we care about, this
+seeks directly to the calling instruction's offset and decodes only
+the UNPACK_SEQUENCE after it and the store operations that follow.
+
+Handles the pre-3.6 variable-width bytecode, wordcode, EXTENDED_ARG
+prefixes, the 3.11+ inline CACHE entries, and the 3.13 fused
+STORE_FAST_STORE_FAST superinstruction.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from opcode import HAVE_ARGUMENT, opmap, opname
+from sys import version_info
+
+
+__all__ = ("AWAIT", "FOR_LOOP", "LEADS", "decode_bindings", "deref_name",
+           "frame_offset", "instructions", "spans", )
+
+
+# 3.6 moved to a fixed two bytes per instruction
+WORDCODE = version_info >= (3, 6)
+
+
+# 3.11 added inline cache entries trailing some instructions. Each is
+# another two bytes which we need to step over.
+CACHES = [0] * 256
+
+try:
+    from opcode import _inline_cache_entries
+
+except ImportError:
+    pass
+
+else:
+    if isinstance(_inline_cache_entries, dict):
+        # 3.13 made this a dict keyed by name
+        for _name, _count in _inline_cache_entries.items():
+            CACHES[opmap[_name]] = _count
+    else:
+        CACHES[:len(_inline_cache_entries)] = _inline_cache_entries
+    del _inline_cache_entries
+
+
+EXTENDED_ARG = opmap["EXTENDED_ARG"]
+UNPACK_SEQUENCE = opmap["UNPACK_SEQUENCE"]
+
+# what sits between a call and the unpacking when the call's result
+# is what a for loop is iterating over
+FOR_LOOP = (opmap["GET_ITER"], opmap["FOR_ITER"])
+
+# and what sits between a call and the unpacking when the call's
+# result is awaited. Versions without await at all get a lead which
+# can never match.
+if version_info >= (3, 12):
+    _AWAIT = ("GET_AWAITABLE", "LOAD_CONST", "SEND", "YIELD_VALUE",
+              "RESUME", "JUMP_BACKWARD_NO_INTERRUPT", "END_SEND")
+elif version_info >= (3, 11):
+    _AWAIT = ("GET_AWAITABLE", "LOAD_CONST", "SEND", "YIELD_VALUE",
+              "RESUME", "JUMP_BACKWARD_NO_INTERRUPT")
+else:
+    _AWAIT = ("GET_AWAITABLE", "LOAD_CONST", "YIELD_FROM")
+
+AWAIT = tuple(opmap.get(_name, -1) for _name in _AWAIT)
+del _AWAIT
+
+# the leads by name, for callers which would rather not import this
+# module just to say which one they want
+LEADS = {"await": AWAIT, "for": FOR_LOOP}
+
+STORE_FAST = opmap["STORE_FAST"]
+STORE_DEREF = opmap["STORE_DEREF"]
+STORE_GLOBAL = opmap["STORE_GLOBAL"]
+STORE_NAME = opmap["STORE_NAME"]
+
+# these only exist in 3.13+, so use an opcode which can never match
+# in their absence
+STORE_FAST_STORE_FAST = opmap.get("STORE_FAST_STORE_FAST", -1)
+STORE_FAST_LOAD_FAST = opmap.get("STORE_FAST_LOAD_FAST", -1)
+
+
+if version_info < (3, 0):
+    def _bytecode(code_obj):
+        # bytearray so that indexing gives us ints rather than str
+        return bytearray(code_obj.co_code)
+
+else:
+    def _bytecode(code_obj):
+        return code_obj.co_code
+
+
+def instructions(code_obj, offset=0):
+    """
+    Iterates over the instructions in code_obj starting at offset,
+    yielding (offset, opcode, oparg) tuples. EXTENDED_ARG prefixes
+    are folded into the oparg of the instruction they extend, and
+    inline CACHE entries are skipped. The offset yielded is that of
+    the instruction itself, not of its prefix.
+    """
+
+    for _begin, start, op, arg, _end in spans(code_obj, offset):
+        yield start, op, arg
+
+
+def spans(code_obj, offset=0):
+    """
+    Like instructions, but yields (begin, offset, opcode, oparg, end)
+    tuples, where begin is the offset of the first of any
+    EXTENDED_ARG prefixes and end is the offset of the next
+    instruction, after any CACHE entries.
+    """
+
+    code = _bytecode(code_obj)
+    limit = len(code)
+
+    while offset < limit:
+        begin = offset
+        start, op, arg, offset = _read(code, offset)
+        yield begin, start, op, arg, offset
+
+
+def _read(code, offset):
+    # decode the instruction at offset. Returns the offset of the
+    # actual instruction (after any EXTENDED_ARG prefixes), its
+    # opcode and argument, and the offset of the next instruction.
+
+    arg = 0
+
+    while True:
+        start = offset
+        op = code[offset]
+
+        if WORDCODE:
+            arg = (arg << 8) | code[offset + 1]
+            offset += 2 + (2 * CACHES[op])
+
+        elif op >= HAVE_ARGUMENT:
+            arg = (arg << 16) | code[offset + 1] | (code[offset + 2] << 8)
+            offset += 3
+
+        else:
+            offset += 1
+
+        if op != EXTENDED_ARG:
+            return start, op, arg, offset
+
+
+if (3, 11) <= version_info < (3, 13):
+    def frame_offset(offset, op):
+        # 3.11 and 3.12 report a frame's f_lasti during a call as the
+        # last of the calling instruction's inline cache entries,
+        # rather than as the instruction itself
+        return offset + (2 * CACHES[op])
+
+else:
+    def frame_offset(offset, op):
+        return offset
+
+
+if version_info >= (3, 11):
+    def deref_name(code_obj, arg):
+        # 3.11 indexes cells and free vars into the same "fast
+        # locals" space as the ordinary locals, with overlap between
+        # cells and arguments removed. The code object knows how.
+        return code_obj._varname_from_oparg(arg)
+
+else:
+    def deref_name(code_obj, arg):
+        return (code_obj.co_cellvars + code_obj.co_freevars)[arg]
+
+
+def decode_bindings(code_obj, offset, noname=False, lead=()):
+    """
+    Decode the unpack assignment which consumes the result of the
+    instruction at offset in code_obj.
+
+    Returns a tuple of the binding names, in order. If noname is
+    True, returns only the count of bindings rather than their names,
+    and doesn't look at the store operations at all.
+
+    If lead is given, it's a sequence of opcodes which are expected to
+    come between the calling instruction and the unpacking. FOR_LOOP
+    is the lead for a call whose result is iterated over by a for
+    loop, with each item unpacked in turn, and AWAIT is the lead for
+    a call whose result is awaited before being unpacked. A lead may
+    also be given by its name in LEADS.
+
+    Raises ValueError if the result isn't consumed by an
+    UNPACK_SEQUENCE (after the lead ops, if any), or if any of the
+    unpacked values are consumed by something other than a simple
+    variable store.
+    """
+
+    code = _bytecode(code_obj)
+
+    # step over the calling instruction (or on 3.11 and 3.12, its
+    # last cache entry)
+    _start, _op, _arg, offset = _read(code, offset)
+
+    if lead in LEADS:
+        lead = LEADS[lead]
+
+    for expected in lead:
+        _start, op, _arg, offset = _read(code, offset)
+        if op != expected:
+            msg = "invoked without an unpack binding, %r" % opname[op]
+            raise ValueError(msg)
+
+    # and read the one that will consume our result
+    _start, op, count, offset = _read(code, offset)
+
+    if op != UNPACK_SEQUENCE:
+        # someone invoked us without being the right-hand side of
+        # an unpack assignment. WRONG.
+        msg = "invoked without an unpack binding, %r" % opname[op]
+        raise ValueError(msg)
+
+    if noname:
+        return count
+
+    found = []
+    while len(found) < count:
+        _start, op, arg, offset = _read(code, offset)
+
+        if op == STORE_FAST:
+            found.append(code_obj.co_varnames[arg])
+
+        elif op == STORE_DEREF:
+            found.append(deref_name(code_obj, arg))
+
+        elif op == STORE_GLOBAL or op == STORE_NAME:
+            found.append(code_obj.co_names[arg])
+
+        elif op == STORE_FAST_STORE_FAST:
+            # two stores fused into one op, with a nybble of
+            # argument for each
+            varnames = code_obj.co_varnames
+            found.append(varnames[arg >> 4])
+            found.append(varnames[arg & 15])
+
+        elif op == STORE_FAST_LOAD_FAST:
+            # a store fused with the load that follows it, which is
+            # only going to happen on the last of our bindings
+            found.append(code_obj.co_varnames[arg >> 4])
+
+        else:
+            # nested unpack maybe? or a star function call? I say
+            # unto thee nay. NAY!
+            msg = "unsupported non-binding operation, %r" % opname[op]
+            raise ValueError(msg)
+
+    if len(found) != count:
+        # a fused store straddled the end of our unpacking, which
+        # the compiler shouldn't ever produce
+        msg = "unsupported non-binding operation, %r" % opname[op]
+        raise ValueError(msg)
+
+    return tuple(found)
+
+
+#
+# The end.
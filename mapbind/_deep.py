@@ -0,0 +1,207 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+mapbind._deep
+
+Access plans for deepbind and objdeepbind, where each binding name is
+a path into nested data, such as user__name for doc["user"]["name"].
+
+A plan is a small function generated and compiled once per binding
+site, which walks each path with plain subscripts or attribute loads.
+Paths which share a prefix share the steps for it, so for
+
+  user__name, user__email, meta__ts = deepbind(doc)
+
+the plan is
+
+  def deep_plan(source):
+      _1 = source['user']
+      _2 = _1['name']
+      _3 = _1['email']
+      _4 = source['meta']
+      _5 = _4['ts']
+      return (_2, _3, _5)
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from collections import namedtuple
+from keyword import iskeyword
+
+
+__all__ = ("DeepPlan", "deep_plan", )
+
+
+DeepPlan = namedtuple("DeepPlan", ("strict", "defaulted"))
+
+
+class Missing(object):
+    # stands in for a value which wasn't found partway along a path.
+    # Asking it for anything more just gives itself back, so the rest
+    # of the path falls through without any extra branching.
+
+    __slots__ = ()
+
+    def get(self, _key, _default=None):
+        return self
+
+
+_missing = Missing()
+
+# for attributes, where getattr with a default already does the right
+# thing on anything that doesn't have the attribute
+_no_attr = object()
+
+
+def _split(name, sep):
+    parts = name.split(sep)
+    if not all(parts):
+        msg = "empty path segment in %r for separator %r" % (name, sep)
+        raise ValueError(msg)
+    return tuple(parts)
+
+
+def _steps(names, sep):
+    # the distinct path prefixes in order of first appearance, each as
+    # (variable, parent variable, key), and the variable holding the
+    # value for each name
+
+    known = {(): "source"}
+    steps = []
+    results = []
+
+    for name in names:
+        path = ()
+        for part in _split(name, sep):
+            parent = known[path]
+            path = path + (part, )
+            if path not in known:
+                var = known[path] = "_%i" % len(known)
+                steps.append((var, parent, part))
+        results.append(known[path])
+
+    return steps, results
+
+
+def _attr_step(var, parent, part):
+    # a plain attribute load, unless the name is a keyword, which the
+    # compiler won't accept after a dot
+    if iskeyword(part):
+        return "    %s = getattr(%s, %r)" % (var, parent, part)
+    else:
+        return "    %s = %s.%s" % (var, parent, part)
+
+
+def _item_step(var, parent, part):
+    # a plain subscript. Partway along a path, something that can't
+    # be subscripted by a key (None, a list) means the path can't be
+    # followed, which is a KeyError like any other missing key.
+    if parent == "source":
+        return "    %s = %s[%r]" % (var, parent, part)
+    else:
+        return ("    try:\n"
+                "        %s = %s[%r]\n"
+                "    except TypeError:\n"
+                "        raise KeyError(%r)" % (var, parent, part, part))
+
+
+def _get_step(var, parent, part):
+    # anything along the way which isn't a mapping (None, a str, an
+    # int) has no get, and means the path can't be followed
+    return ("    try:\n"
+            "        %s = %s.get(%r, _missing)\n"
+            "    except (AttributeError, TypeError):\n"
+            "        %s = _missing" % (var, parent, part, var))
+
+
+def _generate(steps, results, strict, attrs):
+    if attrs:
+        if strict:
+            step = _attr_step
+        else:
+            step = lambda *info: "    %s = getattr(%s, %r, _no_attr)" % info
+        missing = "_no_attr"
+    else:
+        if strict:
+            step = _item_step
+        else:
+            step = _get_step
+        missing = "_missing"
+
+    lines = ["def deep_plan(source):" if strict else
+             "def deep_plan(source, default):"]
+    lines.extend(step(*info) for info in steps)
+
+    if strict:
+        found = ["%s, " % var for var in results]
+    else:
+        found = ["(default if %s is %s else %s), " % (var, missing, var)
+                 for var in results]
+
+    lines.append("    return (%s)" % "".join(found))
+    return "\n".join(lines)
+
+
+def deep_plan(names, sep, attrs=False):
+    """
+    Compile a DeepPlan for the given binding names, split into paths
+    by sep. If attrs is True the paths are followed by attribute,
+    otherwise by item.
+
+    The strict function of the plan takes only the source, and lets
+    the KeyError or AttributeError of a missing step raise. The
+    defaulted function takes the source and a default, and uses the
+    default for any path which can't be followed to the end.
+    """
+
+    steps, results = _steps(names, sep)
+
+    if attrs:
+        # attribute names go straight into the source, so they had
+        # better actually be names
+        for _var, _parent, part in steps:
+            if not _is_identifier(part):
+                msg = "invalid attribute name %r in path" % part
+                raise ValueError(msg)
+
+    namespace = {"_missing": _missing, "_no_attr": _no_attr}
+
+    compiled = []
+    for strict in (True, False):
+        source = _generate(steps, results, strict, attrs)
+        code = compile(source, "<deep plan %s>" % ", ".join(names), "exec")
+        # the generated source is made only of our own fixed
+        # templates, the generated variable names, and the path
+        # segments, which are either checked to be identifiers (for
+        # attributes) or only ever appear as repr'd string literals
+        exec(code, namespace)  # nosec B102
+        compiled.append(namespace.pop("deep_plan"))
+
+    return DeepPlan(*compiled)
+
+
+def _is_identifier(part):
+    try:
+        return part.isidentifier()
+    except AttributeError:
+        # Python 2 str
+        return part.replace("_", "a").isalnum() and not part[0].isdigit()
+
+
+#
+# The end.
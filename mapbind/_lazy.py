@@ -0,0 +1,218 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+mapbind._lazy
+
+The proxies bound by lazybind, lazymapbind, and lazyobjbind. Each
+one holds a fetch function and a name, and calls fetch(name) the
+first time the proxy is actually used for anything. After that it
+holds only the value, and passes everything through to it.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+import operator
+
+from math import ceil, floor, trunc
+
+
+__all__ = ("LazyValue", "force", "getattr_or", "getitem_or", )
+
+
+class LazyValue(object):
+    """
+    Stands in for fetch(name), which is called on first use and then
+    remembered. Operators, attribute access, calls, iteration,
+    comparison, hashing, str and repr and the rest all pass through
+    to the value, and isinstance sees the value's class. Identity
+    doesn't, so use force to get at the value itself where that
+    matters.
+
+    Two threads first using the same proxy at once may both call
+    fetch, though only one result will be kept.
+    """
+
+    # just the two slots. Until the value is fetched, these are the
+    # fetch function and the name, and after that None and the value.
+    # This way the proxy also lets go of whatever it was fetching
+    # from as soon as it's done with it.
+    __slots__ = ("_lazy_fetch", "_lazy_state", )
+
+
+    def __init__(self, fetch, name):
+        setter = object.__setattr__
+        setter(self, "_lazy_fetch", fetch)
+        setter(self, "_lazy_state", name)
+
+
+    def __getattr__(self, name):
+        return getattr(force(self), name)
+
+
+    def __setattr__(self, name, value):
+        setattr(force(self), name, value)
+
+
+    def __delattr__(self, name):
+        delattr(force(self), name)
+
+
+    @property
+    def __class__(self):
+        return type(force(self))
+
+
+    def __dir__(self):
+        return dir(force(self))
+
+
+    def __repr__(self):
+        return repr(force(self))
+
+
+    def __hash__(self):
+        return hash(force(self))
+
+
+    def __call__(self, *args, **kwds):
+        return force(self)(*args, **kwds)
+
+
+def force(value):
+    """
+    The value behind a lazy binding, fetching it if it hasn't been
+    already. Anything that isn't a lazy binding is returned as-is.
+    """
+
+    if type(value) is not LazyValue:
+        return value
+
+    getter = object.__getattribute__
+    fetch = getter(value, "_lazy_fetch")
+    if fetch is None:
+        return getter(value, "_lazy_state")
+
+    found = fetch(getter(value, "_lazy_state"))
+
+    setter = object.__setattr__
+    setter(value, "_lazy_state", found)
+    setter(value, "_lazy_fetch", None)
+    return found
+
+
+def getitem_or(source_map, default, name):
+    return source_map.get(name, default)
+
+
+def getattr_or(source_obj, default, name):
+    return getattr(source_obj, name, default)
+
+
+def _forward(fun):
+    # pass a special method through to the value, by way of the
+    # builtin or operator function that would have called it, so that
+    # their fallbacks still apply
+    def forwarded(self, *args):
+        return fun(force(self), *args)
+    return forwarded
+
+
+def _reflected(op):
+    def forwarded(self, other):
+        return op(other, force(self))
+    return forwarded
+
+
+def _special(name):
+    def special(value, *args):
+        return getattr(value, name)(*args)
+    return special
+
+
+_FORWARD = [
+    ("__str__", str), ("__format__", format),
+    ("__bool__", bool), ("__nonzero__", bool),
+    ("__len__", len), ("__iter__", iter), ("__reversed__", reversed),
+    ("__next__", next),
+    ("__contains__", operator.contains),
+    ("__getitem__", operator.getitem),
+    ("__setitem__", operator.setitem),
+    ("__delitem__", operator.delitem),
+    ("__enter__", _special("__enter__")),
+    ("__exit__", _special("__exit__")),
+    ("__int__", int), ("__float__", float), ("__complex__", complex),
+    ("__index__", operator.index), ("__round__", round),
+    ("__trunc__", trunc), ("__floor__", floor), ("__ceil__", ceil),
+    ("__neg__", operator.neg), ("__pos__", operator.pos),
+    ("__abs__", abs), ("__invert__", operator.invert),
+    ("__divmod__", divmod),
+    ("__eq__", operator.eq), ("__ne__", operator.ne),
+    ("__lt__", operator.lt), ("__le__", operator.le),
+    ("__gt__", operator.gt), ("__ge__", operator.ge),
+]
+
+if str is not bytes:
+    _FORWARD.append(("__bytes__", bytes))
+
+try:
+    _FORWARD.append(("__long__", long))
+except NameError:
+    # Python 3 has no long
+    pass
+else:
+    # and only Python 2 has a plain next method. Defining one on
+    # Python 3 would hide any next attribute of the value.
+    _FORWARD.append(("next", next))
+
+try:
+    from os import fspath
+    _FORWARD.append(("__fspath__", fspath))
+except ImportError:
+    # older than Python 3.6
+    pass
+
+
+_ARITHMETIC = (
+    "add", "sub", "mul", "matmul", "truediv", "floordiv", "div", "mod",
+    "pow", "lshift", "rshift", "and", "xor", "or",
+)
+
+
+def _install():
+    for name, fun in _FORWARD:
+        setattr(LazyValue, name, _forward(fun))
+
+    setattr(LazyValue, "__rdivmod__", _reflected(divmod))
+
+    for name in _ARITHMETIC:
+        # the operator module uses and_ and or_, and only has div and
+        # matmul in the versions of Python that have those operators
+        op = getattr(operator, name, None) or \
+            getattr(operator, name + "_", None)
+        if op is None:
+            continue
+
+        setattr(LazyValue, "__%s__" % name, _forward(op))
+        setattr(LazyValue, "__r%s__" % name, _reflected(op))
+
+
+_install()
+
+
+#
+# The end.
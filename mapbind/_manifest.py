@@ -0,0 +1,168 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+mapbind._manifest
+
+Scans source files for binding sites without importing them. Each
+file is compiled, and every call to one of the binders found in the
+resulting code is decoded by the same rules as at runtime. Sites
+which would raise when reached are reported, and the rest make up a
+manifest which mapbind.load_manifest can use to skip decoding
+entirely.
+
+The manifest is in the same form as a persistent store (see
+mapbind._persist), keyed on the identity of each site's code, so it
+only applies to the same source files at the same paths, compiled by
+the same version of Python.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+import os
+
+from collections import namedtuple
+from dis import findlinestarts
+from os.path import abspath, isdir
+
+from ._decode import decode_bindings
+from ._persist import code_identity
+from ._scan import BINDERS, find_sites, iter_codes
+
+
+__all__ = ("Problem", "scan", "scan_file", "source_files", )
+
+
+Problem = namedtuple("Problem", ("filename", "line", "binder", "message"))
+
+
+def source_files(paths):
+    """
+    The Python source files at paths, which may name files or
+    directories to search
+    """
+
+    for path in paths:
+        if not isdir(path):
+            yield path
+            continue
+
+        for dirpath, dirnames, filenames in os.walk(path):
+            # in order, and without wandering into hidden directories
+            # such as .git
+            dirnames[:] = sorted(name for name in dirnames
+                                 if not name.startswith("."))
+            for name in sorted(filenames):
+                if name.endswith(".py"):
+                    yield os.path.join(dirpath, name)
+
+
+def _line(code, offset):
+    # the source line of the instruction at offset
+    line = code.co_firstlineno
+    for start, found in findlinestarts(code):
+        if start > offset:
+            break
+        if found is not None:
+            line = found
+    return line
+
+
+def _resolve(entries, code, offset, binder):
+    # decode the site as its binder would, recording the outcome in
+    # entries. Returns the message if it would raise, otherwise None.
+
+    identity = code_identity(code)
+
+    if binder == "rowbind":
+        # as mapbind._resolve_row_site, which tries a plain unpacking
+        # first and then a for loop, and would remember both
+        attempts = ((False, ()), (False, "for"))
+    else:
+        attempts = (BINDERS[binder], )
+
+    for noname, lead in attempts:
+        try:
+            found = decode_bindings(code, offset, noname, lead)
+        except ValueError as err:
+            found = str(err)
+
+        entries[(identity, offset, noname, lead)] = found
+        if not isinstance(found, str):
+            return None
+
+    return found
+
+
+def scan_file(path, entries):
+    """
+    Compiles the source file at path, and decodes each of its binding
+    sites into entries. Returns a tuple of the count of sites found,
+    and a list of Problem for those which would raise (or for the
+    file, if it won't compile).
+    """
+
+    with open(path, "rb") as source:
+        data = source.read()
+
+    try:
+        # the filename the import system would give the module, so
+        # that the identities match
+        top = compile(data, abspath(path), "exec", 0, True)
+    except (SyntaxError, ValueError) as err:
+        return 0, [Problem(path, getattr(err, "lineno", None) or 0,
+                           None, str(err))]
+
+    count = 0
+    problems = []
+
+    for code in iter_codes(top):
+        for offset, binder in find_sites(code):
+            count += 1
+            message = _resolve(entries, code, offset, binder)
+            if message is not None:
+                line = _line(code, offset)
+                problems.append(Problem(path, line, binder, message))
+
+    # iter_codes doesn't go in any particular order
+    problems.sort(key=lambda problem: problem.line)
+    return count, problems
+
+
+def scan(paths):
+    """
+    Scans the source files at paths. Returns a tuple of the manifest
+    entries, the count of files, the count of binding sites, and a
+    list of Problem.
+    """
+
+    entries = {}
+    files = 0
+    sites = 0
+    problems = []
+
+    for path in source_files(paths):
+        found, trouble = scan_file(path, entries)
+        files += 1
+        sites += found
+        problems.extend(trouble)
+
+    return entries, files, sites, problems
+
+
+#
+# The end.
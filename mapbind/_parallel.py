@@ -0,0 +1,135 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+mapbind._parallel
+
+Runs funbind's calls on a concurrent.futures executor. The calls are
+all submitted at once, and the results are collected in binding
+order.
+
+Process pools can only run functions which can be pickled, which
+rules out lambdas and closures. A function can instead be given by
+name, as "package.module:function", and it'll be imported by name
+wherever it ends up being called.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from functools import partial
+from importlib import import_module
+from threading import Lock
+
+
+__all__ = ("parallel_calls", "resolve", "shared_executor", )
+
+
+# the executors used for the "threads" and "processes" shorthands,
+# created the first time they're asked for
+_shared = {}
+_shared_lock = Lock()
+
+
+def _create(kind):
+    if kind == "threads":
+        from concurrent.futures import ThreadPoolExecutor
+        return ThreadPoolExecutor()
+
+    elif kind == "processes":
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor()
+
+    else:
+        msg = "unknown executor %r, expected 'threads' or 'processes'" % kind
+        raise ValueError(msg)
+
+
+def shared_executor(kind):
+    """
+    The shared executor for the given kind, either "threads" or
+    "processes". concurrent.futures takes care of shutting these down
+    at exit.
+    """
+
+    executor = _shared.get(kind)
+    if executor is None:
+        with _shared_lock:
+            executor = _shared.get(kind)
+            if executor is None:
+                executor = _shared[kind] = _create(kind)
+    return executor
+
+
+def resolve(spec):
+    """
+    The function named by spec, which is of the form
+    "package.module:function". The function part may be a dotted path
+    to reach into a class or similar.
+    """
+
+    module_name, _sep, qualname = spec.partition(":")
+    if not (module_name and qualname):
+        msg = "expected 'module:function', got %r" % spec
+        raise ValueError(msg)
+
+    found = import_module(module_name)
+    for part in qualname.split("."):
+        found = getattr(found, part)
+    return found
+
+
+def _call_named(spec, name):
+    # runs wherever the executor puts us. Module-level and only
+    # closed over a string, so it pickles just fine.
+    return resolve(spec)(name)
+
+
+def parallel_calls(fun, names, executor):
+    """
+    Submits fun(name) for each of names to executor, and returns a
+    tuple of their results in the same order. If any of the calls
+    raised an exception, the first in that order is re-raised.
+
+    executor may be a concurrent.futures executor, or "threads" or
+    "processes" for the shared executors of those kinds. fun may be
+    a "module:function" string, which for a process pool is looked up
+    in the worker rather than pickled.
+    """
+
+    if isinstance(executor, str):
+        executor = shared_executor(executor)
+
+    if isinstance(fun, str):
+        if _in_process(executor):
+            fun = resolve(fun)
+        else:
+            fun = partial(_call_named, fun)
+
+    # submit them all before waiting on any of them
+    futures = [executor.submit(fun, name) for name in names]
+    return tuple(future.result() for future in futures)
+
+
+def _in_process(executor):
+    # whether the executor's calls happen in this process, where we
+    # may as well resolve a named function just the once
+    from concurrent.futures import ThreadPoolExecutor
+    return isinstance(executor, ThreadPoolExecutor)
+
+
+#
+# The end.
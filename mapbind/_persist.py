@@ -0,0 +1,296 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+mapbind._persist
+
+A binding-site store which outlives the interpreter, for the sake of
+programs which start fresh often and so would otherwise decode each
+of their binding sites again every time.
+
+Sites are keyed on a stable identity for their code object rather
+than on the object itself. That's the filename, qualified name, and
+first line number, a fingerprint of the bytecode and of the names it
+refers to, and the interpreter's bytecode magic number. If the source
+changes then so does the fingerprint, and the old entries go stale
+much like a .pyc would. Stale entries are dropped whenever the store
+is saved.
+
+The store is read the first time it's needed, and written out whole
+to a temporary file which then replaces the original, so a reader
+never sees a partial file. The file is a header, giving the format
+version and the interpreter's magic number, and then the entries as a
+marshal. A file without the header we'd write is never unmarshalled.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+import os
+
+from marshal import dumps, loads
+from os.path import abspath, dirname, exists
+from struct import pack
+from zlib import crc32
+
+
+try:
+    from importlib.util import MAGIC_NUMBER
+
+except ImportError:
+    # Python 2
+    from imp import get_magic
+    MAGIC_NUMBER = get_magic()
+
+
+try:
+    replace = os.replace
+
+except AttributeError:
+    # Python 2 has no os.replace, but rename will do the same job
+    # everywhere that isn't Windows
+    replace = os.rename
+
+
+__all__ = ("PersistentStore", "code_identity", "dump_entries",
+           "load_entries", )
+
+
+# bump this whenever the layout of the stored data changes
+FORMAT_VERSION = 3
+
+
+def _fingerprint(code):
+    # the bytecode alone isn't enough. Renaming the variables in an
+    # unpacking can leave co_code exactly as it was, with only the
+    # name tables changed.
+
+    crc = crc32(code.co_code)
+    for names in (code.co_names, code.co_varnames,
+                  code.co_cellvars, code.co_freevars):
+        crc = crc32("\0".join(names).encode("utf-8"), crc)
+    return crc & 0xffffffff
+
+
+def code_identity(code):
+    """
+    A tuple identifying code across interpreter runs, of
+    (filename, qualname, firstlineno, fingerprint, magic)
+    """
+
+    qualname = getattr(code, "co_qualname", code.co_name)
+    return (code.co_filename, qualname, code.co_firstlineno,
+            _fingerprint(code), MAGIC_NUMBER)
+
+
+def _header():
+    # what a store file starts with. The magic number is there since
+    # the marshal format can differ between interpreters, as well as
+    # the bytecode.
+    return b"mapbind\0" + pack("<I", FORMAT_VERSION) + MAGIC_NUMBER
+
+
+class PersistentStore(object):
+    """
+    The decoded bindings of binding sites, saved to and loaded from
+    the file at path.
+
+    Failed decodes are remembered too, as their error message. A site
+    such as rowbind's tries more than one way to decode, and the
+    failures would otherwise be paid for on every run.
+    """
+
+    def __init__(self, path):
+        # a path of None is a store that's only ever in memory, such
+        # as one that load_manifest seeds
+        self.path = None if path is None else abspath(path)
+
+        # (identity, offset, noname, lead) -> names, count, or the
+        # message of the ValueError. None until loaded.
+        self._entries = None
+
+        # the identities we've seen a code object with this run, by
+        # their (filename, qualname, firstlineno, magic), for weeding
+        # out stale entries when saving
+        self._current = {}
+
+        self._dirty = False
+
+
+    def resolve(self, code, offset, noname=False, lead=()):
+        """
+        decode_bindings, unless the result is already known
+        """
+
+        entries = self._entries
+        if entries is None:
+            entries = self._entries = self._load()
+
+        identity = code_identity(code)
+        key = (identity, offset, noname, lead)
+
+        found = entries.get(key)
+        if found is None:
+            # only now do we need the disassembler, which a store
+            # seeded from a manifest may never get to
+            from ._decode import decode_bindings
+
+            try:
+                found = decode_bindings(code, offset, noname, lead)
+            except ValueError as err:
+                found = str(err)
+
+            entries[key] = found
+            self._current[_place(identity)] = identity
+            self._dirty = True
+
+        if isinstance(found, str):
+            raise ValueError(found)
+        return found
+
+
+    def save(self):
+        """
+        Write out the store, if anything has been added to it, merged
+        with whatever another process might have saved in the
+        meantime. Errors writing are ignored, as the store is only
+        ever an optimization.
+        """
+
+        if not self._dirty or self.path is None:
+            return
+
+        entries = self._load()
+        entries.update(self._entries)
+        entries = self._fresh(entries)
+
+        try:
+            dump_entries(self.path, entries)
+        except (IOError, OSError):
+            pass
+        else:
+            self._dirty = False
+
+
+    def extend(self, path):
+        """
+        Adds the entries saved in the file at path, such as a manifest
+        written by python -m mapbind scan, to those of this store.
+        Returns the count of entries found there.
+        """
+
+        entries = self._entries
+        if entries is None:
+            entries = self._entries = self._load()
+
+        found = load_entries(path)
+        entries.update(found)
+        return len(found)
+
+
+    def _load(self):
+        return {} if self.path is None else load_entries(self.path)
+
+
+    def _fresh(self, entries):
+        # drop the entries for code which we've seen has changed since
+        # they were saved, or whose file is gone
+
+        current = self._current
+        gone = {}
+
+        kept = {}
+        for key, found in entries.items():
+            identity = key[0]
+            place = _place(identity)
+
+            if current.get(place, identity) != identity:
+                continue
+
+            filename = identity[0]
+            if filename not in gone:
+                gone[filename] = not (filename.startswith("<") or
+                                      exists(filename))
+            if not gone[filename]:
+                kept[key] = found
+
+        return kept
+
+
+def load_entries(path):
+    """
+    The entries saved in the file at path, as a dict. Empty if the
+    file is missing, unreadable, or not one of ours.
+    """
+
+    header = _header()
+
+    try:
+        with open(path, "rb") as found:
+            data = found.read()
+
+        if not data.startswith(header):
+            # written by something else entirely, or by another
+            # version or interpreter
+            return {}
+
+        # only a file with our header is unmarshalled, which is one
+        # that we wrote ourselves (to wherever the program pointed
+        # MAPBIND_PERSIST). And the entries are plain tuples, strings
+        # and ints, so we check that we got back a dict of them.
+        entries = loads(data[len(header):])  # nosec B302
+
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+        # missing, unreadable, or truncated. Start over.
+        return {}
+
+    if not isinstance(entries, dict):
+        return {}
+    return entries
+
+
+def dump_entries(path, entries):
+    """
+    Write entries to the file at path, by way of a temporary file
+    which then replaces it. Raises OSError on failure.
+    """
+
+    from tempfile import mkstemp
+
+    data = _header() + dumps(entries)
+
+    fd, temp = mkstemp(prefix=".mapbind-", dir=dirname(abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(data)
+        replace(temp, path)
+
+    except (IOError, OSError):
+        try:
+            os.unlink(temp)
+        except OSError:
+            pass
+        raise
+
+
+def _place(identity):
+    # where the code came from, without what it contains
+    filename, qualname, firstlineno, _fingerprint, magic = identity
+    return (filename, qualname, firstlineno, magic)
+
+
+#
+# The end.
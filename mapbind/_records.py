@@ -0,0 +1,269 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+mapbind._records
+
+Binding from fixed-layout binary records, for structbind and
+structbind_iter. A layout describes where each field of a record
+lives. For each binding site and layout we compile a single Struct
+which decodes only the fields being bound, skipping over everything
+else as padding, and decode straight out of the buffer with
+unpack_from so nothing is sliced or copied.
+
+A layout is either a mapping of field name to a (format, offset)
+pair, where format is a struct format for a single value, or a NumPy
+structured dtype.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from collections import namedtuple
+from functools import partial
+from operator import itemgetter
+from struct import Struct, calcsize
+
+from ._site import compile_getter
+
+
+try:
+    from itertools import imap
+
+except ImportError:
+    imap = map
+
+
+try:
+    xrange
+
+except NameError:
+    xrange = range
+
+
+__all__ = ("Plan", "iter_records", "layout_key", "record_plan", )
+
+
+Plan = namedtuple("Plan", ("struct", "reorder", "record_struct", "size"))
+
+
+_BYTE_ORDERS = "@=<>!"
+
+# numpy kind and itemsize to struct format
+_NUMPY_FORMATS = {
+    ("b", 1): "?",
+    ("i", 1): "b", ("i", 2): "h", ("i", 4): "i", ("i", 8): "q",
+    ("u", 1): "B", ("u", 2): "H", ("u", 4): "I", ("u", 8): "Q",
+    ("f", 2): "e", ("f", 4): "f", ("f", 8): "d",
+}
+
+
+def _numpy_fields(dtype):
+    # a NumPy structured dtype as {name: (format, offset)}, and its
+    # itemsize
+    fields = {}
+
+    for name, info in dtype.fields.items():
+        sub, offset = info[0], info[1]
+
+        if sub.kind in "SV":
+            fmt = "%is" % sub.itemsize
+        else:
+            fmt = _NUMPY_FORMATS.get((sub.kind, sub.itemsize))
+            if fmt is None:
+                msg = "unsupported field type %r for %r" % (sub.str, name)
+                raise TypeError(msg)
+            if sub.byteorder in "<>":
+                fmt = sub.byteorder + fmt
+
+        fields[name] = (fmt, offset)
+
+    return fields, dtype.itemsize
+
+
+def _split(fmt):
+    # separate a field format into its byte order and the rest
+    if fmt and fmt[0] in _BYTE_ORDERS:
+        return fmt[0], fmt[1:]
+    else:
+        return None, fmt
+
+
+# the integer codes whose size depends on the platform, by whether
+# they're signed, and the standard code for each size
+_SIGNED = {1: "b", 2: "h", 4: "i", 8: "q"}
+_UNSIGNED = {1: "B", 2: "H", 4: "I", 8: "Q"}
+_NATIVE_INTS = dict([(code, _SIGNED) for code in "bhilqn"] +
+                    [(code, _UNSIGNED) for code in "BHILQNP"])
+
+
+def _standard(fmt):
+    # the standard-size equivalent of a native field format. We decode
+    # with standard sizes (there's no alignment wanted, since offsets
+    # are explicit), so a native l, P and the like need swapping for
+    # the code that's the same size natively. P, n and N don't exist
+    # in standard sizes at all.
+
+    sizes = _NATIVE_INTS.get(fmt)
+    if sizes is None:
+        return fmt
+
+    code = sizes.get(calcsize("@" + fmt))
+    if code is None:
+        msg = "no standard equivalent for native field format %r" % fmt
+        raise ValueError(msg)
+    return code
+
+
+def layout_key(layout):
+    """
+    Something hashable that's equal for equal layouts, to key the
+    site plans on
+    """
+
+    if hasattr(layout, "items"):
+        return frozenset(layout.items())
+    else:
+        return layout
+
+
+def record_plan(names, layout):
+    """
+    Compile a Plan for decoding the named fields out of records with
+    the given layout
+    """
+
+    if hasattr(layout, "fields") and hasattr(layout, "itemsize"):
+        fields, size = _numpy_fields(layout)
+    else:
+        fields, size = layout, None
+
+    wanted = []
+    order = None
+
+    for index, name in enumerate(names):
+        fmt, offset = fields[name]
+        byte_order, fmt = _split(fmt)
+
+        if byte_order is not None:
+            if order is not None and order != byte_order:
+                msg = "fields with mixed byte orders, %r" % name
+                raise ValueError(msg)
+            order = byte_order
+
+        wanted.append((offset, index, fmt))
+
+    # offsets are explicit, so there's to be no native alignment
+    # padding sneaking in between them. Native sizes are kept by
+    # swapping in the standard codes of the same size.
+    native = order is None or order == "@"
+    if native:
+        order = "="
+        wanted = [(offset, index, _standard(fmt))
+                  for offset, index, fmt in wanted]
+
+    wanted.sort()
+
+    parts = [order]
+    position = 0
+    for offset, index, fmt in wanted:
+        if offset < position:
+            msg = "field %r overlaps the field before it" % names[index]
+            raise ValueError(msg)
+        if offset > position:
+            parts.append("%ix" % (offset - position))
+
+        single = Struct(order + fmt)
+        if len(single.unpack(b"\0" * single.size)) != 1:
+            msg = "field %r isn't a single value, %r" % (names[index], fmt)
+            raise ValueError(msg)
+
+        parts.append(fmt)
+        position = offset + single.size
+
+    struct = Struct("".join(parts))
+
+    # the record size for streaming, which is however much of the
+    # layout is known unless we've been told better
+    if size is None:
+        size = max(offset + calcsize(order + fmt)
+                   for fmt, offset in _field_formats(fields, native))
+    if size > position:
+        parts.append("%ix" % (size - position))
+    record_struct = Struct("".join(parts))
+
+    # the struct decodes in order of offset, which may not be the
+    # order of the bindings
+    by_offset = [index for _offset, index, _fmt in wanted]
+    if by_offset == list(range(len(names))):
+        reorder = None
+    else:
+        positions = [0] * len(names)
+        for position, index in enumerate(by_offset):
+            positions[index] = position
+        reorder = compile_getter(itemgetter, positions)
+
+    return Plan(struct, reorder, record_struct, size)
+
+
+def _field_formats(fields, native=False):
+    for fmt, offset in fields.values():
+        fmt = _split(fmt)[1]
+        yield (_standard(fmt) if native else fmt), offset
+
+
+def iter_records(plan, buf, offset=0, size=None):
+    """
+    An iterator of the decoded fields from each record in buf,
+    starting at offset and every size bytes after that. A trailing
+    partial record is ignored.
+    """
+
+    try:
+        view = memoryview(buf)
+    except TypeError:
+        # Python 2 mmap only has the old buffer interface, which
+        # unpack_from is still perfectly happy with
+        view = buf
+    else:
+        if view.itemsize != 1 and hasattr(view, "cast"):
+            # we count in bytes, whatever the buffer thinks it holds
+            view = view.cast("B")
+
+    size = size or plan.size
+
+    count = (len(view) - offset) // size
+    if count <= 0:
+        return iter(())
+
+    record_struct = plan.record_struct
+    if size == record_struct.size and hasattr(record_struct, "iter_unpack"):
+        # memoryview slices are views too, so this is still no copy
+        view = view[offset:offset + (count * size)]
+        found = record_struct.iter_unpack(view)
+    else:
+        end = offset + (count * size)
+        found = imap(partial(plan.struct.unpack_from, view),
+                     xrange(offset, end, size))
+
+    if plan.reorder is None:
+        return found
+    else:
+        return imap(plan.reorder, found)
+
+
+#
+# The end.
@@ -0,0 +1,515 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+mapbind._rewrite
+
+An import hook which rewrites binding sites at import time, so that
+
+  a, b, c = mapbind(data)
+
+is compiled as though it had been written
+
+  a, b, c = data["a"], data["b"], data["c"]
+
+and the same for objbind and funbind. Sites which can't be rewritten
+safely are left alone, and will use the runtime binding functions as
+usual. The rewritten code is cached in its own .pyc files alongside
+the normal ones.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+import __future__
+import ast
+import sys
+
+from functools import update_wrapper
+from importlib.machinery import PathFinder, SourceFileLoader
+from importlib.util import MAGIC_NUMBER, cache_from_source
+from marshal import dumps, loads
+from struct import pack
+from types import CodeType, FunctionType
+
+
+__all__ = ("BindingRewriter", "RewritingFinder", "RewritingLoader",
+           "rewrite_function", "rewrite_source", )
+
+
+# bump this whenever the rewrite rules change, so that stale cached
+# bytecode from an older set of rules won't be used
+REWRITE_VERSION = 3
+
+REWRITABLE = ("mapbind", "objbind", "funbind", )
+
+
+def _binder_aliases(tree):
+    # find the names which refer to our binding functions or to our
+    # module at the top level of the tree. Any of these names which
+    # get assigned to anywhere else are dropped, as we can't be sure
+    # what they'll refer to by the time the binding happens.
+
+    functions = {}
+    modules = set()
+
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom):
+            if node.module == "mapbind" and not node.level:
+                for alias in node.names:
+                    if alias.name in REWRITABLE:
+                        functions[alias.asname or alias.name] = alias.name
+
+        elif isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.name == "mapbind":
+                    modules.add(alias.asname or alias.name)
+
+    counts = _assignments(tree)
+
+    # each alias has been bound exactly once, by its import
+    functions = dict((name, binder) for name, binder in functions.items()
+                     if counts.get(name) == 1)
+    modules = set(name for name in modules if counts.get(name) == 1)
+
+    return functions, modules
+
+
+def _assignments(tree):
+    # how many times each name is bound anywhere in the tree, whether
+    # by assignment, as an argument, by an import, or by a def
+
+    counts = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and \
+           not isinstance(node.ctx, ast.Load):
+            name = node.id
+        elif isinstance(node, ast.arg):
+            name = node.arg
+        elif isinstance(node, ast.alias):
+            name = (node.asname or node.name).split(".")[0]
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef,
+                               ast.ClassDef)):
+            name = node.name
+        else:
+            continue
+        counts[name] = counts.get(name, 0) + 1
+
+    return counts
+
+
+def _shadows_getattr(counts, *namespaces):
+    # whether the name getattr may refer to something other than the
+    # builtin, in which case objbind with a default can't be rewritten
+    # as a call to it
+    return bool(counts.get("getattr")) or \
+        any("getattr" in names for names in namespaces)
+
+
+if sys.version_info < (3, 8):
+    # older parsers produce a node type per kind of constant
+    _SIMPLE = (ast.Name, ast.Constant, ast.Num, ast.Str, ast.Bytes,
+               ast.NameConstant, ast.Ellipsis)
+
+else:
+    _SIMPLE = (ast.Name, ast.Constant)
+
+
+def _simple(node):
+    # whether it's safe to evaluate this expression once per binding
+    # rather than once overall
+    return isinstance(node, _SIMPLE)
+
+
+def _private(name):
+    # names that the compiler will mangle inside of a class body. The
+    # runtime binders see the mangled name, so we can't rewrite these
+    # as string keys without knowing the class.
+    return name.startswith("__") and not name.endswith("__")
+
+
+class BindingRewriter(ast.NodeTransformer):
+    """
+    Transforms the simple unpack assignments from mapbind, objbind,
+    and funbind into the equivalent subscripts, attribute lookups,
+    and function calls. Assignments are only rewritten when the
+    binding function is known to be ours, the assignment targets are
+    all plain names, and the source and default expressions are plain
+    names or constants. objbind with a default is rewritten as a call
+    to getattr, and so is left alone if getattr is shadowed. funbind
+    is only rewritten when given a name, since it resolves a
+    "module:function" string itself.
+    """
+
+    def __init__(self, functions, modules, shadowed=False):
+        self.functions = functions
+        self.modules = modules
+        self.shadowed = shadowed
+        self.rewritten = 0
+
+
+    def _binder(self, func):
+        if isinstance(func, ast.Name):
+            return self.functions.get(func.id)
+
+        elif isinstance(func, ast.Attribute) and \
+                isinstance(func.value, ast.Name) and \
+                func.value.id in self.modules and \
+                func.attr in REWRITABLE:
+            return func.attr
+
+        return None
+
+
+    def visit_Assign(self, node):
+        self.generic_visit(node)
+
+        if len(node.targets) != 1:
+            return node
+
+        target = node.targets[0]
+        call = node.value
+
+        if not (isinstance(target, (ast.Tuple, ast.List)) and
+                isinstance(call, ast.Call)):
+            return node
+
+        if not all(isinstance(elt, ast.Name) and not _private(elt.id)
+                   for elt in target.elts):
+            return node
+
+        binder = self._binder(call.func)
+        if binder is None:
+            return node
+
+        args = list(call.args)
+        for keyword in call.keywords:
+            if keyword.arg == "default" and binder != "funbind":
+                args.append(keyword.value)
+            else:
+                return node
+
+        limit = 1 if binder == "funbind" else 2
+        if not (1 <= len(args) <= limit) or \
+           not all(_simple(arg) for arg in args) or \
+           any(isinstance(arg, ast.Starred) for arg in args):
+            return node
+
+        if binder == "objbind" and len(args) == 2 and self.shadowed:
+            return node
+
+        if binder == "funbind" and not isinstance(args[0], ast.Name):
+            # a constant, which can only be a "module:function" string
+            # for the runtime funbind to resolve
+            return node
+
+        names = [elt.id for elt in target.elts]
+        rewrite = getattr(self, "_rewrite_" + binder)
+        value = ast.Tuple(elts=[rewrite(name, *args) for name in names],
+                          ctx=ast.Load())
+
+        self.rewritten += 1
+
+        node.value = ast.copy_location(value, call)
+        return ast.fix_missing_locations(node)
+
+
+    @staticmethod
+    def _rewrite_mapbind(name, source, default=None):
+        key = ast.Constant(value=name)
+
+        if default is None:
+            return ast.Subscript(value=source, slice=_index(key),
+                                 ctx=ast.Load())
+        else:
+            get = ast.Attribute(value=source, attr="get", ctx=ast.Load())
+            return ast.Call(func=get, args=[key, default], keywords=[])
+
+
+    @staticmethod
+    def _rewrite_objbind(name, source, default=None):
+        if default is None:
+            return ast.Attribute(value=source, attr=name, ctx=ast.Load())
+        else:
+            func = ast.Name(id="getattr", ctx=ast.Load())
+            key = ast.Constant(value=name)
+            return ast.Call(func=func, args=[source, key, default],
+                            keywords=[])
+
+
+    @staticmethod
+    def _rewrite_funbind(name, fun):
+        return ast.Call(func=fun, args=[ast.Constant(value=name)],
+                        keywords=[])
+
+
+if sys.version_info < (3, 9):
+    def _index(node):
+        return ast.Index(value=node)
+
+else:
+    def _index(node):
+        return node
+
+
+def rewrite_source(source, filename="<unknown>"):
+    """
+    Parse source, rewrite its binding sites, and return the
+    resulting code object along with the count of rewritten sites.
+    """
+
+    tree = ast.parse(source, filename)
+    functions, modules = _binder_aliases(tree)
+    shadowed = _shadows_getattr(_assignments(tree))
+    rewriter = BindingRewriter(functions, modules, shadowed)
+    tree = rewriter.visit(tree)
+
+    code = compile(tree, filename, "exec", dont_inherit=True)
+    return code, rewriter.rewritten
+
+
+# the compiler flags for __future__ features, which a code object
+# carries in its co_flags and which a recompile needs to keep
+_FUTURE_FLAGS = 0
+for _feature in __future__.all_feature_names:
+    _FUTURE_FLAGS |= getattr(__future__, _feature).compiler_flag
+del _feature
+
+
+def _function_binders(tree, func):
+    # the names in tree which currently refer to our binding functions
+    # or to our module, going by func's globals and closure, and which
+    # are never rebound within the tree
+
+    package = sys.modules["mapbind"]
+    code = func.__code__
+    cells = dict(zip(code.co_freevars, func.__closure__ or ()))
+    counts = _assignments(tree)
+
+    functions = {}
+    modules = set()
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Name) or counts.get(node.id):
+            continue
+
+        name = node.id
+        if name in cells:
+            try:
+                value = cells[name].cell_contents
+            except ValueError:
+                # an empty cell
+                continue
+        elif name in func.__globals__:
+            value = func.__globals__[name]
+        else:
+            continue
+
+        if value is package:
+            modules.add(name)
+            continue
+
+        for binder in REWRITABLE:
+            if value is getattr(package, binder):
+                functions[name] = binder
+
+    return functions, modules
+
+
+def _identifiers(tree):
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            yield node.id
+        elif isinstance(node, ast.Attribute):
+            yield node.attr
+        elif isinstance(node, ast.arg):
+            yield node.arg
+
+
+def _find_code(code, name):
+    # the code object for the function we recompiled, somewhere among
+    # the constants of code
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            if const.co_name == name:
+                return const
+            found = _find_code(const, name)
+            if found is not None:
+                return found
+    return None
+
+
+def rewrite_function(func):
+    """
+    Returns a copy of func, recompiled from its source with its binding
+    sites rewritten just as install_rewriter would have done. The
+    binding functions are recognised by their current values in the
+    function's globals and closure, as with fastbind.
+
+    Returns func itself if its source can't be found, if there's
+    nothing to rewrite, or if it can't safely be compiled apart from
+    its surroundings (it refers to private names, which would need
+    mangling, or it uses a zero-argument super).
+    """
+
+    from inspect import getsource
+    from textwrap import dedent
+
+    code = func.__code__
+
+    try:
+        tree = ast.parse(dedent(getsource(func)), code.co_filename)
+    except (OSError, TypeError, SyntaxError):
+        return func
+
+    node = tree.body[0] if tree.body else None
+    if not (isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and
+            node.name == code.co_name):
+        # a lambda, or something else getsource found on that line
+        return func
+
+    if "__class__" in code.co_freevars or \
+       any(_private(name) for name in _identifiers(node)):
+        return func
+
+    functions, modules = _function_binders(node, func)
+    shadowed = _shadows_getattr(_assignments(node), func.__globals__,
+                                code.co_freevars)
+    rewriter = BindingRewriter(functions, modules, shadowed)
+    rewriter.visit(node)
+    if not rewriter.rewritten:
+        return func
+
+    # the decorators have already been applied, and we're only
+    # after the code anyway
+    node.decorator_list = []
+
+    if code.co_freevars:
+        # wrap it up in an outer function which defines the free
+        # variables, so that they're compiled as such. It's never run,
+        # we just want the inner code.
+        outer = ast.parse("def _outer():\n    %s = None\n" %
+                          " = ".join(code.co_freevars))
+        outer.body[0].body.append(node)
+        tree = outer
+
+    ast.increment_lineno(tree, code.co_firstlineno - 1)
+    module = compile(tree, code.co_filename, "exec",
+                     code.co_flags & _FUTURE_FLAGS, True)
+
+    found = _find_code(module, code.co_name)
+    if found is None:
+        return func
+
+    cells = dict(zip(code.co_freevars, func.__closure__ or ()))
+    closure = tuple(cells[name] for name in found.co_freevars)
+
+    rewritten = FunctionType(found, func.__globals__, func.__name__,
+                             func.__defaults__, closure or None)
+    rewritten.__kwdefaults__ = func.__kwdefaults__
+
+    return update_wrapper(rewritten, func)
+
+
+def _cache_tag():
+    # the optimization tag for our .pyc files. This keeps us out of
+    # the way of the normal cached bytecode, and vice versa.
+    tag = "mapbind%i" % REWRITE_VERSION
+    if sys.flags.optimize:
+        tag += "o%i" % sys.flags.optimize
+    return tag
+
+
+class RewritingLoader(SourceFileLoader):
+    """
+    A SourceFileLoader which rewrites binding sites as it compiles,
+    and which keeps its cached bytecode separate from the normal
+    cached bytecode.
+    """
+
+    def source_to_code(self, data, path, _optimize=-1):
+        return rewrite_source(data, path)[0]
+
+
+    def get_code(self, fullname):
+        source_path = self.get_filename(fullname)
+        cache_path = cache_from_source(source_path,
+                                       optimization=_cache_tag())
+
+        stats = self.path_stats(source_path)
+        mtime = int(stats["mtime"]) & 0xFFFFFFFF
+        size = int(stats.get("size", 0)) & 0xFFFFFFFF
+        header = MAGIC_NUMBER + pack("<III", 0, mtime, size)
+
+        try:
+            data = self.get_data(cache_path)
+        except OSError:
+            pass
+        else:
+            if data[:16] == header:
+                # the header matches the interpreter's magic and the
+                # source's mtime and size, so this is the bytecode we
+                # compiled from that source ourselves, kept in the same
+                # __pycache__ as the normal (equally trusted) .pyc files
+                return loads(data[16:])  # nosec B302
+
+        code = self.source_to_code(self.get_data(source_path), source_path)
+
+        if not sys.dont_write_bytecode:
+            try:
+                self.set_data(cache_path, header + dumps(code))
+            except NotImplementedError:
+                pass
+
+        return code
+
+
+class RewritingFinder(object):
+    """
+    A meta path finder which hands modules within any of the given
+    packages to a RewritingLoader, provided they would normally
+    have been loaded from source files.
+    """
+
+    def __init__(self, packages):
+        self.packages = tuple(packages)
+
+
+    def _wanted(self, fullname):
+        for package in self.packages:
+            if fullname == package or fullname.startswith(package + "."):
+                return True
+        return False
+
+
+    def find_spec(self, fullname, path=None, target=None):
+        if not self._wanted(fullname):
+            return None
+
+        spec = PathFinder.find_spec(fullname, path, target)
+        if spec is None or type(spec.loader) is not SourceFileLoader:
+            return spec
+
+        spec.loader = RewritingLoader(fullname, spec.origin)
+        return spec
+
+
+    def invalidate_caches(self):
+        pass
+
+
+#
+# The end.
@@ -0,0 +1,121 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+mapbind._rows
+
+Binding from DB-API cursors and their rows, for rowbind. The binding
+names are mapped to column positions once per binding site and
+distinct set of columns, and from then on rows are bound by a plain
+itemgetter of integer indexes.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from functools import partial
+from itertools import chain, repeat, starmap, takewhile
+from operator import itemgetter
+
+from ._site import compile_getter
+
+
+try:
+    from itertools import imap
+
+except ImportError:
+    imap = map
+
+
+__all__ = ("cursor_columns", "is_cursor", "row_columns", "row_getter",
+           "stream", )
+
+
+# how many rows to ask for at a time when streaming from a cursor
+BATCH_SIZE = 1000
+
+
+def is_cursor(obj):
+    """
+    Whether obj looks like a DB-API cursor
+    """
+
+    return hasattr(obj, "fetchmany") and hasattr(obj, "description")
+
+
+def cursor_columns(cursor):
+    """
+    The column names of a cursor's current result set, as a tuple
+    """
+
+    description = cursor.description
+    if description is None:
+        raise ValueError("cursor has no result set")
+    return tuple(column[0] for column in description)
+
+
+def row_columns(row):
+    """
+    The column names for a row which knows them (such as a
+    sqlite3.Row), as a tuple
+    """
+
+    keys = getattr(row, "keys", None)
+    if keys is None:
+        msg = "can't tell the columns of a %s row, use the cursor" % \
+              type(row).__name__
+        raise TypeError(msg)
+    return tuple(keys())
+
+
+def row_getter(site, columns):
+    """
+    An itemgetter of column positions which binds the site's names
+    from rows having the given columns. These are planned once per
+    distinct columns and kept in the site's plans.
+    """
+
+    plans = site.plans
+    getter = plans.get(columns)
+
+    if getter is None:
+        positions = dict((name, index) for index, name
+                         in reversed(list(enumerate(columns))))
+        # a KeyError for a name without a column is exactly right
+        indexes = tuple(positions[name] for name in site.names)
+        getter = plans[columns] = compile_getter(itemgetter, indexes)
+
+    return getter
+
+
+def stream(cursor, getter, size=None):
+    """
+    An iterator of the rows remaining in cursor, fetched in batches
+    of size and bound with getter
+    """
+
+    fetch = partial(cursor.fetchmany, size or BATCH_SIZE)
+
+    # an empty batch (be it a list or a tuple or whatever the driver
+    # likes) means we're done. Each batch gets mapped through the
+    # getter, and the batches chained end to end, all without a
+    # Python-level loop per row.
+    batches = takewhile(bool, starmap(fetch, repeat(())))
+    return chain.from_iterable(imap(partial(imap, getter), batches))
+
+
+#
+# The end.
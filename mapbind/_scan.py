@@ -0,0 +1,327 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+mapbind._scan
+
+Finds binding sites ahead of time. Walks modules, classes and
+functions for their code objects, and walks the bytecode of those for
+calls to the binding functions.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from opcode import HAVE_ARGUMENT, opmap, opname
+from pkgutil import iter_modules
+from sys import modules, version_info
+from types import CodeType, FunctionType, ModuleType
+
+from ._decode import deref_name, frame_offset, spans
+
+
+try:
+    from dis import stack_effect
+
+except ImportError:
+    # Python 2 has no stack_effect, so we'll have to settle for a
+    # guess about what's being called
+    stack_effect = None
+
+
+__all__ = ("BINDERS", "find_calls", "find_sites", "iter_codes", )
+
+
+# the names of the binding functions, and the arguments they need
+# decode_bindings to be called with. That is, whether they want their
+# bindings named (False) or only counted (True), and what instructions
+# lead from the call to the unpacking, by name as in _decode.LEADS
+# (and as the binders themselves give it, so that the keys of a
+# persistent store match).
+BINDERS = {
+    "mapbind": (False, ()),
+    "objbind": (False, ()),
+    "funbind": (False, ()),
+    "takebind": (True, ()),
+    "multibind": (False, ()),
+    "rowsbind": (False, "for"),
+    "objrowsbind": (False, "for"),
+    "colbind": (False, ()),
+    "objcolbind": (False, ()),
+    "abind": (False, "await"),
+    "aobjbind": (False, "await"),
+    "afunbind": (False, "await"),
+    "structbind": (False, ()),
+    "structbind_iter": (False, "for"),
+    "deepbind": (False, ()),
+    "objdeepbind": (False, ()),
+    "lazybind": (False, ()),
+    "lazymapbind": (False, ()),
+    "lazyobjbind": (False, ()),
+
+    # or a for loop, see mapbind._resolve_row_site
+    "rowbind": (False, ()),
+}
+
+
+def iter_codes(target, recursive=True):
+    """
+    Iterates over the code objects belonging to target, which may be
+    a module, a class, a function or method, or a code object.
+
+    For a module, only the functions and classes defined in that
+    module are considered, not those which it imported from
+    elsewhere. If recursive is True, then code objects nested inside
+    of other code objects (inner functions, lambdas, comprehensions,
+    class bodies) are included, and for a package all of its
+    submodules are imported and included as well. Submodules which
+    fail to import are skipped.
+    """
+
+    seen = set()
+    pending = [target]
+
+    while pending:
+        obj = pending.pop()
+
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+
+        if isinstance(obj, CodeType):
+            yield obj
+            if recursive:
+                pending.extend(const for const in obj.co_consts
+                               if isinstance(const, CodeType))
+
+        elif isinstance(obj, FunctionType):
+            pending.append(obj.__code__)
+            wrapped = getattr(obj, "__wrapped__", None)
+            if wrapped is not None:
+                pending.append(wrapped)
+
+        elif isinstance(obj, ModuleType):
+            name = obj.__name__
+            pending.extend(_members(vars(obj), name))
+
+            path = getattr(obj, "__path__", None)
+            if recursive and path is not None:
+                pending.extend(_submodules(name, path))
+
+        elif isinstance(obj, type):
+            pending.extend(_members(vars(obj), obj.__module__))
+
+        elif isinstance(obj, property):
+            pending.extend(filter(None, (obj.fget, obj.fset, obj.fdel)))
+
+        else:
+            # bound methods, staticmethod, classmethod
+            func = getattr(obj, "__func__", None)
+            if func is not None:
+                pending.append(func)
+
+
+def _members(namespace, module_name):
+    # the members of a module or class namespace which were defined
+    # in module_name, rather than imported into it
+    for value in list(namespace.values()):
+        if isinstance(value, (FunctionType, type)):
+            if getattr(value, "__module__", None) == module_name:
+                yield value
+        elif isinstance(value, (staticmethod, classmethod, property)):
+            yield value
+
+
+def _submodules(name, path):
+    for _finder, subname, _ispkg in iter_modules(path, name + "."):
+        try:
+            __import__(subname)
+        except (ImportError, SyntaxError):
+            # optional parts of a package which can't be used in this
+            # environment won't have anything for us to bind anyway
+            continue
+        yield modules[subname]
+
+
+# the instructions which call a function, and a function which says
+# how many items on the stack sit above the function being called
+CALLS = {}
+
+if version_info >= (3, 13):
+    # callable, self-or-NULL, args, and for CALL_KW a tuple of names
+    CALLS[opmap["CALL"]] = lambda arg: arg + 1
+    CALLS[opmap["CALL_KW"]] = lambda arg: arg + 2
+
+elif version_info >= (3, 11):
+    # NULL-or-callable, callable-or-self, args. Keyword names were
+    # set aside by a KW_NAMES op beforehand.
+    CALLS[opmap["CALL"]] = lambda arg: arg
+
+elif version_info >= (3, 6):
+    CALLS[opmap["CALL_FUNCTION"]] = lambda arg: arg
+    CALLS[opmap["CALL_FUNCTION_KW"]] = lambda arg: arg + 1
+    if "CALL_METHOD" in opmap:
+        CALLS[opmap["CALL_METHOD"]] = lambda arg: arg
+
+else:
+    # positional count in the low byte, and keyword pairs in the next
+    CALLS[opmap["CALL_FUNCTION"]] = \
+        lambda arg: (arg & 0xff) + 2 * ((arg >> 8) & 0xff)
+
+
+# instructions that sit between loading a function and calling it,
+# without being anything to do with its arguments
+_IGNORE = set(opmap[name] for name in ("PRECALL", "KW_NAMES", "NOP")
+              if name in opmap)
+
+
+LOAD_GLOBAL = opmap["LOAD_GLOBAL"]
+LOAD_NAME = opmap["LOAD_NAME"]
+LOAD_ATTR = opmap["LOAD_ATTR"]
+LOAD_METHOD = opmap.get("LOAD_METHOD", -1)
+LOAD_FAST = opmap["LOAD_FAST"]
+LOAD_DEREF = opmap["LOAD_DEREF"]
+
+# as of 3.11 LOAD_GLOBAL, and as of 3.12 LOAD_ATTR, use their lowest
+# bit of argument to indicate whether they also push a NULL or self
+NULL_GLOBAL = version_info >= (3, 11)
+NULL_ATTR = version_info >= (3, 12)
+
+
+def _pushes(op, arg, effect):
+    # how many items an instruction pushes onto the stack, which for
+    # our purposes only needs to be accurate for the loads.
+
+    if op == LOAD_GLOBAL:
+        return 1 + (arg & 1) if NULL_GLOBAL else 1
+    elif op == LOAD_ATTR:
+        return 1 + (arg & 1) if NULL_ATTR else 1
+    elif op == LOAD_METHOD:
+        return 2
+    else:
+        return max(effect, 0)
+
+
+def _loaded_name(code, op, arg):
+    # the name of the variable or attribute being loaded, or None if
+    # this instruction isn't that kind of load
+
+    if op == LOAD_GLOBAL:
+        return code.co_names[arg >> 1 if NULL_GLOBAL else arg]
+    elif op == LOAD_ATTR:
+        return code.co_names[arg >> 1 if NULL_ATTR else arg]
+    elif op == LOAD_NAME or op == LOAD_METHOD:
+        return code.co_names[arg]
+    elif op == LOAD_FAST:
+        return code.co_varnames[arg]
+    elif op == LOAD_DEREF:
+        return deref_name(code, arg)
+    else:
+        return None
+
+
+def _find_callable(code, instrs, index, binders):
+    # walk backwards from the call at instrs[index] to the
+    # instruction which loaded the function being called. Returns
+    # that instruction's position in instrs, or None if we can't tell.
+
+    _begin, _offset, op, arg, _end = instrs[index]
+    needed = CALLS[op](arg)
+
+    for index in range(index - 1, -1, -1):
+        _begin, _offset, op, arg, _end = instrs[index]
+        if op in _IGNORE:
+            continue
+
+        try:
+            effect = stack_effect(op, arg if op >= HAVE_ARGUMENT else None)
+        except ValueError:
+            return None
+
+        if needed < _pushes(op, arg, effect):
+            return index
+
+        needed -= effect
+        if needed < 0:
+            # we've lost track, probably due to a jump within the
+            # arguments
+            return None
+
+    return None
+
+
+def _guess_callable(code, instrs, index, binders):
+    # without stack_effect, settle for the nearest load of one of
+    # the binder names
+    for index in range(index - 1, -1, -1):
+        _begin, _offset, op, arg, _end = instrs[index]
+        if _loaded_name(code, op, arg) in binders:
+            return index
+    return None
+
+
+def find_calls(code, binders=BINDERS):
+    """
+    Iterates over the calls in code to any function named in binders.
+    Yields (instrs, call, loader, name) tuples, where instrs is the
+    list of all the instructions in code as given by
+    mapbind._decode.spans, call is the index in instrs of the calling
+    instruction, loader is the index of the instruction which loaded
+    the function being called, and name is the name it was loaded by.
+
+    This is a matter of bytecode rather than of runtime values, so
+    only the name of the function being called is known. Whether the
+    call is in fact followed by an unpack binding is left for the
+    caller to check.
+    """
+
+    if not (set(binders).intersection(code.co_names) or
+            set(binders).intersection(code.co_varnames) or
+            set(binders).intersection(code.co_freevars)):
+        # doesn't even mention any of them. Don't bother.
+        return
+
+    locate = _find_callable if stack_effect else _guess_callable
+    instrs = list(spans(code))
+
+    for index, (_begin, _offset, op, _arg, _end) in enumerate(instrs):
+        if op not in CALLS:
+            continue
+
+        found = locate(code, instrs, index, binders)
+        if found is None:
+            continue
+
+        _begin, _offset, op, arg, _end = instrs[found]
+        name = _loaded_name(code, op, arg)
+        if name in binders:
+            yield instrs, index, found, name
+
+
+def find_sites(code, binders=BINDERS):
+    """
+    Iterates over the calls in code to any function named in binders,
+    yielding (offset, name) tuples where offset is the f_lasti a
+    binder would see from its calling frame.
+    """
+
+    for instrs, call, _loader, name in find_calls(code, binders):
+        _begin, offset, op, _arg, _end = instrs[call]
+        yield frame_offset(offset, op), name
+
+
+#
+# The end.
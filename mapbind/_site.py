@@ -0,0 +1,96 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+mapbind._site
+
+The entries stored in the binding-site cache. Along with the names
+of the bindings, each entry carries accessors compiled for those
+names, so that binding on a warm site is a single call into C which
+produces a ready tuple.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from collections import namedtuple
+from operator import attrgetter, itemgetter
+
+
+__all__ = ("Site", "binding_site", "compile_getter", "counting_site", )
+
+
+Site = namedtuple("Site", ("count", "names", "getitems", "getattrs",
+                           "plans"))
+
+
+def _tupled(getter):
+    # itemgetter and attrgetter give back a bare value rather than a
+    # tuple when there's only the one name, so that case needs a
+    # wrapper to remain unpackable.
+    def get_one(obj):
+        return (getter(obj), )
+    return get_one
+
+
+def _nothing(_obj):
+    return ()
+
+
+def compile_getter(factory, keys):
+    """
+    factory(*keys), such as an itemgetter or attrgetter, except that
+    the result always returns a tuple, even for one key or none.
+    """
+
+    count = len(keys)
+    if count > 1:
+        return factory(*keys)
+    elif count == 1:
+        return _tupled(factory(keys[0]))
+    else:
+        return _nothing
+
+
+def binding_site(names):
+    """
+    A Site for an unpack binding to the given tuple of names, with
+    an itemgetter and an attrgetter for those names.
+
+    The plans dict is for binders which need to work out something
+    more per site, depending on what they're binding from (such as
+    rowbind, which maps the names to column positions once per
+    distinct cursor description).
+    """
+
+    return Site(len(names), names,
+                compile_getter(itemgetter, names),
+                compile_getter(attrgetter, names),
+                {})
+
+
+def counting_site(count):
+    """
+    A Site which only knows how many bindings it has, and not their
+    names. This is what takebind uses, since it permits nested
+    unpacking where there would be no single name for a binding.
+    """
+
+    return Site(count, None, None, None, None)
+
+
+#
+# The end.
@@ -0,0 +1,405 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+mapbind._specialize
+
+Produces a copy of a function with its binding sites resolved ahead
+of time. The load of the binding function at each site is replaced
+in the bytecode with a load of a constant accessor already compiled
+for that site's names, so that
+
+  a, b, c = mapbind(data)
+
+calls an itemgetter("a", "b", "c") directly (give or take a check
+for the bulk-fetch protocol), with no frame inspection and no cache
+lookup.
+
+The replacement is done in place and is never longer than the
+original load, so no other offsets, jumps, line numbers, or exception
+table entries need to change.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from functools import partial, update_wrapper
+from opcode import opmap
+from sys import builtin_module_names, version_info
+from types import CodeType, FunctionType
+
+from . import (
+    funbind, mapbind, objbind, takebind, rowsbind, objrowsbind,
+    colbind, objcolbind, multibind, deepbind, objdeepbind, raise_error,
+    _attr_column, _bind_many, _deep_plan, _item_column, _get_defaulted,
+    _getattr_defaulted, _multi, _multi_default, _take, )
+from ._bulk import getmany_for
+from ._columns import columns
+from ._decode import decode_bindings, frame_offset
+from ._scan import BINDERS, find_calls
+from ._site import binding_site
+
+
+__all__ = ("specialize", "specialize_code", )
+
+
+# code.replace arrived in 3.8, and everything since then is wordcode.
+# The bytecode changes from one version to the next, so we stop at the
+# last version whose bytecode we've checked the patching against.
+SUPPORTED = (3, 8) <= version_info[:2] <= (3, 13)
+
+# PyPy's bytecode is its own, so rather than patch it we recompile the
+# function from source with its binding sites rewritten. That leaves
+# its JIT nothing but plain subscripts and attribute loads to trace,
+# rather than a frame to materialize on every binding.
+PYPY = "__pypy__" in builtin_module_names
+
+
+KINDS = {
+    mapbind: "mapbind",
+    objbind: "objbind",
+    funbind: "funbind",
+    takebind: "takebind",
+    rowsbind: "rowsbind",
+    objrowsbind: "objrowsbind",
+    colbind: "colbind",
+    objcolbind: "objcolbind",
+    multibind: "multibind",
+    deepbind: "deepbind",
+    objdeepbind: "objdeepbind",
+}
+
+
+EXTENDED_ARG = opmap["EXTENDED_ARG"]
+LOAD_CONST = opmap["LOAD_CONST"]
+LOAD_DEREF = opmap["LOAD_DEREF"]
+LOAD_GLOBAL = opmap["LOAD_GLOBAL"]
+NOP = opmap["NOP"]
+PUSH_NULL = opmap.get("PUSH_NULL", -1)
+
+# the calls which have no keyword arguments, provided they aren't
+# preceded by a KW_NAMES
+PLAIN_CALLS = set(opmap[name] for name in
+                  ("CALL", "CALL_FUNCTION", "CALL_METHOD")
+                  if name in opmap)
+
+KW_NAMES = opmap.get("KW_NAMES", -1)
+PRECALL = opmap.get("PRECALL", -1)
+
+
+def _bound_mapbind(site, source_map, default=raise_error):
+    if type(source_map) is not dict:
+        getmany = getmany_for(type(source_map))
+        if getmany is not None:
+            return _bind_many(getmany, source_map, site.names, default)
+
+    if default is raise_error:
+        return site.getitems(source_map)
+    else:
+        return _get_defaulted(site.names, default, source_map)
+
+
+def _getitems(site):
+    # the simple mapbind case. Just the itemgetter, unless there's
+    # a bulk fetch to be had.
+    getitems = site.getitems
+    names = site.names
+
+    def bound_getitems(source_map):
+        if type(source_map) is not dict:
+            getmany = getmany_for(type(source_map))
+            if getmany is not None:
+                return _bind_many(getmany, source_map, names)
+        return getitems(source_map)
+
+    return bound_getitems
+
+
+def _bound_objbind(site, source_obj, default=raise_error):
+    if default is raise_error:
+        return site.getattrs(source_obj)
+    else:
+        return _getattr_defaulted(site.names, default, source_obj)
+
+
+def _bound_funbind(names, fun, executor=None):
+    if executor is not None:
+        from ._parallel import parallel_calls
+        return parallel_calls(fun, names, executor)
+
+    if isinstance(fun, str):
+        from ._parallel import resolve
+        fun = resolve(fun)
+
+    return map(fun, names)
+
+
+def _bound_takebind(count, sequence, default=raise_error, width=None):
+    return _take(sequence, count, default, width)
+
+
+def _bound_rowsbind(site, rows, default=raise_error):
+    if default is raise_error:
+        return map(site.getitems, rows)
+    else:
+        return map(partial(_get_defaulted, site.names, default), rows)
+
+
+def _bound_objrowsbind(site, rows, default=raise_error):
+    if default is raise_error:
+        return map(site.getattrs, rows)
+    else:
+        return map(partial(_getattr_defaulted, site.names, default), rows)
+
+
+def _bound_colbind(names, records, default=raise_error,
+                   typecodes=None, numpy=False):
+    return columns(records, names, partial(_item_column, default),
+                   typecodes, numpy)
+
+
+def _bound_objcolbind(names, records, default=raise_error,
+                      typecodes=None, numpy=False):
+    return columns(records, names, partial(_attr_column, default),
+                   typecodes, numpy)
+
+
+def _bound_multibind(names, *sources, **kwds):
+    return _multi(names, sources, _multi_default(kwds))
+
+
+def _bound_deepbind(site, source_map, default=raise_error, sep="__"):
+    plan = _deep_plan(site, sep, False)
+    if default is raise_error:
+        return plan.strict(source_map)
+    else:
+        return plan.defaulted(source_map, default)
+
+
+def _bound_objdeepbind(site, source_obj, default=raise_error, sep="__"):
+    plan = _deep_plan(site, sep, True)
+    if default is raise_error:
+        return plan.strict(source_obj)
+    else:
+        return plan.defaulted(source_obj, default)
+
+
+def _accessor(kind, found, simple):
+    # the callable to stand in for the binder at a site
+
+    if kind == "takebind":
+        return partial(_bound_takebind, found)
+
+    elif kind == "funbind":
+        return partial(_bound_funbind, found)
+
+    elif kind == "colbind":
+        return partial(_bound_colbind, found)
+
+    elif kind == "objcolbind":
+        return partial(_bound_objcolbind, found)
+
+    elif kind == "multibind":
+        return partial(_bound_multibind, found)
+
+    site = binding_site(found)
+
+    if kind == "mapbind":
+        return _getitems(site) if simple else partial(_bound_mapbind, site)
+    elif kind == "objbind":
+        return site.getattrs if simple else partial(_bound_objbind, site)
+    elif kind == "rowsbind":
+        return partial(_bound_rowsbind, site)
+    elif kind == "deepbind":
+        return partial(_bound_deepbind, site)
+    elif kind == "objdeepbind":
+        return partial(_bound_objdeepbind, site)
+    else:
+        return partial(_bound_objrowsbind, site)
+
+
+def _simple_call(instrs, call):
+    # whether the call at instrs[call] passes exactly one positional
+    # argument and nothing else
+
+    _begin, _offset, op, arg, _end = instrs[call]
+    if op not in PLAIN_CALLS or arg != 1:
+        return False
+
+    for index in range(call - 1, -1, -1):
+        op = instrs[index][2]
+        if op == KW_NAMES:
+            return False
+        elif op != PRECALL:
+            break
+
+    return True
+
+
+def _loaded_value(code, instr, name, glbls, closure):
+    # the current value of whatever the instruction is loading by
+    # name, if we can know it. Returns raise_error otherwise.
+
+    op = instr[2]
+
+    if op == LOAD_GLOBAL:
+        return glbls.get(name, raise_error)
+
+    elif op == LOAD_DEREF and closure and name in code.co_freevars:
+        # only the free variables, which we can find in the closure.
+        # Cell variables belong to the function itself, and won't
+        # have been assigned yet.
+        return _cell_contents(closure[code.co_freevars.index(name)])
+
+    return raise_error
+
+
+def _cell_contents(cell):
+    try:
+        return cell.cell_contents
+    except ValueError:
+        # an empty cell
+        return raise_error
+
+
+def _binder_kind(value):
+    # the name of the binder that value is, or None. Careful, as
+    # value could be anything, including something unhashable.
+    try:
+        return KINDS.get(value)
+    except TypeError:
+        return None
+
+
+def _load(index, null):
+    # bytecode to load constant index, as well as a NULL in the same
+    # position that LOAD_GLOBAL would have put one
+
+    load = []
+    for shift in (24, 16, 8):
+        if index >> shift:
+            load.extend((EXTENDED_ARG, (index >> shift) & 0xff))
+    load.extend((LOAD_CONST, index & 0xff))
+
+    if not null:
+        return load
+    elif version_info >= (3, 13):
+        return load + [PUSH_NULL, 0]
+    else:
+        return [PUSH_NULL, 0] + load
+
+
+def specialize_code(code, glbls, closure=None):
+    """
+    Returns a copy of code with the loads of binding functions at
+    binding sites replaced with loads of constant accessors. Sites
+    are only replaced where the binding function is a global in
+    glbls, or a free variable in closure, and is one of ours.
+    Nested code objects are also specialized, though without a
+    closure.
+
+    Returns code itself if there was nothing that could be replaced.
+    """
+
+    consts = list(code.co_consts)
+    bytecode = bytearray(code.co_code)
+    changed = False
+
+    for index, const in enumerate(consts):
+        if isinstance(const, CodeType):
+            nested = specialize_code(const, glbls)
+            if nested is not const:
+                consts[index] = nested
+                changed = True
+
+    # whatever names our binders might be known by here, aliases
+    # included
+    binders = set(name for name in code.co_names
+                  if _binder_kind(glbls.get(name)))
+    if closure:
+        binders.update(name for name, cell in zip(code.co_freevars, closure)
+                       if _binder_kind(_cell_contents(cell)))
+
+    for instrs, call, loader, name in find_calls(code, binders):
+        instr = instrs[loader]
+        kind = _binder_kind(_loaded_value(code, instr, name, glbls, closure))
+        if kind is None:
+            continue
+
+        _begin, offset, op, _arg, _end = instrs[call]
+        try:
+            found = decode_bindings(code, frame_offset(offset, op),
+                                    *BINDERS[kind])
+        except ValueError:
+            # it's going to fail at runtime, so let it do so in the
+            # usual manner
+            continue
+
+        begin, _offset, op, arg, end = instr
+        null = op == LOAD_GLOBAL and PUSH_NULL >= 0 and arg & 1
+
+        replacement = _load(len(consts), null)
+        if len(replacement) > (end - begin):
+            continue
+
+        consts.append(_accessor(kind, found, _simple_call(instrs, call)))
+
+        # pad out the rest of the original load and its caches
+        replacement.extend([NOP, 0] * ((end - begin - len(replacement)) // 2))
+        bytecode[begin:end] = bytes(replacement)
+        changed = True
+
+    if changed:
+        return code.replace(co_code=bytes(bytecode), co_consts=tuple(consts))
+    else:
+        return code
+
+
+def specialize(func):
+    """
+    Returns a copy of func with its binding sites specialized, or func
+    itself if there was nothing to specialize or this version of
+    Python isn't supported.
+
+    On PyPy, the function is instead recompiled from its source by
+    mapbind._rewrite.rewrite_function.
+    """
+
+    if not isinstance(func, FunctionType):
+        return func
+
+    elif PYPY:
+        if version_info < (3, 7):
+            return func
+        from ._rewrite import rewrite_function
+        return rewrite_function(func)
+
+    elif not SUPPORTED:
+        return func
+
+    code = specialize_code(func.__code__, func.__globals__, func.__closure__)
+    if code is func.__code__:
+        return func
+
+    special = FunctionType(code, func.__globals__, func.__name__,
+                           func.__defaults__, func.__closure__)
+    special.__kwdefaults__ = func.__kwdefaults__
+
+    return update_wrapper(special, func)
+
+
+#
+# The end.
@@ -0,0 +1,147 @@
+# This library is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, see
+# <http://www.gnu.org/licenses/>.
+
+
+"""
+mapbind._stats
+
+Per binding site statistics. While anything is recording, the
+function that the binders use to find their binding site is swapped
+for one which also times the lookup, notes whether it was a hit or a
+miss in the binding-site cache, and hands that off to each of the
+active Recorders. When nothing is recording the plain function is
+swapped back in, so the binders pay nothing at all.
+
+author: Christopher O'Brien  <obriencj@gmail.com>
+license: LGPL v.3
+"""
+
+
+from collections import namedtuple
+from sys import _getframe
+from timeit import default_timer
+from weakref import ref
+
+
+__all__ = ("Recorder", "SiteStats", "instrument", )
+
+
+SiteStats = namedtuple("SiteStats", ("kind", "calls", "hits", "misses",
+                                     "seconds"))
+
+
+def instrument(find_site, recorders, cache):
+    """
+    Wraps find_site, which is called with the caller's frame as its
+    first argument and returns a Site from cache, so that each call is
+    recorded by all of the recorders
+    """
+
+    def instrumented(caller, *args):
+        misses = cache.misses
+
+        start = default_timer()
+        site = find_site(caller, *args)
+        elapsed = default_timer() - start
+
+        # the binder that's asking, by the name of its function
+        kind = _getframe(1).f_code.co_name
+        hit = cache.misses == misses
+
+        for recorder in recorders:
+            recorder.record(caller, kind, hit, elapsed)
+
+        return site
+
+    return instrumented
+
+
+class Recorder(object):
+    """
+    Collects statistics for each binding site while active. As a
+    context manager it's active within its with block.
+    """
+
+    def __init__(self, start, stop):
+        self._start = start
+        self._stop = stop
+
+        # (basic ref to code, offset) -> [location, kind, calls, hits,
+        # misses, seconds]. The weak reference keeps us from pinning
+        # exec'd code in memory just because we were watching it.
+        self._sites = {}
+
+
+    def __enter__(self):
+        self._start(self)
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop(self)
+
+
+    def record(self, caller, kind, hit, elapsed):
+        key = (ref(caller.f_code), caller.f_lasti)
+
+        entry = self._sites.get(key)
+        if entry is None:
+            # the line number is only worked out the once
+            code = caller.f_code
+            location = "%s:%i" % (code.co_filename, caller.f_lineno)
+            entry = self._sites[key] = [location, kind, 0, 0, 0, 0.0]
+
+        entry[2] += 1
+        if hit:
+            entry[3] += 1
+        else:
+            entry[4] += 1
+        entry[5] += elapsed
+
+
+    def stats(self):
+        """
+        A dict mapping "filename:line" to a SiteStats of (kind, calls,
+        hits, misses, seconds) for each binding site recorded. Where
+        more than one site is on the same line, their numbers are
+        added together.
+        """
+
+        found = {}
+        for location, kind, calls, hits, misses, seconds in \
+                list(self._sites.values()):
+
+            prior = found.get(location)
+            if prior is not None:
+                calls += prior.calls
+                hits += prior.hits
+                misses += prior.misses
+                seconds += prior.seconds
+                kind = prior.kind
+
+            found[location] = SiteStats(kind, calls, hits, misses, seconds)
+
+        return found
+
+
+    def clear(self):
+        """
+        Forget everything recorded so far
+        """
+
+        self._sites.clear()
+
+
+#
+# The end.
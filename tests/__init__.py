@@ -13,8 +13,29 @@
 # <http://www.gnu.org/licenses/>.
 
 
-from mapbind import mapbind, objbind, funbind, takebind
-from unittest import TestCase
+import mapbind as mapbind_module
+
+import sys
+
+from array import array
+from gc import collect
+from mapbind import (
+    mapbind, objbind, funbind, takebind, rowsbind, objrowsbind,
+    colbind, objcolbind, register_getmany, rowbind,
+    structbind, structbind_iter, multibind, deepbind, objdeepbind,
+    lazybind, lazymapbind, lazyobjbind, force,
+    cache_clear, cache_info, cache_persist, cache_resize, load_manifest,
+    precompile,
+    collecting, stats, stats_clear, stats_disable, stats_enable,
+    install_rewriter, uninstall_rewriter, fastbind, )
+from os import listdir, makedirs, unlink
+from os.path import join
+from shutil import rmtree
+from struct import calcsize, pack
+from tempfile import mkdtemp
+from time import time
+from types import FunctionType, ModuleType
+from unittest import TestCase, skipIf
 
 
 class TestMapBind(TestCase):
@@ -49,6 +70,16 @@ class TestMapBind(TestCase):
         self.assertEqual(beer, 700)
 
 
+    def test_single(self):
+        data = {"a": 100, "b": 200}
+
+        a, = mapbind(data)
+        self.assertEqual(a, 100)
+
+        [b] = mapbind(data, None)
+        self.assertEqual(b, 200)
+
+
 class TestObjBind(TestCase):
 
     @staticmethod
@@ -94,6 +125,57 @@ class TestObjBind(TestCase):
         self.assertEqual(beer, 700)
 
 
+    def test_single(self):
+        data = self._get_data()
+
+        a, = objbind(data)
+        self.assertEqual(a, 100)
+
+        [b] = objbind(data, None)
+        self.assertEqual(b, 200)
+
+
+    def test_types(self):
+        from collections import namedtuple
+
+        Tupled = namedtuple("Tupled", ("a", "b", "c"))
+
+        class Slotted(object):
+            __slots__ = ("a", "b", "c")
+
+        slotted = Slotted()
+        slotted.a, slotted.b = 1, 2
+
+        def bind(obj):
+            c, a = objbind(obj, None)
+            return a, c
+
+        for obj in (Tupled(1, 2, 3), slotted, self._get_data()):
+            a, b = objbind(obj)
+            self.assertEqual((a, b), (obj.a, obj.b))
+
+        self.assertEqual(bind(Tupled(1, 2, 3)), (1, 3))
+        self.assertEqual(bind(slotted), (1, None))
+
+
+    def test_mutated(self):
+        # changing a class between binds from the same site is
+        # noticed, as there's no per-class plan to go stale
+        class Slotted(object):
+            __slots__ = ("a", "b")
+
+        obj = Slotted()
+        obj.a, obj.b = 1, 2
+
+        def bind():
+            a, b = objbind(obj)
+            return a, b
+
+        self.assertEqual(bind(), (1, 2))
+        Slotted.b = property(lambda self: "changed")
+        self.assertEqual(bind(), (1, "changed"))
+
+
 class TestFunBind(TestCase):
 
     def test_binding(self):
@@ -170,6 +252,76 @@ class TestFunBind(TestCase):
             self.assertTrue(False)
 
 
+def _shout(name):
+    # module-level so that a process pool can find it by name
+    return "%s!" % name.upper()
+
+
+def _picky(name):
+    if name.startswith("bad"):
+        raise ValueError(name)
+    return name
+
+
+@skipIf(sys.version_info < (3, 2), "requires concurrent.futures")
+class TestFunBindExecutor(TestCase):
+
+    def test_threads(self):
+        from threading import Barrier
+
+        # every call has to be waiting at once for any of them to get
+        # past, so this only binds if they run concurrently
+        barrier = Barrier(4, timeout=10)
+
+        def together(name):
+            barrier.wait()
+            return "|%s|" % name
+
+        a, b, c, d = funbind(together, "threads")
+        self.assertEqual((a, b, c, d), ("|a|", "|b|", "|c|", "|d|"))
+
+
+    def test_executor(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(2) as pool:
+            a, b, c = funbind(str.upper, executor=pool)
+            self.assertEqual((a, b, c), ("A", "B", "C"))
+
+            x, y = funbind("tests:_shout", executor=pool)
+            self.assertEqual((x, y), ("X!", "Y!"))
+
+
+    def test_raises(self):
+        try:
+            a, bad_one, bad_two = funbind(_picky, "threads")
+        except ValueError as err:
+            # the first failure in binding order
+            self.assertEqual(str(err), "bad_one")
+        else:
+            self.fail("should have raised")
+
+
+    def test_processes(self):
+        a, b = funbind("tests:_shout", "processes")
+        self.assertEqual((a, b), ("A!", "B!"))
+
+
+    def test_named(self):
+        a, b = funbind("tests:_shout")
+        self.assertEqual((a, b), ("A!", "B!"))
+
+        def oops():
+            a, b = funbind("_shout")
+
+        self.assertRaises(ValueError, oops)
+
+        def nope():
+            a, b = funbind(str.upper, "spaceships")
+
+        self.assertRaises(ValueError, nope)
+
+
 class TestTakeBind(TestCase):
 
     def test_binding(self):
@@ -213,62 +365,2250 @@ class TestTakeBind(TestCase):
         self.assertEqual(z, None)
 
 
-class TestBindings(TestCase):
+    def test_sequences(self):
+        for seq in ([1, 2, 3, 4], (1, 2, 3, 4), bytearray(b"\x01\x02\x03")):
+            a, b = takebind(seq)
+            self.assertEqual((a, b), (1, 2))
 
-    def test_bad(self):
-        def noop(*args, **kwds):
+            a, b, c, d, e = takebind(seq, 0)
+            self.assertEqual((a, b, c), (1, 2, 3))
+            self.assertEqual(e, 0)
+
+        a, b, c = takebind("xyz!")
+        self.assertEqual((a, b, c), ("x", "y", "z"))
+
+        a, (b, c) = takebind(["a", "bc", "d"])
+        self.assertEqual((a, b, c), ("a", "b", "c"))
+
+        # sequences aren't consumed, so binding again starts over
+        seq = [1, 2, 3]
+        a, b = takebind(seq)
+        c, d = takebind(seq)
+        self.assertEqual((a, b, c, d), (1, 2, 1, 2))
+
+        def oops():
+            a, b, c = takebind([1, 2])
+
+        self.assertRaises(ValueError, oops)
+
+
+    def test_fields(self):
+        data = bytearray(b"MAGI\x00\x02ABCDEF")
+
+        magic, version, rest = takebind(data, width=4)
+        self.assertEqual(magic.tobytes(), b"MAGI")
+        self.assertEqual(version.tobytes(), b"\x00\x02AB")
+        self.assertEqual(rest.tobytes(), b"CDEF")
+
+        # they're views onto data, not copies
+        data[0:4] = b"magi"
+        self.assertEqual(magic.tobytes(), b"magi")
+
+        def oops():
+            a, b, c, d = takebind(data, width=4)
+
+        self.assertRaises(ValueError, oops)
+
+        a, b, c, d = takebind(data, None, 5)
+        self.assertEqual(b.tobytes(), b"\x02ABCD")
+        self.assertEqual((c, d), (None, None))
+
+        def bad():
+            a, b = takebind(data, width=0)
+
+        self.assertRaises(ValueError, bad)
+
+
+    def test_lines(self):
+        from io import StringIO
+
+        lines = StringIO(u"header\nversion\nbody\nmore\n")
+
+        header, version = takebind(lines)
+        self.assertEqual((header, version), (u"header\n", u"version\n"))
+
+        # and the rest is still there to be read
+        self.assertEqual(lines.readline(), u"body\n")
+
+        more, last, after = takebind(lines, u"")
+        self.assertEqual((more, last, after), (u"more\n", u"", u""))
+
+
+class TestRowsBind(TestCase):
+
+    def test_rows(self):
+        rows = [{"a": n, "b": n * 2, "c": n * 3} for n in range(0, 10)]
+
+        found = []
+        for b, a in rowsbind(rows):
+            found.append((a, b))
+        self.assertEqual(found, [(n, n * 2) for n in range(0, 10)])
+
+        found = []
+        for c, in rowsbind(rows):
+            found.append(c)
+        self.assertEqual(found, [n * 3 for n in range(0, 10)])
+
+
+    def test_missing(self):
+        rows = [{"a": 1, "b": 2}, {"a": 3}]
+
+        def oops():
+            for a, b in rowsbind(rows):
+                pass
+
+        self.assertRaises(KeyError, oops)
+
+        found = []
+        for a, b in rowsbind(rows, None):
+            found.append((a, b))
+        self.assertEqual(found, [(1, 2), (3, None)])
+
+
+    def test_objects(self):
+        rows = []
+        for n in range(0, 3):
+            row = ModuleType("row")
+            row.a = n
+            row.b = -n
+            rows.append(row)
+
+        found = []
+        for a, b in objrowsbind(rows):
+            found.append((a, b))
+        self.assertEqual(found, [(0, 0), (1, -1), (2, -2)])
+
+        del rows[1].b
+
+        def oops():
+            for a, b in objrowsbind(rows):
+                pass
+
+        self.assertRaises(AttributeError, oops)
+
+        found = []
+        for a, b in objrowsbind(rows, "nope"):
+            found.append((a, b))
+        self.assertEqual(found, [(0, 0), (1, "nope"), (2, -2)])
+
+
+    def test_resolved_once(self):
+        cache_clear()
+
+        rows = [{"a": n} for n in range(0, 100)]
+        for a, in rowsbind(rows):
             pass
 
-        def bad_data(name):
-            # none of these tests should ever actually get this far!
-            self.assertFalse(True)
+        info = cache_info()
+        self.assertEqual(info.hits + info.misses, 1)
 
-        def bad_times():
-            funbind(bad_data)
 
-        self.assertRaises(ValueError, bad_times)
+    def test_not_a_loop(self):
+        def oops():
+            a, b = rowsbind([])
 
-        def bad_times():
-            return funbind(bad_data)
+        def uh_oh():
+            # the loop is in the generator's own code, not ours
+            return list(a for a, b in rowsbind([]))
 
-        self.assertRaises(ValueError, bad_times)
+        self.assertRaises(ValueError, oops)
+        self.assertRaises(ValueError, uh_oh)
 
-        def bad_times():
-            a = funbind(bad_data)
 
-        self.assertRaises(ValueError, bad_times)
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
-        def bad_times():
-            a, (b, c) = funbind(bad_data)
 
-        self.assertRaises(ValueError, bad_times)
+class TestColBind(TestCase):
 
-        def bad_times():
-            noop(funbind(bad_data))
+    def records(self):
+        return [{"price": 1.5 * n, "qty": n, "ts": "t%i" % n}
+                for n in range(0, 5)]
 
-        self.assertRaises(ValueError, bad_times)
 
-        def bad_times():
-            noop(*funbind(bad_data))
+    def test_columns(self):
+        records = self.records()
 
-        self.assertRaises(ValueError, bad_times)
+        qty, price, ts = colbind(records)
+        self.assertEqual(price, [1.5 * n for n in range(0, 5)])
+        self.assertEqual(qty, list(range(0, 5)))
+        self.assertEqual(ts, ["t%i" % n for n in range(0, 5)])
 
+        # a single column, and one-shot iterators
+        qty, = colbind(iter(records))
+        self.assertEqual(qty, list(range(0, 5)))
 
-    def test_global(self):
+        qty, price = colbind([])
+        self.assertEqual((qty, price), ([], []))
 
-        accu = []
-        def accumulate(name):
-            accu.append(name)
-            return "|%s|" % name
 
-        global x
+    def test_missing(self):
+        records = self.records()
+        del records[2]["qty"]
 
-        a, x = funbind(accumulate)
+        def oops():
+            qty, price = colbind(records)
 
-        self.assertEqual(accu, ["a", "x"])
-        self.assertEqual(a, "|a|")
-        self.assertEqual(x, "|x|")
-        self.assertEqual(x, globals()["x"])
+        self.assertRaises(KeyError, oops)
+
+        qty, price = colbind(records, -1)
+        self.assertEqual(qty, [0, 1, -1, 3, 4])
+
+
+    def test_typecodes(self):
+        records = self.records()
+
+        price, qty = colbind(records, typecodes="d")
+        self.assertEqual(price, array("d", [1.5 * n for n in range(0, 5)]))
+        self.assertEqual(qty, array("d", range(0, 5)))
+
+        price, qty, ts = colbind(records, typecodes={"qty": "l"})
+        self.assertEqual(type(price), list)
+        self.assertEqual(qty, array("l", range(0, 5)))
+        self.assertEqual(type(ts), list)
+
+
+    def test_objects(self):
+        records = []
+        for n in range(0, 3):
+            rec = ModuleType("rec")
+            rec.qty = n
+            rec.price = n * 2.0
+            records.append(rec)
+
+        price, qty = objcolbind(records, typecodes={"price": "d"})
+        self.assertEqual(price, array("d", [0.0, 2.0, 4.0]))
+        self.assertEqual(qty, [0, 1, 2])
+
+        del records[1].qty
+
+        def oops():
+            qty, = objcolbind(records)
+
+        self.assertRaises(AttributeError, oops)
+
+        qty, = objcolbind(records, None)
+        self.assertEqual(qty, [0, None, 2])
+
+
+    @skipIf(numpy is None, "requires NumPy")
+    def test_numpy(self):
+        records = self.records()
+
+        price, qty, ts = colbind(records, typecodes={"qty": "i"},
+                                 numpy=True)
+        self.assertEqual(price.dtype, numpy.float64)
+        self.assertEqual(qty.dtype, numpy.intc)
+        self.assertEqual(list(qty), list(range(0, 5)))
+        self.assertEqual(list(ts), ["t%i" % n for n in range(0, 5)])
+
+
+class CountingMapping(object):
+    """
+    An in-process stand-in for a remote-backed mapping, which counts
+    its round trips
+    """
+
+    def __init__(self, data):
+        self.data = dict(data)
+        self.trips = 0
+
+
+    def __getitem__(self, key):
+        self.trips += 1
+        return self.data[key]
+
+
+    def get(self, key, default=None):
+        self.trips += 1
+        return self.data.get(key, default)
+
+
+    def __getmany__(self, keys):
+        self.trips += 1
+        data = self.data
+        return dict((key, data[key]) for key in keys if key in data)
+
+
+class NoBulkMapping(CountingMapping):
+    # one that only does the bulk fetch when it's registered
+    __getmany__ = None
+
+
+    def mget(self, keys):
+        return CountingMapping.__getmany__(self, keys)
+
+
+class TestGetMany(TestCase):
+
+    def tearDown(self):
+        register_getmany(NoBulkMapping, None)
+
+
+    def test_getmany(self):
+        source = CountingMapping({"a": 1, "b": 2, "c": 3})
+
+        a, b, c = mapbind(source)
+        self.assertEqual((a, b, c), (1, 2, 3))
+        self.assertEqual(source.trips, 1)
+
+        a, d = mapbind(source, None)
+        self.assertEqual((a, d), (1, None))
+        self.assertEqual(source.trips, 2)
+
+        def oops():
+            a, d = mapbind(source)
+
+        self.assertRaises(KeyError, oops)
+        self.assertEqual(source.trips, 3)
+
+
+    def test_registered(self):
+        source = NoBulkMapping({"a": 1, "b": 2, "c": 3})
+
+        a, b, c = mapbind(source)
+        self.assertEqual((a, b, c), (1, 2, 3))
+        self.assertEqual(source.trips, 3)
+
+        register_getmany(NoBulkMapping, NoBulkMapping.mget)
+
+        a, b, c = mapbind(source)
+        self.assertEqual((a, b, c), (1, 2, 3))
+        self.assertEqual(source.trips, 4)
+
+        # and subclasses get it too
+        class Sub(NoBulkMapping):
+            pass
+
+        source = Sub({"a": 1, "b": 2})
+        a, b, c = mapbind(source, 0)
+        self.assertEqual((a, b, c), (1, 2, 0))
+        self.assertEqual(source.trips, 1)
+
+
+    def test_forgotten(self):
+        from mapbind._bulk import _resolved, getmany_for
+
+        class Temporary(CountingMapping):
+            pass
+
+        key = id(Temporary)
+        self.assertIs(getmany_for(Temporary), getmany_for(CountingMapping))
+        self.assertIn(key, _resolved)
+
+        # the resolved fetches don't keep their types alive
+        del Temporary
+        collect()
+        self.assertNotIn(key, _resolved)
+
+
+    @skipIf(sys.version_info < (3, 8), "requires Python 3.8")
+    def test_fastbind(self):
+        @fastbind
+        def bind(source):
+            a, b = mapbind(source)
+            c, d = mapbind(source, default=0)
+            return a, b, c, d
+
+        source = CountingMapping({"a": 1, "b": 2, "c": 3})
+        self.assertEqual(bind(source), (1, 2, 3, 0))
+        self.assertEqual(source.trips, 2)
+
+
+ASYNC_SRC = """
+from asyncio import sleep
+from mapbind import abind, aobjbind, afunbind
+
+class Store(object):
+    # a fake remote store, where every fetch takes a while
+
+    def __init__(self, data, delay=0.05):
+        self.data = data
+        self.delay = delay
+        self.trips = 0
+
+    async def _get(self, key):
+        self.trips += 1
+        await sleep(self.delay)
+        return self.data[key]
+
+    def __getitem__(self, key):
+        return self._get(key)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._get(name)
+
+class BulkStore(Store):
+    async def __agetmany__(self, keys):
+        self.trips += 1
+        await sleep(self.delay)
+        return dict((key, self.data[key]) for key in keys
+                    if key in self.data)
+
+async def items(source):
+    a, b, c = await abind(source)
+    return a, b, c
+
+async def items_default(source):
+    a, b, c = await abind(source, None)
+    return a, b, c
+
+async def attrs(source):
+    a, b = await aobjbind(source)
+    return a, b
+
+async def attrs_default(source):
+    a, z = await aobjbind(source, default=0)
+    return a, z
+
+async def called(fun):
+    x, y = await afunbind(fun)
+    return x, y
+
+async def not_awaited(source):
+    a, b = abind(source)
+"""
+
+
+@skipIf(sys.version_info < (3, 5), "requires Python 3.5")
+class TestAsyncBind(TestCase):
+
+    def setUp(self):
+        mod = ModuleType("mapbind_async_test")
+        exec(compile(ASYNC_SRC, "<async test>", "exec"), vars(mod))
+        self.mod = mod
+
+
+    def run_async(self, coro):
+        from asyncio import new_event_loop
+        loop = new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+
+    def test_items(self):
+        mod = self.mod
+        store = mod.Store({"a": 1, "b": 2, "c": 3})
+
+        start = time()
+        self.assertEqual(self.run_async(mod.items(store)), (1, 2, 3))
+        self.assertEqual(store.trips, 3)
+
+        # concurrent, so about one delay rather than three
+        self.assertTrue(time() - start < 0.12)
+
+        del store.data["b"]
+        self.assertRaises(KeyError, self.run_async, mod.items(store))
+        self.assertEqual(self.run_async(mod.items_default(store)),
+                         (1, None, 3))
+
+
+    def test_bulk(self):
+        mod = self.mod
+        store = mod.BulkStore({"a": 1, "b": 2})
+
+        self.assertEqual(self.run_async(mod.items_default(store)),
+                         (1, 2, None))
+        self.assertEqual(store.trips, 1)
+        self.assertRaises(KeyError, self.run_async, mod.items(store))
+
+
+    def test_attrs(self):
+        mod = self.mod
+        store = mod.Store({"a": 1, "b": 2})
+
+        self.assertEqual(self.run_async(mod.attrs(store)), (1, 2))
+
+        # a plain object works too, with nothing to await
+        obj = ModuleType("obj")
+        obj.a = 5
+        self.assertEqual(self.run_async(mod.attrs_default(obj)), (5, 0))
+        self.assertRaises(AttributeError, self.run_async, mod.attrs(obj))
+
+
+    def test_called(self):
+        mod = self.mod
+        store = mod.Store({"x": "X", "y": "Y"})
+
+        self.assertEqual(self.run_async(mod.called(store.__getitem__)),
+                         ("X", "Y"))
+        self.assertEqual(self.run_async(mod.called(str.upper)),
+                         ("X", "Y"))
+
+
+    def test_not_awaited(self):
+        mod = self.mod
+        self.assertRaises(ValueError, self.run_async,
+                          mod.not_awaited({}))
+
+
+    def test_precompile(self):
+        cache_clear()
+        self.assertEqual(precompile(self.mod), 5)
+        cache_clear()
+
+
+class TestRowBind(TestCase):
+
+    def setUp(self):
+        import sqlite3
+
+        self.db = db = sqlite3.connect(":memory:")
+        db.execute("create table stuff (a integer, b text, c real)")
+        db.executemany("insert into stuff values (?, ?, ?)",
+                       [(n, "b%i" % n, n / 2.0) for n in range(0, 2500)])
+
+
+    def tearDown(self):
+        self.db.close()
+
+
+    def test_cursor(self):
+        cursor = self.db.execute("select a, b, c from stuff order by a")
+
+        c, a = rowbind(cursor)
+        self.assertEqual((a, c), (0, 0.0))
+
+        b, = rowbind(cursor)
+        self.assertEqual(b, "b1")
+
+        cursor = self.db.execute("select a from stuff where a < 0")
+
+        def oops():
+            a, = rowbind(cursor)
+
+        self.assertRaises(ValueError, oops)
+
+
+    def test_row(self):
+        import sqlite3
+
+        self.db.row_factory = sqlite3.Row
+        row = self.db.execute("select a, b from stuff").fetchone()
+
+        b, a = rowbind(row)
+        self.assertEqual((a, b), (0, "b0"))
+
+        def oops():
+            a, c = rowbind(row)
+
+        self.assertRaises(KeyError, oops)
+
+        def nope():
+            a, b = rowbind((1, 2))
+
+        self.assertRaises(TypeError, nope)
+
+        b, a = rowbind({"a": 1, "b": 2})
+        self.assertEqual((a, b), (1, 2))
+
+
+    def test_stream(self):
+        cursor = self.db.execute("select a, b, c from stuff order by a")
+
+        found = []
+        for c, a in rowbind(cursor, 100):
+            found.append((a, c))
+        self.assertEqual(found, [(n, n / 2.0) for n in range(0, 2500)])
+
+        # and the default batch size
+        cursor = self.db.execute("select a, b from stuff order by a")
+        count = 0
+        for a, b in rowbind(cursor):
+            count += 1
+        self.assertEqual(count, 2500)
+
+        def nope():
+            for a, b in rowbind([(1, 2)]):
+                pass
+
+        self.assertRaises(TypeError, nope)
+
+
+    def test_plans(self):
+        cache_clear()
+
+        def bind(query):
+            b, a = rowbind(self.db.execute(query))
+            return a, b
+
+        self.assertEqual(bind("select a, b from stuff"), (0, "b0"))
+        self.assertEqual(bind("select b, c, a from stuff"), (0, "b0"))
+        self.assertEqual(bind("select a, b from stuff"), (0, "b0"))
+
+        # one site, with one plan for each distinct set of columns
+        self.assertEqual(cache_info().currsize, 1)
+        site = mapbind_module._cache._entries.popitem()[1]
+        self.assertEqual(sorted(site.plans),
+                         [("a", "b"), ("b", "c", "a")])
+
+
+HEADER = {
+    "seq": ("<I", 0),
+    "ts": ("<Q", 4),
+    "length": ("<H", 12),
+    "flags": ("<B", 14),
+    "tag": ("<4s", 16),
+}
+
+
+def _header(seq):
+    return pack("<IQHBx4s", seq, seq * 1000, seq % 7, 1, b"t%03i" % seq)
+
+
+class TestStructBind(TestCase):
+
+    def test_struct(self):
+        buf = _header(5)
+
+        seq, ts, length = structbind(buf, HEADER)
+        self.assertEqual((seq, ts, length), (5, 5000, 5))
+
+        # any order, any subset, any buffer
+        tag, seq = structbind(bytearray(buf), HEADER)
+        self.assertEqual((tag, seq), (b"t005", 5))
+
+        buf = b"junk" + _header(9)
+        length, = structbind(memoryview(buf), HEADER, 4)
+        self.assertEqual(length, 2)
+
+
+    def test_native(self):
+        # native sizes, which aren't the standard ones for l everywhere,
+        # and which are the only sizes there are for P
+        big = 2 ** 40 if calcsize("@l") == 8 else 2 ** 30
+        buf = pack("@l", big) + pack("@P", 12345)
+        layout = {"x": ("l", 0), "p": ("@P", calcsize("@l"))}
+
+        x, p = structbind(buf, layout)
+        self.assertEqual((x, p), (big, 12345))
+
+        found = []
+        for x, p in structbind_iter(buf * 2, layout):
+            found.append((x, p))
+        self.assertEqual(found, [(big, 12345)] * 2)
+
+
+    def test_bad_layout(self):
+        buf = _header(1)
+
+        def missing():
+            seq, nope = structbind(buf, HEADER)
+
+        self.assertRaises(KeyError, missing)
+
+        def overlapping():
+            a, b = structbind(buf, {"a": ("I", 0), "b": ("H", 2)})
+
+        self.assertRaises(ValueError, overlapping)
+
+        def mixed():
+            a, b = structbind(buf, {"a": ("<I", 0), "b": (">H", 4)})
+
+        self.assertRaises(ValueError, mixed)
+
+        def multiple():
+            a, b = structbind(buf, {"a": ("2I", 0), "b": ("H", 8)})
+
+        self.assertRaises(ValueError, multiple)
+
+
+    def test_plans(self):
+        cache_clear()
+
+        def bind(buf):
+            # a fresh but equal layout every time
+            ts, seq = structbind(buf, dict(HEADER))
+            return seq, ts
+
+        for n in range(0, 5):
+            self.assertEqual(bind(_header(n)), (n, n * 1000))
+
+        # one plan for them all, besides the last layout seen
+        site = mapbind_module._cache._entries.popitem()[1]
+        self.assertEqual(len(site.plans), 2)
+        self.assertEqual(site.plans["layout"][0], HEADER)
+
+
+    def test_same_layout(self):
+        cache_clear()
+
+        def bind(buf, layout):
+            seq, ts = structbind(buf, layout)
+            return seq, ts
+
+        self.assertEqual(bind(_header(1), HEADER), (1, 1000))
+
+        # the same layout object again never needs a key made for it
+        orig = mapbind_module.layout_key
+
+        def no_keys(layout):
+            self.fail("should have matched the last layout")
+
+        mapbind_module.layout_key = no_keys
+        try:
+            self.assertEqual(bind(_header(2), HEADER), (2, 2000))
+        finally:
+            mapbind_module.layout_key = orig
+
+        # and a different one still gets its own plan
+        other = dict(HEADER, seq=("<H", 0))
+        self.assertEqual(bind(_header(3), other), (3, 3000))
+        self.assertEqual(bind(_header(4), HEADER), (4, 4000))
+
+
+    def test_iter(self):
+        from mmap import mmap, ACCESS_READ
+        from tempfile import TemporaryFile
+
+        with TemporaryFile() as tmp:
+            for n in range(0, 100):
+                tmp.write(_header(n))
+            tmp.write(b"partial")
+            tmp.flush()
+
+            mm = mmap(tmp.fileno(), 0, access=ACCESS_READ)
+            try:
+                found = []
+                for ts, seq in structbind_iter(mm, HEADER):
+                    found.append((seq, ts))
+            finally:
+                mm.close()
+
+        self.assertEqual(found, [(n, n * 1000) for n in range(0, 100)])
+
+        # records padded out past the end of the layout
+        buf = b"".join(_header(n) + b"pad!" for n in range(0, 3))
+        found = []
+        for seq, tag in structbind_iter(buf, HEADER, size=24):
+            found.append((seq, tag))
+        self.assertEqual(found, [(0, b"t000"), (1, b"t001"), (2, b"t002")])
+
+
+    @skipIf(numpy is None, "requires NumPy")
+    def test_numpy(self):
+        dtype = numpy.dtype([("seq", "<u4"), ("ts", "<u8"),
+                             ("length", "<u2"), ("flags", "u1"),
+                             ("pad", "V1"), ("tag", "S4")])
+        self.assertEqual(dtype.itemsize, 20)
+
+        buf = b"".join(_header(n) for n in range(0, 3))
+
+        length, seq = structbind(buf, dtype)
+        self.assertEqual((length, seq), (0, 0))
+
+        found = []
+        for seq, tag in structbind_iter(buf, dtype):
+            found.append((seq, tag))
+        self.assertEqual(found, [(0, b"t000"), (1, b"t001"), (2, b"t002")])
+
+
+class TestMultiBind(TestCase):
+
+    def test_layers(self):
+        args = {"page": 2}
+        form = {"user": "bob", "page": 3}
+        defaults = {"user": None, "page": 1, "limit": 10}
+
+        user, page, limit = multibind(args, form, defaults)
+        self.assertEqual((user, page, limit), ("bob", 2, 10))
+
+        page, = multibind(form, args)
+        self.assertEqual(page, 3)
+
+
+    def test_missing(self):
+        args = {"page": 2}
+
+        def oops():
+            page, limit = multibind(args, {})
+
+        self.assertRaises(KeyError, oops)
+
+        page, limit = multibind(args, {}, default=20)
+        self.assertEqual((page, limit), (2, 20))
+
+        def nope():
+            page, limit = multibind(args, fallback=20)
+
+        self.assertRaises(TypeError, nope)
+
+        # no sources at all is a bit silly, but fine
+        page, limit = multibind(default=None)
+        self.assertEqual((page, limit), (None, None))
+
+
+    def test_mappings(self):
+        from collections import defaultdict
+
+        args = CountingMapping({"page": 2})
+        fallback = defaultdict(lambda: "made up")
+
+        page, limit = multibind(args, fallback)
+        self.assertEqual((page, limit), (2, "made up"))
+
+        # and the defaultdict shadows the rest, as it would in a
+        # ChainMap
+        page, limit = multibind({}, fallback, {"limit": 10})
+        self.assertEqual((page, limit), ("made up", "made up"))
+
+
+class CountingDict(dict):
+    # remembers how many times each key was looked up
+
+    def __init__(self, *args, **kwds):
+        super(CountingDict, self).__init__(*args, **kwds)
+        self.looked = {}
+
+
+    def __getitem__(self, key):
+        self.looked[key] = self.looked.get(key, 0) + 1
+        return super(CountingDict, self).__getitem__(key)
+
+
+class TestDeepBind(TestCase):
+
+    def test_paths(self):
+        user = CountingDict(name="bob", email="bob@example.com")
+        doc = CountingDict(user=user, meta={"ts": 1234}, top=True)
+
+        user__name, user__email, meta__ts, top = deepbind(doc)
+        self.assertEqual((user__name, user__email, meta__ts, top),
+                         ("bob", "bob@example.com", 1234, True))
+
+        # the shared prefix was only walked the once
+        self.assertEqual(doc.looked, {"user": 1, "meta": 1, "top": 1})
+        self.assertEqual(user.looked, {"name": 1, "email": 1})
+
+
+    def test_sep(self):
+        doc = {"user": {"name": "bob"}, "user__name": "not bob"}
+
+        user_name, = deepbind(doc, sep="_")
+        self.assertEqual(user_name, "bob")
+
+        # a separator that isn't in the name leaves it a plain key
+        user__name, = deepbind(doc, sep="_x_")
+        self.assertEqual(user__name, "not bob")
+
+        def oops():
+            user__, = deepbind(doc)
+
+        self.assertRaises(ValueError, oops)
+
+
+    def test_default(self):
+        doc = {"user": {"name": "bob"}}
+
+        def oops():
+            user__name, user__email = deepbind(doc)
+
+        self.assertRaises(KeyError, oops)
+
+        user__name, user__email, meta__ts__sec = deepbind(doc, None)
+        self.assertEqual((user__name, user__email, meta__ts__sec),
+                         ("bob", None, None))
+
+        # a plain binding, with no path to follow
+        user, = deepbind(doc, default=0)
+        self.assertEqual(user, {"name": "bob"})
+
+
+    def test_default_not_mapping(self):
+        # a path that runs into something without keys can't be
+        # followed either
+        for value in (None, "bob", 5):
+            user__name, user__name__first, other = \
+                deepbind({"user": value, "other": 1}, default="anon")
+            self.assertEqual((user__name, user__name__first, other),
+                             ("anon", "anon", 1))
+
+        user__name, = deepbind(None, default="anon")
+        self.assertEqual(user__name, "anon")
+
+
+    def test_strict_not_mapping(self):
+        # and without a default, it's a KeyError like any other
+        for value in (None, ["bob"], 5):
+            def oops():
+                user__name, = deepbind({"user": value})
+
+            self.assertRaises(KeyError, oops)
+
+
+    def test_objects(self):
+        request = ModuleType("request")
+        request.user = ModuleType("user")
+        request.user.name = "bob"
+        request.user.email = "bob@example.com"
+
+        user__name, user__email = objdeepbind(request)
+        self.assertEqual((user__name, user__email),
+                         ("bob", "bob@example.com"))
+
+        def oops():
+            user__name, user__get = objdeepbind(request)
+
+        self.assertRaises(AttributeError, oops)
+
+        user__name, user__get, meta__ts = objdeepbind(request, "nope")
+        self.assertEqual((user__name, user__get, meta__ts),
+                         ("bob", "nope", "nope"))
+
+
+    def test_keywords(self):
+        msg = ModuleType("msg")
+        setattr(msg, "from", "bob")
+        request = ModuleType("request")
+        request.msg = msg
+
+        msg__from, = objdeepbind(request)
+        self.assertEqual(msg__from, "bob")
+
+        msg__from, msg__class = objdeepbind(request, None)
+        self.assertEqual((msg__from, msg__class), ("bob", None))
+
+
+    def test_warm(self):
+        cache_clear()
+
+        docs = [{"a": {"b": i, "c": -i}} for i in range(3)]
+        found = []
+        for doc in docs:
+            a__b, a__c = deepbind(doc)
+            found.append((a__b, a__c))
+
+        self.assertEqual(found, [(0, 0), (1, -1), (2, -2)])
+
+        info = cache_info()
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.hits, 2)
+
+
+class TestLazyBind(TestCase):
+
+    def test_deferred(self):
+        called = []
+
+        def load(name):
+            called.append(name)
+            return name.upper()
+
+        config, template, user = lazybind(load)
+        self.assertEqual(called, [])
+
+        self.assertEqual(template + "!", "TEMPLATE!")
+        self.assertEqual(called, ["template"])
+
+        # and remembered after that
+        self.assertEqual(len(template), 8)
+        self.assertEqual(force(template), "TEMPLATE")
+        self.assertEqual(called, ["template"])
+
+        self.assertEqual(force(user), "USER")
+        self.assertEqual(called, ["template", "user"])
+
+
+    def test_transparent(self):
+        data = {"num": 7, "seq": [3, 1, 2], "text": "hi",
+                "fun": lambda x, y=1: x * y, "obj": ModuleType("obj")}
+
+        num, seq, text, fun, obj = lazymapbind(data)
+
+        self.assertEqual(num + 1, 8)
+        self.assertEqual(1 + num, 8)
+        self.assertEqual(num * num, 49)
+        self.assertEqual(-num, -7)
+        self.assertEqual(divmod(num, 2), (3, 1))
+        self.assertTrue(num > 5)
+        self.assertEqual(num, 7)
+        self.assertEqual(hash(num), hash(7))
+        self.assertEqual([0, 1, 2, 3, 4, 5, 6, 7][num], 7)
+        self.assertEqual(int(num), 7)
+        self.assertEqual("%05.1f" % float(num), "007.0")
+        self.assertEqual("{0:03}".format(num), "007")
+
+        self.assertEqual(sorted(seq), [1, 2, 3])
+        self.assertEqual(len(seq), 3)
+        self.assertTrue(2 in seq)
+        self.assertEqual(seq[0], 3)
+        seq[0] = 4
+        self.assertEqual(data["seq"], [4, 1, 2])
+
+        self.assertEqual(str(text), "hi")
+        self.assertEqual(repr(text), repr("hi"))
+        self.assertEqual(text.upper(), "HI")
+        self.assertTrue(isinstance(text, str))
+        self.assertTrue(text)
+
+        self.assertEqual(fun(3, y=2), 6)
+
+        obj.color = "red"
+        self.assertEqual(data["obj"].color, "red")
+        self.assertEqual(obj.color, "red")
+
+        # but identity is the one thing a proxy can't fake
+        self.assertFalse(obj is data["obj"])
+        self.assertTrue(force(obj) is data["obj"])
+        self.assertTrue(force(data) is data)
+
+
+    def test_default(self):
+        a, b = lazymapbind({"a": 1})
+        self.assertEqual(a, 1)
+        self.assertRaises(KeyError, force, b)
+
+        a, b = lazymapbind({"a": 1}, None)
+        self.assertTrue(force(b) is None)
+
+        obj = ModuleType("obj")
+        obj.a = 1
+
+        a, b = lazyobjbind(obj)
+        self.assertEqual(a + 1, 2)
+        self.assertRaises(AttributeError, force, b)
+
+        a, b = lazyobjbind(obj, 0)
+        self.assertEqual(b, 0)
+
+
+    def test_released(self):
+        from weakref import ref
+
+        class Thing(object):
+            pass
+
+        obj = Thing()
+        obj.a = [1, 2]
+        watch = ref(obj)
+
+        a, = lazyobjbind(obj)
+        del obj
+        collect()
+
+        # the proxy needs its source until it has fetched from it
+        self.assertFalse(watch() is None)
+        self.assertEqual(a, [1, 2])
+
+        collect()
+        self.assertTrue(watch() is None)
+        self.assertEqual(a, [1, 2])
+
+
+class TestBindings(TestCase):
+
+    def test_bad(self):
+        def noop(*args, **kwds):
+            pass
+
+        def bad_data(name):
+            # none of these tests should ever actually get this far!
+            self.assertFalse(True)
+
+        def bad_times():
+            funbind(bad_data)
+
+        self.assertRaises(ValueError, bad_times)
+
+        def bad_times():
+            return funbind(bad_data)
+
+        self.assertRaises(ValueError, bad_times)
+
+        def bad_times():
+            a = funbind(bad_data)
+
+        self.assertRaises(ValueError, bad_times)
+
+        def bad_times():
+            a, (b, c) = funbind(bad_data)
+
+        self.assertRaises(ValueError, bad_times)
+
+        def bad_times():
+            noop(funbind(bad_data))
+
+        self.assertRaises(ValueError, bad_times)
+
+        def bad_times():
+            noop(*funbind(bad_data))
+
+        self.assertRaises(ValueError, bad_times)
+
+
+    def test_global(self):
+
+        accu = []
+        def accumulate(name):
+            accu.append(name)
+            return "|%s|" % name
+
+        global x
+
+        a, x = funbind(accumulate)
+
+        self.assertEqual(accu, ["a", "x"])
+        self.assertEqual(a, "|a|")
+        self.assertEqual(x, "|x|")
+        self.assertEqual(x, globals()["x"])
+
+
+    def test_deref(self):
+
+        data = {"a": 1, "b": 2, "c": 3}
+
+        a, b, c = mapbind(data)
+
+        def closure():
+            return a, b, c
+
+        self.assertEqual(closure(), (1, 2, 3))
+
+
+    def test_extended_arg(self):
+
+        # enough bindings that both the UNPACK_SEQUENCE count and
+        # the STORE_FAST indexes need an EXTENDED_ARG prefix
+        names = ["v%03i" % i for i in range(0, 300)]
+        src = ("def binder(data):\n"
+               "    %s = mapbind(data)\n"
+               "    return [%s]\n") % (", ".join(names), ", ".join(names))
+
+        glbls = {"mapbind": mapbind}
+        exec(compile(src, "<mapbind test>", "exec"), glbls)
+        binder = glbls["binder"]
+
+        data = dict((name, index) for index, name in enumerate(names))
+        self.assertEqual(binder(data), list(range(0, 300)))
+
+
+class TestCache(TestCase):
+
+    def setUp(self):
+        cache_clear()
+
+
+    def tearDown(self):
+        cache_resize(None)
+        cache_clear()
+
+
+    @staticmethod
+    def _make_binder(src):
+        # compile up a fresh code object, the way an exec'd template
+        # would, so that nothing else is holding onto it
+        glbls = {"mapbind": mapbind}
+        code = compile(src, "<mapbind test>", "exec")
+        exec(code, glbls)
+        return glbls.pop("binder")
+
+
+    def test_info(self):
+        data = {"a": 1, "b": 2}
+
+        def binder():
+            a, b = mapbind(data)
+            return a, b
+
+        self.assertEqual(cache_info(), (0, 0, None, 0))
+
+        self.assertEqual(binder(), (1, 2))
+        info = cache_info()
+        self.assertEqual(info.hits, 0)
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.currsize, 1)
+
+        self.assertEqual(binder(), (1, 2))
+        self.assertEqual(binder(), (1, 2))
+        info = cache_info()
+        self.assertEqual(info.hits, 2)
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.currsize, 1)
+
+        cache_clear()
+        self.assertEqual(cache_info(), (0, 0, None, 0))
+
+
+    def test_collected(self):
+        binder = self._make_binder("def binder(d):\n"
+                                   "    a, b = mapbind(d)\n"
+                                   "    return a, b\n")
+
+        self.assertEqual(binder({"a": 1, "b": 2}), (1, 2))
+        self.assertEqual(cache_info().currsize, 1)
+
+        del binder
+        collect()
+
+        self.assertEqual(cache_info().currsize, 0)
+
+
+    def test_bounded(self):
+        cache_resize(2)
+
+        binders = [self._make_binder("def binder(d):\n"
+                                     "    a, b = mapbind(d)\n"
+                                     "    return a + b + %i\n" % i)
+                   for i in range(0, 4)]
+
+        data = {"a": 1, "b": 2}
+        for index, binder in enumerate(binders):
+            self.assertEqual(binder(data), 3 + index)
+
+        info = cache_info()
+        self.assertEqual(info.maxsize, 2)
+        self.assertEqual(info.currsize, 2)
+        self.assertEqual(info.misses, 4)
+
+        # the two most recent should still be present
+        binders[3](data)
+        binders[2](data)
+        self.assertEqual(cache_info().hits, 2)
+
+        # and the oldest has been evicted
+        binders[0](data)
+        self.assertEqual(cache_info().misses, 5)
+
+        cache_resize(1)
+        self.assertEqual(cache_info().currsize, 1)
+
+
+    def _hammer(self, binders, threads=16, rounds=20):
+        # every thread calls every binder, all starting at once.
+        # Returns the (code, offset) of every decode that happened.
+
+        from threading import Event, Thread
+
+        decoded = []
+        decode = mapbind_module.decode_bindings
+
+        def counting_decode(code, index, *args):
+            decoded.append((code, index))
+            return decode(code, index, *args)
+
+        start = Event()
+        failures = []
+        data = {"a": 1, "b": 2}
+
+        def work():
+            start.wait()
+            try:
+                for _ in range(rounds):
+                    for index, binder in enumerate(binders):
+                        self.assertEqual(binder(data), 3 + index)
+            except Exception as exc:
+                failures.append(exc)
+
+        workers = [Thread(target=work) for _ in range(threads)]
+
+        mapbind_module.decode_bindings = counting_decode
+        try:
+            for worker in workers:
+                worker.start()
+            start.set()
+            for worker in workers:
+                worker.join()
+        finally:
+            mapbind_module.decode_bindings = decode
+
+        self.assertEqual(failures, [])
+        return decoded
+
+
+    def test_threads(self):
+        binders = [self._make_binder("def binder(d):\n"
+                                     "    a, b = mapbind(d)\n"
+                                     "    return a + b + %i\n" % i)
+                   for i in range(0, 200)]
+
+        decoded = self._hammer(binders)
+
+        # each site was only decoded the once, no matter how many
+        # threads missed on it together
+        self.assertEqual(len(decoded), 200)
+        self.assertEqual(len(set(decoded)), 200)
+        self.assertEqual(cache_info().currsize, 200)
+
+
+    def test_threads_bounded(self):
+        cache_resize(50)
+
+        binders = [self._make_binder("def binder(d):\n"
+                                     "    a, b = mapbind(d)\n"
+                                     "    return a + b + %i\n" % i)
+                   for i in range(0, 200)]
+
+        # with eviction going on, sites get decoded again, but the
+        # results still have to be right
+        self._hammer(binders)
+        self.assertEqual(cache_info().currsize, 50)
+
+
+class TestPersist(TestCase):
+
+    def setUp(self):
+        cache_clear()
+        self.tmpdir = mkdtemp()
+        self.path = join(self.tmpdir, "sites")
+
+
+    def tearDown(self):
+        cache_persist(None)
+        cache_clear()
+        rmtree(self.tmpdir)
+
+
+    @staticmethod
+    def _make_binder(names, filename="<mapbind test>"):
+        src = ("def binder(d):\n"
+               "    %s = mapbind(d)\n"
+               "    return %s\n" % (names, names))
+        glbls = {"mapbind": mapbind}
+        exec(compile(src, filename, "exec"), glbls)
+        return glbls.pop("binder")
+
+
+    def _stored(self):
+        from mapbind._persist import PersistentStore
+        return PersistentStore(self.path)._load()
+
+
+    def test_saved(self):
+        cache_persist(self.path)
+
+        binder = self._make_binder("a, b")
+        self.assertEqual(binder({"a": 1, "b": 2}), (1, 2))
+
+        # nothing is written until we're done
+        self.assertFalse(listdir(self.tmpdir))
+
+        cache_persist(None)
+        self.assertEqual(listdir(self.tmpdir), ["sites"])
+
+        stored = self._stored()
+        self.assertEqual(list(stored.values()), [("a", "b")])
+
+        (identity, _offset, noname, lead), = stored
+        self.assertEqual(identity[:3], ("<mapbind test>", "binder", 1))
+        self.assertFalse(noname)
+        self.assertEqual(lead, ())
+
+
+    def test_loaded(self):
+        binder = self._make_binder("a, b")
+
+        cache_persist(self.path)
+        self.assertEqual(binder({"a": 1, "b": 2}), (1, 2))
+        cache_persist(None)
+
+        # doctor the saved entry, as proof that the next run reads
+        # it rather than decoding the site again
+        from mapbind._persist import dump_entries, load_entries
+        entries = load_entries(self.path)
+        for key in entries:
+            entries[key] = ("b", "a")
+        dump_entries(self.path, entries)
+
+        cache_clear()
+        cache_persist(self.path)
+        self.assertEqual(binder({"a": 1, "b": 2}), (2, 1))
+
+
+    def test_stale(self):
+        cache_persist(self.path)
+        self.assertEqual(self._make_binder("a, b")({"a": 1, "b": 2}),
+                         (1, 2))
+        cache_persist(None)
+
+        # the same place and the same bytecode, only different names
+        cache_clear()
+        cache_persist(self.path)
+        self.assertEqual(self._make_binder("c, d")({"c": 3, "d": 4}),
+                         (3, 4))
+        cache_persist(None)
+
+        # and the old entry was dropped
+        stored = self._stored()
+        self.assertEqual(list(stored.values()), [("c", "d")])
+
+
+    def test_gone(self):
+        filename = join(self.tmpdir, "gone.py")
+        with open(filename, "w") as out:
+            out.write("# not for long\n")
+
+        cache_persist(self.path)
+        self.assertEqual(self._make_binder("a, b", filename)({"a": 1,
+                                                             "b": 2}),
+                         (1, 2))
+        self.assertEqual(self._make_binder("c, d")({"c": 3, "d": 4}),
+                         (3, 4))
+        cache_persist(None)
+        self.assertEqual(len(self._stored()), 2)
+
+        unlink(filename)
+
+        cache_clear()
+        cache_persist(self.path)
+        self._make_binder("e, f", "<elsewhere>")({"e": 5, "f": 6})
+        cache_persist(None)
+
+        self.assertEqual(sorted(self._stored().values()),
+                         [("c", "d"), ("e", "f")])
+
+
+    def test_failures(self):
+        binder = self._make_binder("a")
+
+        cache_persist(self.path)
+        self.assertRaises(ValueError, binder, {"a": 1})
+        cache_persist(None)
+
+        cache_clear()
+        cache_persist(self.path)
+        self.assertRaises(ValueError, binder, {"a": 1})
+
+
+    def test_garbage(self):
+        with open(self.path, "wb") as out:
+            out.write(b"this is not a marshal")
+
+        cache_persist(self.path)
+        self.assertEqual(self._make_binder("a, b")({"a": 1, "b": 2}),
+                         (1, 2))
+        cache_persist(None)
+
+        self.assertEqual(list(self._stored().values()), [("a", "b")])
+
+
+    def test_header(self):
+        from marshal import dumps
+        from struct import calcsize, pack
+        from mapbind._persist import MAGIC_NUMBER, load_entries
+
+        cache_persist(self.path)
+        self._make_binder("a, b")({"a": 1, "b": 2})
+        cache_persist(None)
+
+        entries = load_entries(self.path)
+        self.assertEqual(len(entries), 1)
+
+        # the same entries, but as a bare marshal, or from another
+        # version of the format, aren't read
+        for header in (b"", b"mapbind\0" + pack("<I", 1) + MAGIC_NUMBER):
+            with open(self.path, "wb") as out:
+                out.write(header + dumps(entries))
+            self.assertEqual(load_entries(self.path), {})
+
+
+MANIFEST_SRC = """
+from mapbind import mapbind, objbind, takebind
+
+def good(data):
+    a, b = mapbind(data)
+    (c, d), e = takebind([(1, 2), 3])
+    return a, b
+
+def nested(data):
+    a, (b, c) = mapbind(data)
+
+def unpacked(data):
+    return mapbind(data)
+
+def attributes(obj, data):
+    obj.a, obj.b = objbind(data)
+"""
+
+
+class Output(object):
+    # stands in for sys.stdout
+    def __init__(self):
+        self.lines = []
+
+
+    def write(self, text):
+        self.lines.append(text)
+
+
+class TestManifest(TestCase):
+
+    MOD = "mapbind_manifest_test_mod"
+
+
+    def setUp(self):
+        cache_clear()
+        self.tmpdir = mkdtemp()
+        self.source = join(self.tmpdir, self.MOD + ".py")
+        self.manifest = join(self.tmpdir, "manifest")
+
+        with open(self.source, "w") as out:
+            out.write(MANIFEST_SRC)
+
+        sys.path.insert(0, self.tmpdir)
+
+
+    def tearDown(self):
+        cache_persist(None)
+        cache_clear()
+        sys.path.remove(self.tmpdir)
+        sys.modules.pop(self.MOD, None)
+        rmtree(self.tmpdir)
+
+
+    def _main(self, *args):
+        from mapbind.__main__ import main
+
+        stdout = sys.stdout
+        sys.stdout = output = Output()
+        try:
+            status = main(["scan", "-q"] + list(args))
+        finally:
+            sys.stdout = stdout
+
+        return status, "".join(output.lines)
+
+
+    def test_problems(self):
+        from mapbind._manifest import scan
+
+        entries, files, sites, problems = scan([self.tmpdir])
+        self.assertEqual(files, 1)
+        self.assertEqual(sites, 5)
+        self.assertEqual([(filename, line, binder)
+                          for filename, line, binder, _msg in problems],
+                         [(self.source, 10, "mapbind"),
+                          (self.source, 13, "mapbind"),
+                          (self.source, 16, "objbind")])
+
+        # the broken sites are in the manifest too, so that they fail
+        # without decoding
+        self.assertEqual(len(entries), 5)
+        self.assertEqual(set(found for found in entries.values()
+                             if not isinstance(found, str)),
+                         set([2, ("a", "b")]))
+
+
+    def test_main(self):
+        status, output = self._main("-o", self.manifest, self.tmpdir)
+        self.assertEqual(status, 1)
+        self.assertEqual(len(output.splitlines()), 3)
+        self.assertTrue(output.startswith(self.source + ":10: mapbind: "))
+
+        with open(self.source, "w") as out:
+            out.write("def broken(:\n")
+
+        status, output = self._main(self.source)
+        self.assertEqual(status, 1)
+        self.assertTrue(output.startswith(self.source + ":1: "))
+
+        with open(self.source, "w") as out:
+            out.write("from mapbind import mapbind\n")
+
+        self.assertEqual(self._main(self.source), (0, ""))
+
+
+    def test_missing(self):
+        # can't be read isn't the same as problems found
+        missing = join(self.tmpdir, "missing.py")
+
+        stderr = sys.stderr
+        sys.stderr = errors = Output()
+        try:
+            status, output = self._main(self.source, missing)
+        finally:
+            sys.stderr = stderr
+
+        self.assertEqual((status, output), (2, ""))
+        self.assertTrue("".join(errors.lines).startswith(
+            "could not read %s: " % missing))
+
+
+    def test_loaded(self):
+        self._main("-o", self.manifest, self.tmpdir)
+        self.assertEqual(load_manifest(self.manifest), 5)
+
+        from mapbind import _decode
+
+        def no_decoding(*args):
+            self.fail("should have come from the manifest")
+
+        decode = _decode.decode_bindings
+        _decode.decode_bindings = no_decoding
+        try:
+            mod = __import__(self.MOD)
+
+            self.assertEqual(mod.good({"a": 1, "b": 2}), (1, 2))
+            self.assertRaises(ValueError, mod.nested, {})
+            self.assertRaises(ValueError, mod.unpacked, {})
+
+        finally:
+            _decode.decode_bindings = decode
+
+
+class TestStats(TestCase):
+
+    def setUp(self):
+        cache_clear()
+
+
+    def tearDown(self):
+        stats_disable()
+        stats_clear()
+
+
+    def _where(self, fun):
+        # the "filename:line" key for the binding in fun, which is
+        # always on the line after the def
+        code = fun.__code__
+        return "%s:%i" % (code.co_filename, code.co_firstlineno + 1)
+
+
+    def test_disabled(self):
+        self.assertEqual(stats(), {})
+
+        # and nothing has been swapped in
+        self.assertTrue(mapbind_module._binding_site is
+                        mapbind_module._plain_binding_site)
+
+
+    def test_enabled(self):
+        def binder(data):
+            a, b = mapbind(data)
+            return a, b
+
+        def other(data):
+            a, = objbind(data, None)
+            return a
+
+        stats_enable()
+        for _ in range(3):
+            binder({"a": 1, "b": 2})
+        other(binder)
+        stats_disable()
+
+        # no longer recording
+        binder({"a": 1, "b": 2})
+
+        found = stats()
+        self.assertEqual(len(found), 2)
+
+        site = found[self._where(binder)]
+        self.assertEqual(site.kind, "mapbind")
+        self.assertEqual((site.calls, site.hits, site.misses), (3, 2, 1))
+        self.assertTrue(site.seconds > 0)
+
+        site = found[self._where(other)]
+        self.assertEqual(site.kind, "objbind")
+        self.assertEqual((site.calls, site.hits, site.misses), (1, 0, 1))
+
+        self.assertTrue(mapbind_module._binding_site is
+                        mapbind_module._plain_binding_site)
+
+        stats_clear()
+        self.assertEqual(stats(), {})
+
+
+    def test_collecting(self):
+        def binder(data):
+            a, b = mapbind(data)
+            return a, b
+
+        stats_enable()
+
+        with collecting() as outer:
+            binder({"a": 1, "b": 2})
+
+            with collecting() as inner:
+                binder({"a": 1, "b": 2})
+
+            binder({"a": 1, "b": 2})
+
+        binder({"a": 1, "b": 2})
+
+        where = self._where(binder)
+        self.assertEqual(inner.stats()[where].calls, 1)
+        self.assertEqual(outer.stats()[where].calls, 3)
+        self.assertEqual(stats()[where].calls, 4)
+
+
+    def test_rows(self):
+        import sqlite3
+
+        conn = sqlite3.connect(":memory:")
+        cursor = conn.execute("select 1 as a, 2 as b")
+
+        def binder(cursor):
+            a, b = rowbind(cursor)
+            return a, b
+
+        with collecting() as recorded:
+            self.assertEqual(binder(cursor), (1, 2))
+
+        site = recorded.stats()[self._where(binder)]
+        self.assertEqual(site.kind, "rowbind")
+        self.assertEqual(site.misses, 1)
+
+
+@skipIf(sys.version_info < (3, 7), "requires Python 3.7")
+class TestImport(TestCase):
+
+    # modules which import mapbind shouldn't need, until something
+    # actually misses the binding-site cache
+    HEAVY = ("inspect", "dis", "opcode", "pkgutil", "tokenize", "typing",
+             "mapbind._decode", "mapbind._lazy", "mapbind._records",
+             "mapbind._rows", "mapbind._scan", )
+
+    # milliseconds, cumulative. Generous, since it's measured on
+    # whatever else the machine is busy with, and the pyc files may
+    # not be written. The list above is the sharper check.
+    BUDGET = 50
+
+
+    def _importtime(self):
+        # the -X importtime report for a fresh interpreter importing
+        # mapbind, as {name: cumulative microseconds}
+        from os import environ
+        from os.path import dirname
+        from subprocess import PIPE, Popen
+
+        env = dict(environ)
+        env.pop("MAPBIND_PERSIST", None)
+        env["PYTHONPATH"] = dirname(dirname(__file__))
+
+        proc = Popen([sys.executable, "-X", "importtime",
+                      "-c", "import mapbind"],
+                     stdout=PIPE, stderr=PIPE, env=env)
+        _out, err = proc.communicate()
+        self.assertEqual(proc.returncode, 0, err)
+
+        found = {}
+        for line in err.decode("utf8").splitlines():
+            if not line.startswith("import time:"):
+                continue
+            fields = line[len("import time:"):].split("|")
+            if fields[0].strip().isdigit():
+                found[fields[2].strip()] = int(fields[1])
+        return found
+
+
+    def test_deferred(self):
+        found = self._importtime()
+
+        self.assertIn("mapbind", found)
+        for name in self.HEAVY:
+            self.assertNotIn(name, found)
+
+
+    def test_budget(self):
+        found = self._importtime()
+        self.assertLess(found["mapbind"] / 1000.0, self.BUDGET)
+
+
+PRECOMPILE_SRC = """
+from mapbind import mapbind, objbind, funbind, takebind, rowsbind
+import mapbind as mb
+
+def simple(data):
+    a, b = mapbind(data)
+    return a + b
+
+def defaulted(data):
+    a, b, c = mapbind(data, default=0)
+    return a + b + c
+
+def nested(data):
+    def inner():
+        x, y = mapbind(data)
+        return x * y
+    return inner()
+
+def attribute(data):
+    a, b = mb.mapbind(data)
+    return a - b
+
+def taken(seq):
+    (a, b), c = takebind(seq)
+    return a + b + c
+
+def looped(rows):
+    total = 0
+    for a, b in rowsbind(rows):
+        total += a * b
+    return total
+
+def lamb(data):
+    return (lambda d: funbind(d.get))(data)
+
+def unpacked_elsewhere(data):
+    found = mapbind(data)
+    return found
+
+class Klass(object):
+    def method(self):
+        a, b = objbind(self)
+        return a + b
+
+    @staticmethod
+    def static(data):
+        b, a = mapbind(data)
+        return a - b
+"""
+
+
+class TestPrecompile(TestCase):
+
+    def setUp(self):
+        cache_clear()
+
+        mod = ModuleType("mapbind_precompile_test")
+        exec(compile(PRECOMPILE_SRC, "<precompile test>", "exec"),
+             vars(mod))
+        self.mod = mod
+
+
+    def tearDown(self):
+        cache_clear()
+
+
+    def test_precompile(self):
+        mod = self.mod
+
+        # simple, defaulted, inner, attribute, taken, looped, method,
+        # and static
+        self.assertEqual(precompile(mod), 8)
+        self.assertEqual(cache_info().currsize, 8)
+
+        # nothing new the second time around
+        self.assertEqual(precompile(mod), 0)
+
+        data = {"a": 5, "b": 2, "x": 3, "y": 4}
+        self.assertEqual(mod.simple(data), 7)
+        self.assertEqual(mod.defaulted(data), 7)
+        self.assertEqual(mod.nested(data), 12)
+        self.assertEqual(mod.attribute(data), 3)
+        self.assertEqual(mod.taken([(1, 2), 3]), 6)
+        self.assertEqual(mod.looped([data, data]), 20)
+        self.assertEqual(mod.Klass.static(data), 3)
+
+        klass = mod.Klass()
+        klass.a = 1
+        klass.b = 2
+        self.assertEqual(klass.method(), 3)
+
+        info = cache_info()
+        self.assertEqual(info.misses, 0)
+        self.assertEqual(info.hits, 8)
+
+        # the non-unpacking uses still fail as they should
+        self.assertRaises(ValueError, mod.lamb, data)
+        self.assertRaises(ValueError, mod.unpacked_elsewhere, data)
+
+
+    def test_not_recursive(self):
+        self.assertEqual(precompile(self.mod.nested, recursive=False), 0)
+        self.assertEqual(precompile(self.mod.nested), 1)
+
+
+    def test_package(self):
+        # precompiling ourselves is a bit navel-gazing, but it'll
+        # walk the package's submodules and shouldn't find anything
+        # to bind
+        self.assertEqual(precompile(mapbind_module), 0)
+
+
+REWRITE_SRC = """
+from mapbind import mapbind, objbind as ob, funbind
+from mapbind import funbind as fb
+import mapbind as mb
+
+def mapped(data):
+    a, b = mapbind(data)
+    return a, b
+
+def defaulted(data):
+    a, b = mapbind(data, None)
+    return a, b
+
+def keyword_default(data):
+    a, b = mb.mapbind(data, default=0)
+    return a, b
+
+def attrs(obj):
+    a, b = ob(obj)
+    return a, b
+
+def attrs_default(obj):
+    a, b = ob(obj, "nope")
+    return a, b
+
+def called(fun):
+    x, y = funbind(fun)
+    return x, y
+
+def called_named():
+    # named functions are for the runtime funbind to resolve
+    x, y = funbind("tests:_shout")
+    return x, y
+
+def complicated(data):
+    # not a simple name, so left for the runtime to bind
+    a, b = mapbind(dict(data))
+    return a, b
+
+def shadowed(data, fb):
+    # fb is not our funbind here, so it mustn't be rewritten
+    a, b = fb(data)
+    return a, b
+"""
+
+
+def _fast_mapped(data):
+    a, b = mapbind(data)
+    return a, b
+
+
+def _fast_defaulted(data):
+    a, b = mapbind(data, None)
+    c, d = mapbind(data, default=0)
+    return a, b, c, d
+
+
+def _fast_attrs(obj):
+    a, = objbind(obj)
+    b, c = objbind(obj, "nope")
+    return a, b, c
+
+
+def _fast_named():
+    x, y = funbind("tests:_shout")
+    return x, y
+
+
+def _fast_called(fun, seq):
+    x, y = funbind(fun)
+    (a, b), c = takebind(seq)
+    return x, y, a, b, c
+
+
+def _fast_deep(doc):
+    a__b, a__c = deepbind(doc)
+    d__e, = deepbind(doc, 0)
+    return a__b, a__c, d__e
+
+
+def _fast_closure(data):
+    binder = mapbind
+
+    def inner():
+        a, b = binder(data)
+        return a, b
+
+    return inner
+
+
+def _fast_nothing(data):
+    return mapbind(data)
+
+
+@skipIf(not (3, 8) <= sys.version_info[:2] <= (3, 13),
+        "requires Python 3.8 to 3.13")
+class TestFastBind(TestCase):
+
+    def _binders(self, code):
+        # the binders still being loaded by the code
+        from dis import get_instructions
+        return set(instr.argval for instr in get_instructions(code)
+                   if instr.opname in ("LOAD_GLOBAL", "LOAD_DEREF") and
+                   instr.argval in ("mapbind", "objbind",
+                                    "funbind", "takebind"))
+
+
+    def test_specialized(self):
+        for func in (_fast_mapped, _fast_defaulted,
+                     _fast_attrs, _fast_called):
+            fast = fastbind(func)
+            self.assertFalse(fast is func)
+            self.assertEqual(fast.__name__, func.__name__)
+            self.assertEqual(fast.__wrapped__, func)
+            self.assertFalse(self._binders(fast.__code__), func.__name__)
+
+
+    def test_results(self):
+        cache_clear()
+
+        data = {"a": 1, "b": 2}
+        self.assertEqual(fastbind(_fast_mapped)(data), (1, 2))
+        self.assertEqual(fastbind(_fast_defaulted)({"a": 1, "c": 3}),
+                         (1, None, 3, 0))
+        self.assertRaises(KeyError, fastbind(_fast_mapped), {"a": 1})
+
+        obj = ModuleType("obj")
+        obj.a = 1
+        obj.c = 3
+        self.assertEqual(fastbind(_fast_attrs)(obj), (1, "nope", 3))
+        del obj.a
+        self.assertRaises(AttributeError, fastbind(_fast_attrs), obj)
+
+        self.assertEqual(fastbind(_fast_called)(str.upper, [(1, 2), 3]),
+                         ("X", "Y", 1, 2, 3))
+
+        self.assertEqual(fastbind(_fast_deep)({"a": {"b": 1, "c": 2}}),
+                         (1, 2, 0))
+
+        # nothing should have needed the binding-site cache
+        info = cache_info()
+        self.assertEqual(info.hits, 0)
+        self.assertEqual(info.misses, 0)
+
+
+    def test_nested(self):
+        # the binder is a free variable of inner, but only known once
+        # the closure exists
+        inner = _fast_closure({"a": 1, "b": 2})
+        fast = fastbind(inner)
+        self.assertFalse(fast is inner)
+        self.assertEqual(fast(), (1, 2))
+
+
+    def test_unchanged(self):
+        self.assertTrue(fastbind(_fast_nothing) is _fast_nothing)
+        self.assertTrue(fastbind(len) is len)
+
+
+    def test_unsupported(self):
+        # a version whose bytecode we don't know is left alone
+        from mapbind import _specialize
+
+        supported = _specialize.SUPPORTED
+        _specialize.SUPPORTED = False
+        try:
+            self.assertTrue(fastbind(_fast_mapped) is _fast_mapped)
+        finally:
+            _specialize.SUPPORTED = supported
+
+
+@skipIf(sys.version_info < (3, 7), "requires Python 3.7")
+class TestRewriter(TestCase):
+
+    PKG = "mapbind_rewrite_test_pkg"
+
+
+    def setUp(self):
+        self.tmpdir = mkdtemp()
+
+        pkgdir = join(self.tmpdir, self.PKG)
+        makedirs(pkgdir)
+
+        with open(join(pkgdir, "__init__.py"), "w") as out:
+            out.write("")
+
+        with open(join(pkgdir, "mod.py"), "w") as out:
+            out.write(REWRITE_SRC)
+
+        sys.path.insert(0, self.tmpdir)
+        self.finder = install_rewriter([self.PKG])
+
+
+    def tearDown(self):
+        uninstall_rewriter(self.finder)
+        sys.path.remove(self.tmpdir)
+
+        for name in list(sys.modules):
+            if name.split(".")[0] == self.PKG:
+                del sys.modules[name]
+
+        rmtree(self.tmpdir)
+
+
+    def _import(self):
+        name = self.PKG + ".mod"
+        sys.modules.pop(name, None)
+        __import__(name)
+        return sys.modules[name]
+
+
+    def test_rewritten(self):
+        mod = self._import()
+
+        # the rewritten functions never reference the binders
+        for name in ("mapped", "defaulted", "keyword_default",
+                     "attrs", "attrs_default", "called"):
+            code = getattr(mod, name).__code__
+            self.assertFalse(set(code.co_names).intersection(
+                ("mapbind", "ob", "funbind")), name)
+
+        # but the one that couldn't be rewritten still does
+        self.assertTrue("mapbind" in mod.complicated.__code__.co_names)
+        self.assertTrue("funbind" in mod.called_named.__code__.co_names)
+
+        data = {"a": 1, "b": 2}
+        self.assertEqual(mod.mapped(data), (1, 2))
+        self.assertEqual(mod.defaulted({"a": 1}), (1, None))
+        self.assertEqual(mod.keyword_default({"b": 2}), (0, 2))
+        self.assertEqual(mod.complicated(data), (1, 2))
+        self.assertRaises(KeyError, mod.mapped, {"a": 1})
+
+        obj = ModuleType("obj")
+        obj.a = 1
+        self.assertEqual(mod.attrs_default(obj), (1, "nope"))
+        self.assertRaises(AttributeError, mod.attrs, obj)
+
+        self.assertEqual(mod.called(str.upper), ("X", "Y"))
+        self.assertEqual(mod.called_named(), ("X!", "Y!"))
+        self.assertEqual(mod.shadowed(data, lambda d: (5, 6)), (5, 6))
+
+
+    def test_cached(self):
+        dont_write = sys.dont_write_bytecode
+        sys.dont_write_bytecode = False
+        try:
+            self._import()
+        finally:
+            sys.dont_write_bytecode = dont_write
+
+        cached = listdir(join(self.tmpdir, self.PKG, "__pycache__"))
+        self.assertTrue(any(".opt-mapbind" in name and
+                            name.startswith("mod.") for name in cached))
+
+        # the second import comes from our cached bytecode, and should
+        # never need to compile anything
+        from mapbind import _rewrite
+
+        def no_compiling(*args, **kwds):
+            self.fail("should have been loaded from cache")
+
+        orig = _rewrite.rewrite_source
+        _rewrite.rewrite_source = no_compiling
+        try:
+            mod = self._import()
+        finally:
+            _rewrite.rewrite_source = orig
+
+        self.assertEqual(mod.mapped({"a": 1, "b": 2}), (1, 2))
+
+
+    def test_shadowed_getattr(self):
+        from mapbind._rewrite import rewrite_source
+
+        src = "\n".join((
+            "from mapbind import objbind",
+            "def attrs(obj):",
+            "    a, b = objbind(obj, 'nope')",
+            "    return a, b",
+        ))
+        self.assertEqual(rewrite_source(src)[1], 1)
+
+        # with its own getattr, the module keeps the runtime objbind
+        src += "\ndef getattr(obj, name, default):\n    return 'mine'\n"
+        code, count = rewrite_source(src)
+        self.assertEqual(count, 0)
+
+        glbls = {}
+        exec(code, glbls)
+
+        obj = ModuleType("obj")
+        obj.a = 1
+        self.assertEqual(glbls["attrs"](obj), (1, "nope"))
+
+
+class Mangled(object):
+    def __init__(self, data):
+        self.__data = data
+
+
+    def bind(self):
+        a, b = mapbind(self.__data)
+        return a, b
+
+
+@skipIf(sys.version_info < (3, 7), "requires Python 3.7")
+class TestRewriteFunction(TestCase):
+
+    def _rewrite(self, func):
+        from mapbind._rewrite import rewrite_function
+        return rewrite_function(func)
+
+
+    def test_rewritten(self):
+        for func in (_fast_mapped, _fast_defaulted, _fast_attrs):
+            rewritten = self._rewrite(func)
+            self.assertIsNot(rewritten, func)
+            self.assertEqual(rewritten.__name__, func.__name__)
+            self.assertIs(rewritten.__wrapped__, func)
+            self.assertFalse(set(rewritten.__code__.co_names).intersection(
+                ("mapbind", "objbind")), func.__name__)
+            self.assertEqual(rewritten.__code__.co_firstlineno,
+                             func.__code__.co_firstlineno)
+
+        rewritten = self._rewrite(_fast_mapped)
+        self.assertEqual(rewritten({"a": 1, "b": 2}), (1, 2))
+        self.assertRaises(KeyError, rewritten, {"a": 1})
+
+        rewritten = self._rewrite(_fast_defaulted)
+        self.assertEqual(rewritten({"a": 1, "d": 4}), (1, None, 0, 4))
+
+        obj = ModuleType("obj")
+        obj.a, obj.c = 1, 3
+        self.assertEqual(self._rewrite(_fast_attrs)(obj), (1, "nope", 3))
+
+
+    def test_shadowed_getattr(self):
+        glbls = {"objbind": objbind, "getattr": lambda *args: "mine"}
+        func = FunctionType(_fast_attrs.__code__, glbls)
+
+        # only the site with a default relies on getattr
+        rewritten = self._rewrite(func)
+        self.assertIn("objbind", rewritten.__code__.co_names)
+
+        obj = ModuleType("obj")
+        obj.a, obj.c = 1, 3
+        self.assertEqual(rewritten(obj), (1, "nope", 3))
+
+
+    def test_closure(self):
+        inner = _fast_closure({"a": 1, "b": 2})
+        rewritten = self._rewrite(inner)
+
+        self.assertIsNot(rewritten, inner)
+        self.assertEqual(rewritten.__code__.co_freevars, ("data", ))
+        self.assertEqual(rewritten(), (1, 2))
+
+
+    def test_left_alone(self):
+        # nothing to rewrite, no source to be found, private names
+        # that would need mangling, and named functions for funbind
+        self.assertIs(self._rewrite(_fast_nothing), _fast_nothing)
+        self.assertIs(self._rewrite(_fast_named), _fast_named)
+        self.assertEqual(_fast_named(), ("X!", "Y!"))
+
+        lam = eval("lambda data: data")
+        self.assertIs(self._rewrite(lam), lam)
+
+        bind = Mangled.bind
+        self.assertIs(self._rewrite(bind), bind)
+        self.assertEqual(Mangled({"a": 1, "b": 2}).bind(), (1, 2))
+
+
+    def test_fastbind(self):
+        # which is what fastbind does on PyPy
+        from mapbind import _specialize
+
+        pypy = _specialize.PYPY
+        _specialize.PYPY = True
+        try:
+            fast = fastbind(_fast_mapped)
+        finally:
+            _specialize.PYPY = pypy
+
+        self.assertIs(fast.__wrapped__, _fast_mapped)
+        self.assertNotIn("mapbind", fast.__code__.co_names)
+        self.assertEqual(fast({"a": 1, "b": 2}), (1, 2))
 
 
 #